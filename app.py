@@ -8,6 +8,8 @@ from flask_discord import DiscordOAuth2Session
 
 # Import our custom login_required decorator
 from utils.auth import login_required
+from utils.members import get_member_profile, invalidate_member
+from utils.identity import get_current_user, remember_user
 logger = logging.getLogger(__name__)
 
 def create_app():
@@ -38,6 +40,9 @@ def create_app():
     register_blueprints(app)
     logger.debug(f"Registering blueprints")
     
+    # Register maintenance commands (flask --app app <command>)
+    register_commands(app)
+    
     return app
 
 def configure_logging(app):
@@ -74,15 +79,61 @@ def register_blueprints(app):
     from features.signup import signup_bp
     from features.missions import missions_bp
     from features.campaigns import campaigns_bp
+    from features.api import api_bp
     
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(signup_bp)
     app.register_blueprint(missions_bp)
     app.register_blueprint(campaigns_bp)
+    app.register_blueprint(api_bp)
     
     # You'll add more blueprints here as you create them
 
+def register_commands(app):
+    """Register Flask CLI maintenance commands"""
+    import click
+    from utils.backends import create_backend
+    from utils.backends.migrate import import_json_storage
+
+    @app.cli.command("migrate-storage")
+    @click.option("--to", "target_name", default="sqlite", show_default=True,
+                  help="Backend to import the JSON mission/campaign files into")
+    def migrate_storage(target_name):
+        """Import instance/missions/*.json and instance/campaigns/*.json into another backend"""
+        target = create_backend(target_name, app.instance_path, app.config)
+        missions, campaigns = import_json_storage(app.instance_path, target)
+        click.echo(f"Imported {missions} missions and {campaigns} campaigns into {target_name} storage")
+
+    @app.cli.command("rebuild-mission-index")
+    def rebuild_mission_index():
+        """Rebuild the JSON backend's mission/flight index from the mission files"""
+        backend = create_backend("json", app.instance_path, app.config)
+        entries = backend.rebuild_mission_index()
+        flights = sum(len(entry.get("flights", [])) for entry in entries.values())
+        click.echo(f"Indexed {len(entries)} missions and {flights} flights")
+
+    @app.cli.command("import-flights")
+    @click.argument("mission_id")
+    @click.argument("sheet", type=click.Path(exists=True, dir_okay=False))
+    def import_flights_command(mission_id, sheet):
+        """Create the flights of a CSV or JSON ATO sheet in a mission (all or nothing)"""
+        from models.flight_sheet import parse_sheet, import_flights, SheetError
+        from utils.journal import journal_actor
+        with open(sheet, encoding="utf-8") as f:
+            text = f.read()
+        fmt = "json" if sheet.lower().endswith(".json") else "csv"
+        try:
+            with journal_actor("cli"):
+                version, flights = import_flights(mission_id, parse_sheet(text, fmt))
+        except SheetError as e:
+            for error in e.errors:
+                click.echo(f"Row {error['row']}: {error['message']}" if error["row"] else error["message"], err=True)
+            raise SystemExit(1)
+        for flight in flights:
+            click.echo(f"{flight.callsign} {flight.flight_number}  TACAN {flight.tacan_channel}  {flight.intraflight_freq}")
+        click.echo(f"Imported {len(flights)} flights, mission is now version {version}")
+
 # Create the Flask application
 app = create_app()
 
@@ -106,25 +157,14 @@ def root():
     # User is authenticated at this point thanks to @login_required
     
     try:
-        # Get Discord user and roles
-        discord = current_app.discord
-        user = discord.fetch_user()
+        # Get Discord user (from the session) and roles
+        user = get_current_user()
         user_id = user.id
         
-        # Fetch roles from bot API
-        import requests
-        try:
-            resp = requests.get(f"http://localhost:8000/roles/{user_id}", timeout=2)
-            resp.raise_for_status()
-            response_data = resp.json()
-            user_roles = response_data.get("roles", [])
-            
-            # Try to get nickname
-            nickname = response_data.get("nickname", user.username)
-        except Exception as e:
-            logger.error(f"Could not fetch roles from bot: {e}")
-            user_roles = []
-            nickname = user.username
+        # Roles and nickname from the bot (cached)
+        profile = get_member_profile(user_id, user.username)
+        user_roles = profile["roles"]
+        nickname = profile["nickname"]
             
         # Get role config
         admin_role = current_app.config.get("ADMIN_ROLE")
@@ -191,11 +231,9 @@ def discord_callback():
         if discord.authorized:
             # Successfully authorized
             user = discord.fetch_user()
-            session['user_id'] = user.id
-            session['username'] = user.username
-            session['avatar'] = user.avatar_url
-            session['is_authenticated'] = True
-            session.modified = True
+            # Fresh login: make sure roles/nickname are re-read from the bot
+            invalidate_member(user.id)
+            remember_user(user)
             
             logger.debug(f"Successfully authenticated user {user.username} ({user.id})")
             
@@ -212,6 +250,24 @@ def discord_callback():
         session.clear()
         return redirect(url_for("auth.login"))
 
+@app.route("/health")
+def health():
+    """Liveness check"""
+    from flask import jsonify
+    return jsonify({"status": "ok"})
+
+@app.route("/health/stats")
+@login_required
+def health_stats():
+    """The bot API client's counters and the roster fragment cache stats"""
+    from flask import jsonify
+    from utils.bot_client import get_bot_client
+    from utils.fragment_cache import fragment_stats
+    return jsonify({
+        "bot_api": get_bot_client().stats(),
+        "fragment_cache": fragment_stats()
+    })
+
 @app.errorhandler(404)
 def page_not_found(e):
     """Handle 404 errors"""
@@ -0,0 +1,167 @@
+"""
+ASGI entry point, for serving with uvicorn instead of Apache/mod_wsgi:
+
+    uvicorn asgi:application --host 127.0.0.1 --port 5000
+
+The Flask app (same blueprints, same config) runs inside a2wsgi's
+WSGIMiddleware, which hands each Flask request to a worker thread. The waits
+that used to hold a thread are done on the event loop instead:
+
+- /signup/mission/<id>/events, the live roster stream: the same
+  MissionEventStream as the Flask route, but the stream awaits between polls,
+  so an open connection holds no thread; each poll borrows one only for a
+  stat() or an indexed read. That is why LIVE_ROSTER defaults to on here.
+- member profiles: when the logged-in user's profile is missing from the
+  member cache (see utils/members.py), it is fetched with aiohttp first and
+  cached, so the Flask view finds it in memory instead of waiting on the bot.
+  The user behind a session cookie is learnt from the Flask request that
+  resolved it, so checking the cache costs no session or member store read.
+
+ASGI_THREADS (default 40) caps the worker threads for Flask requests and
+storage reads.
+"""
+import io
+import os
+import sys
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+import anyio
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from flask import session, g, request
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from app import app as flask_app
+from utils.members import prefetch_settings, profile_due, prefetch_member_profile
+from utils.mission_events import MissionEventStream, stream_settings, stream_opening, live_roster_enabled
+
+logger = logging.getLogger(__name__)
+
+# Open streams cost no thread here, so the live roster is on unless the config turns it off
+flask_app.config.setdefault("LIVE_ROSTER", True)
+
+DEFAULT_THREADS = 40
+# Session cookies whose user is remembered for prefetching (oldest dropped first)
+MAX_SESSION_USERS = 10000
+# Scope key under which the Flask request reports the user it resolved
+IDENTITY_SCOPE_KEY = "ajac.identity"
+
+# aiohttp session for calls made on the event loop, open while the server runs
+_http = None
+# session cookie -> (user_id, username), as resolved by Flask. Only used to pick
+# the profile to prefetch, never to authenticate.
+_session_users = {}
+
+def _in_app(func, *args):
+    """Call func inside the Flask app context (from a worker thread)"""
+    with flask_app.app_context():
+        return func(*args)
+
+def _session_user(environ):
+    """The session's (user_id, username), or None if nobody is logged in"""
+    with flask_app.request_context(environ):
+        if not (session.get("user_id") or session.get("is_authenticated") is True):
+            return None
+        return session.get("user_id"), session.get("username")
+
+@flask_app.after_request
+def _report_identity(response):
+    """Hand the user this request resolved back to MemberPrefetch"""
+    identity = request.environ.get("asgi.scope", {}).get(IDENTITY_SCOPE_KEY)
+    user = g.get("current_user")
+    if identity is not None and user is not None:
+        identity["user"] = (str(user.id), user.username)
+    return response
+
+def _profile_due(user_id):
+    with flask_app.app_context():
+        return profile_due(user_id)
+
+class MemberPrefetch:
+    """Fetch the logged-in user's member profile on the event loop before Flask needs it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _http is None or "/static/" in scope["path"]:
+            await self.app(scope, receive, send)
+            return
+        cookie = HTTPConnection(scope).cookies.get(flask_app.config.get("SESSION_COOKIE_NAME", "session"))
+        user = _session_users.get(cookie) if cookie else None
+        if user and _profile_due(user[0]):
+            try:
+                settings = await anyio.to_thread.run_sync(_in_app, prefetch_settings)
+                if settings:
+                    await prefetch_member_profile(settings, _http, user[0], user[1])
+            except Exception as e:
+                # The view just fetches the profile itself
+                logger.warning(f"Could not prefetch member profile: {e}")
+        identity = scope[IDENTITY_SCOPE_KEY] = {}
+        await self.app(scope, receive, send)
+        if cookie and identity.get("user") and identity["user"] != user:
+            _session_users.pop(cookie, None)
+            _session_users[cookie] = identity["user"]
+            if len(_session_users) > MAX_SESSION_USERS:
+                del _session_users[next(iter(_session_users))]
+
+async def mission_event_stream(request):
+    """utils/mission_events.py's stream, driven from the event loop"""
+    mission_id = request.path_params["mission_id"]
+    if not _in_app(live_roster_enabled):
+        return JSONResponse({"error": "Live roster updates are disabled"}, status_code=404)
+    user = await anyio.to_thread.run_sync(_session_user, build_environ(request.scope, io.BytesIO()))
+    if user is None:
+        return JSONResponse({"error": "Login required"}, status_code=401)
+    since = request.headers.get("last-event-id") or request.query_params.get("since")
+    poll_interval, max_duration = _in_app(stream_settings)
+    stream = MissionEventStream(mission_id, since)
+
+    async def events():
+        deadline = time.monotonic() + max_duration
+        yield stream_opening()
+        while time.monotonic() < deadline:
+            for event in await anyio.to_thread.run_sync(_in_app, stream.poll):
+                yield event
+            if stream.done:
+                return
+            await asyncio.sleep(poll_interval)
+        logger.debug(f"Event stream for mission {mission_id} reached SSE_MAX_DURATION, client will reconnect")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Stop nginx from buffering the stream
+        "X-Accel-Buffering": "no"
+    })
+
+@asynccontextmanager
+async def lifespan(app):
+    import aiohttp
+    global _http
+    anyio.to_thread.current_default_thread_limiter().total_tokens = \
+        flask_app.config.get("ASGI_THREADS", DEFAULT_THREADS)
+    _http = aiohttp.ClientSession()
+    try:
+        yield
+    finally:
+        await _http.close()
+        _http = None
+
+application = Starlette(
+    routes=[
+        Route("/signup/mission/{mission_id}/events", mission_event_stream),
+        # Everything else is the Flask app as it is served under WSGI
+        Mount("/", app=WSGIMiddleware(flask_app, workers=flask_app.config.get("ASGI_THREADS", DEFAULT_THREADS))),
+    ],
+    middleware=[Middleware(MemberPrefetch)],
+    lifespan=lifespan,
+)
@@ -0,0 +1,98 @@
+"""
+Count mission file I/O per created flight.
+
+Creates flights on a throwaway mission in a temporary instance folder and
+reports how many times the mission file was read and written for each
+create_flight() call. The create-flight route does no mission I/O of its
+own (create_flight checks the form against the mission it loads), so these
+are also the route's counts. Run from the project root:
+
+    python benchmarks/create_flight_io.py [--flights 6]
+"""
+import os
+import sys
+import argparse
+import builtins
+import tempfile
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+import utils.fileio
+import utils.backends.json_backend
+
+# One flight per squadron so the run stays within every squadron's callsign bank
+SQUADRONS = ["331", "335", "337", "339", "440", "42"]
+
+FLIGHT_DATA = {
+    "departure_base": "ENBO",
+    "recovery_base": "ENBO",
+    "operations_area": "SALTY",
+    "mission_type": "CAP",
+}
+
+@contextmanager
+def count_mission_io(missions_dir, counts):
+    """Count opens of mission files for reading and atomic writes of mission files"""
+    real_open = builtins.open
+    real_write = utils.fileio.atomic_write_bytes
+
+    def counting_open(file, mode='r', *args, **kwargs):
+        if str(file).startswith(missions_dir) and 'r' in mode:
+            counts["reads"] += 1
+        return real_open(file, mode, *args, **kwargs)
+
+    def counting_write(path, data):
+        if str(path).startswith(missions_dir):
+            counts["writes"] += 1
+        return real_write(path, data)
+
+    # atomic_write_json looks atomic_write_bytes up in utils.fileio at call time,
+    # the JSON backend imported it into its own module
+    builtins.open = counting_open
+    utils.fileio.atomic_write_bytes = counting_write
+    utils.backends.json_backend.atomic_write_bytes = counting_write
+    try:
+        yield
+    finally:
+        builtins.open = real_open
+        utils.fileio.atomic_write_bytes = real_write
+        utils.backends.json_backend.atomic_write_bytes = real_write
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--flights", type=int, default=len(SQUADRONS))
+    args = parser.parse_args()
+
+    instance_path = tempfile.mkdtemp(prefix="ajac-bench-")
+    app = Flask("app", instance_path=instance_path,
+                root_path=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    app.config["STORAGE_BACKEND"] = "json"
+
+    from utils.storage import save_mission
+    from utils.resources import get_squadron_aircraft
+    from models.flight import create_flight
+
+    with app.app_context():
+        save_mission({"id": "BENCH | EX01", "name": "BENCH | EX01", "status": "planned"})
+        missions_dir = os.path.join(instance_path, "missions")
+        print(f"{'flight':>6} {'reads':>6} {'writes':>6}")
+        totals = {"reads": 0, "writes": 0}
+        for n in range(1, args.flights + 1):
+            counts = {"reads": 0, "writes": 0}
+            # A tail can only be in one flight: take the squadron's next one
+            squadron = SQUADRONS[(n - 1) % len(SQUADRONS)]
+            tails = sorted(get_squadron_aircraft(squadron))
+            flight_data = dict(FLIGHT_DATA, squadron=squadron,
+                               aircraft_id=tails[(n - 1) // len(SQUADRONS) % len(tails)])
+            with count_mission_io(missions_dir, counts):
+                create_flight("BENCHEX01", flight_data, f"user{n}", f"PILOT{n}")
+            print(f"{n:>6} {counts['reads']:>6} {counts['writes']:>6}")
+            totals["reads"] += counts["reads"]
+            totals["writes"] += counts["writes"]
+        print(f"average: {totals['reads'] / args.flights:.1f} reads, "
+              f"{totals['writes'] / args.flights:.1f} writes per created flight")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare mission file formats: size on disk and load/save latency.
+
+Builds a realistic mission (40 flights of 4 pilots by default), then saves and
+loads it repeatedly through the JSON file backend in each MISSION_FILE_FORMAT.
+Run from the project root:
+
+    python benchmarks/mission_format.py [--flights 40] [--rounds 200]
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.backends.json_backend import JSONBackend
+from utils.serialization import CODECS
+
+def make_mission(flight_count):
+    mission = {"id": "BENCH | EX01", "name": "BENCH | EX01", "status": "planned",
+               "campaign_id": "BENCH", "time_real": "2026-01-01T18:00", "flights": {}, "signups": []}
+    for n in range(flight_count):
+        flight_id = str(uuid.uuid4())
+        prefix = f"{10 + n % 8:02d}"
+        codes = [f"{prefix}{format((n % 16) * 4 + i, '02o')}" for i in range(4)]
+        mission["flights"][flight_id] = {
+            "flight_id": flight_id, "mission_id": "BENCHEX01", "squadron": "331",
+            "callsign": "VIPER", "flight_number": n % 9, "departure_base": "ENBO",
+            "recovery_base": "ENBO", "operations_area": "SALTY", "mission_type": "CAP",
+            "remarks": "Fragged as briefed, tanker on station at 1820", "aircraft_ids": [str(600 + n)],
+            "transponder_codes": codes, "tacan_channel": f"{n + 1}X", "intraflight_freq": "138.25",
+            "pilots": [{"user_id": str(100000000000000000 + n * 4 + p), "username": f"pilot{n}_{p}",
+                        "nickname": f"PILOT {n}-{p}", "position": str(p + 1),
+                        "joined_at": datetime.now().isoformat(), "callsign": f"VIPER{n % 9}{p + 1}",
+                        "transponder": codes[p], "aircraft": str(600 + n * 4 + p)} for p in range(4)],
+            "status": "active", "side": "blue", "created_at": datetime.now().isoformat()
+        }
+    return mission
+
+def bench(file_format, mission, rounds):
+    backend = JSONBackend(tempfile.mkdtemp(prefix="ajac-bench-"), file_format)
+    # Time just the document read/write, not the mission index upkeep
+    key = "BENCHEX01"
+    start = time.perf_counter()
+    for _ in range(rounds):
+        backend._write_document(backend.missions_dir, key, mission)
+    save_ms = (time.perf_counter() - start) / rounds * 1000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        backend.load_mission(key)
+    load_ms = (time.perf_counter() - start) / rounds * 1000
+    size = os.path.getsize(backend.mission_path(key))
+    return size, save_ms, load_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--flights", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    mission = make_mission(args.flights)
+    print(f"{args.flights} flights, {args.rounds} rounds")
+    print(f"{'format':>8} {'bytes':>8} {'save ms':>8} {'load ms':>8}")
+    for file_format in CODECS:
+        size, save_ms, load_ms = bench(file_format, mission, args.rounds)
+        print(f"{file_format:>8} {size:>8} {save_ms:>8.3f} {load_ms:>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import discord
 import asyncio
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+import msgspec
 import uvicorn
 import sys
 import os
@@ -11,6 +12,7 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 INSTANCE_DIR = os.path.join(BASE_DIR, "instance")
 sys.path.insert(0, INSTANCE_DIR)
 from instance import secret_config as config
+from utils.member_store import MemberStore, DEFAULT_FILENAME as MEMBER_STORE_FILENAME
 
 # Set up logging
 log_dir = os.path.join(INSTANCE_DIR, "logs")
@@ -53,6 +55,37 @@ intents.members = True  # Needed to fetch members
 bot = discord.Client(intents=intents)
 api = FastAPI()
 
+# Local member store the website reads roles/nicknames from (see utils/member_store.py)
+MEMBER_STORE_PATH = getattr(config, "MEMBER_STORE_PATH", "") or os.path.join(INSTANCE_DIR, MEMBER_STORE_FILENAME)
+member_store = MemberStore(MEMBER_STORE_PATH)
+# How often to tell the website the store is still being kept up to date (seconds)
+HEARTBEAT_INTERVAL = 60
+heartbeat_task = None
+
+def member_record(member):
+    """Roles and nickname of a guild member, in the shape the website expects"""
+    # Get member's nickname, falling back to username if no nickname exists
+    nickname = member.nick if member.nick else member.name
+    return {
+        "roles": [{"id": str(role.id), "name": role.name} for role in member.roles],
+        "nickname": nickname
+    }
+
+async def sync_member_store(guild):
+    """Push a full snapshot of the guild's members into the member store"""
+    snapshot = {member.id: member_record(member) for member in guild.members}
+    await asyncio.to_thread(member_store.replace_all, snapshot)
+    logger.info(f"Member store synced with {len(snapshot)} members")
+
+async def heartbeat_loop():
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        if bot.is_ready():
+            try:
+                await asyncio.to_thread(member_store.heartbeat)
+            except Exception as e:
+                logger.error(f"Member store heartbeat failed: {e}")
+
 @bot.event
 async def on_ready():
     logger.info(f"Bot is ready. Guilds: {[g.id for g in bot.guilds]}")
@@ -61,9 +94,44 @@ async def on_ready():
     for guild in bot.guilds:
         if guild.id == GUILD_ID:
             logger.info(f"Connected to target guild: {guild.name} ({guild.id}) with {len(guild.members)} members")
+            await sync_member_store(guild)
         else:
             logger.info(f"Connected to guild: {guild.name} ({guild.id})")
 
+    # on_ready fires again after reconnects; only start one heartbeat loop
+    global heartbeat_task
+    if heartbeat_task is None:
+        heartbeat_task = asyncio.create_task(heartbeat_loop())
+
+@bot.event
+async def on_member_update(before, after):
+    if after.guild.id != GUILD_ID:
+        return
+    record = member_record(after)
+    await asyncio.to_thread(member_store.upsert_member, after.id, record["nickname"], record["roles"])
+    logger.debug(f"Member updated: {after.name} ({after.id})")
+
+@bot.event
+async def on_member_join(member):
+    if member.guild.id != GUILD_ID:
+        return
+    record = member_record(member)
+    await asyncio.to_thread(member_store.upsert_member, member.id, record["nickname"], record["roles"])
+    logger.debug(f"Member joined: {member.name} ({member.id})")
+
+@bot.event
+async def on_member_remove(member):
+    if member.guild.id != GUILD_ID:
+        return
+    await asyncio.to_thread(member_store.remove_member, member.id)
+    logger.debug(f"Member removed: {member.name} ({member.id})")
+
+@bot.event
+async def on_guild_role_update(before, after):
+    # A renamed role changes every holder's record; resync the whole guild
+    if after.guild.id == GUILD_ID and before.name != after.name:
+        await sync_member_store(after.guild)
+
 @api.get("/roles/{user_id}")
 async def get_roles(user_id: int):
     try:
@@ -77,14 +145,10 @@ async def get_roles(user_id: int):
             logger.warning(f"Member not found with ID: {user_id}")
             raise HTTPException(status_code=404, detail="Member not found")
             
-        # Get member's nickname, falling back to username if no nickname exists
-        nickname = member.nick if member.nick else member.name
-        logger.info(f"Found member: {member.name}, nickname: {nickname}")
+        record = member_record(member)
+        logger.info(f"Found member: {member.name}, nickname: {record['nickname']}")
         
-        return {
-            "roles": [{"id": str(role.id), "name": role.name} for role in member.roles],
-            "nickname": nickname
-        }
+        return record
     except Exception as e:
         logger.error(f"Error in get_roles: {type(e).__name__}: {e}")
         # Return a minimal response so the main app doesn't fail completely
@@ -93,6 +157,50 @@ async def get_roles(user_id: int):
             "nickname": f"User {user_id}"
         }
 
+@api.get("/members")
+async def get_members():
+    """Snapshot of every guild member's roles and nickname, for warm-starting the website"""
+    guild = bot.get_guild(GUILD_ID)
+    if not guild:
+        logger.error(f"Guild not found with ID: {GUILD_ID}")
+        raise HTTPException(status_code=503, detail="Guild not available")
+    return {"members": {str(member.id): member_record(member) for member in guild.members}}
+
+class MembersRequest(msgspec.Struct):
+    user_ids: list[str]
+
+members_request_decoder = msgspec.json.Decoder(MembersRequest)
+members_response_encoder = msgspec.json.Encoder()
+
+@api.post("/members")
+async def lookup_members(request: Request):
+    """Resolve many user IDs in one call from the bot's in-memory guild cache.
+
+    Body: {"user_ids": ["123", ...]}. IDs that aren't guild members are returned in "missing".
+    """
+    try:
+        body = members_request_decoder.decode(await request.body())
+    except msgspec.ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    guild = bot.get_guild(GUILD_ID)
+    if not guild:
+        logger.error(f"Guild not found with ID: {GUILD_ID}")
+        raise HTTPException(status_code=503, detail="Guild not available")
+
+    members = {}
+    missing = []
+    for user_id in dict.fromkeys(body.user_ids):
+        member = guild.get_member(int(user_id)) if user_id.isdigit() else None
+        if member is None:
+            missing.append(user_id)
+            continue
+        members[user_id] = member_record(member)
+    logger.debug(f"Batch lookup: {len(members)} found, {len(missing)} missing")
+    return Response(content=members_response_encoder.encode({"members": members, "missing": missing}),
+                    media_type="application/json")
+
 @api.get("/health")
 async def health_check():
     try:
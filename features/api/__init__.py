@@ -0,0 +1,7 @@
+from flask import Blueprint
+
+# Versioned JSON API; a breaking change gets a new prefix (/api/v2) next to this one
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Import routes to register them with the blueprint
+from . import routes
@@ -0,0 +1,294 @@
+"""
+JSON API over models.flight for scripts and the frontend.
+
+Every write answers with the mission version it produced. POST
+/api/v1/missions/<id>/batch applies a list of operations to one mission in a
+single transaction: either all of them are saved (one write, one version, one
+journal entry) or, if any fails, none are. /flights/import does the same for
+a whole CSV/JSON ATO sheet and /flights/export streams the flight table back
+(see models/flight_sheet.py).
+
+Write requests must send a JSON body (Content-Type: application/json), which a
+cross-site HTML form can't do.
+"""
+from flask import request, jsonify, current_app, Response
+from . import api_bp
+import logging
+from utils.auth import api_login_required
+from utils.identity import get_current_user
+from utils.members import get_member_profile
+from utils.storage import load_mission, mission_transaction, mission_tag, mission_changes, list_flights as stored_flights
+from utils.http_cache import make_validator, not_modified, with_validator
+from models.flight import (build_flight, add_pilot, remove_pilot, remove_flight,
+                           FlightDataError, REQUIRED_FLIGHT_FIELDS)
+from models.signup import apply_signup
+from models.flight_sheet import (parse_sheet, import_sheet, export_rows, stream_csv, stream_json,
+                                 SheetError)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_LIMIT = 100
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.index = None
+        self.errors = errors
+
+@api_bp.errorhandler(ApiError)
+def handle_api_error(e):
+    body = {"error": e.message}
+    if e.index is not None:
+        body["index"] = e.index
+    if e.errors is not None:
+        body["errors"] = e.errors
+    return jsonify(body), e.status
+
+class Caller:
+    """The logged-in user making an API call"""
+
+    def __init__(self):
+        user = get_current_user()
+        profile = get_member_profile(user.id, user.username)
+        role_ids = {role['id'] for role in profile["roles"]}
+        self.user_id = str(user.id)
+        self.display_name = profile["display_name"]
+        self.is_manager = bool(role_ids & {current_app.config.get("ADMIN_ROLE"),
+                                           current_app.config.get("MISSION_MAKER_ROLE")} - {None, ""})
+
+    def pilot(self, args):
+        """(user_id, name) to act as: mission makers may name another or a placeholder pilot"""
+        if args.get("user_id") is None or str(args["user_id"]) == self.user_id:
+            return self.user_id, self.display_name
+        if not self.is_manager:
+            raise ApiError("Only mission makers can act for other pilots", 403)
+        return str(args["user_id"]), args.get("username") or str(args["user_id"])
+
+def _json_body():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        raise ApiError("Expected a JSON object body", 415 if not request.is_json else 400)
+    return body
+
+# --- Operations: each changes the in-memory mission and returns its result, or raises ApiError ---
+
+def _op_create_flight(mission, args, caller):
+    flight_data = {field: args.get(field) for field in REQUIRED_FLIGHT_FIELDS}
+    flight_data["remarks"] = args.get("remarks", "")
+    if args.get("side"):
+        flight_data["side"] = args["side"]
+    user_id, name = caller.pilot(args)
+    try:
+        flight = build_flight(mission, flight_data, user_id, name)
+    except FlightDataError as e:
+        raise ApiError(str(e))
+    except ValueError as e:
+        raise ApiError(str(e), 409)
+    return {"flight": flight.to_dict()}
+
+def _op_join_flight(mission, args, caller):
+    position = str(args.get("position", ""))
+    if position not in ("2", "3", "4"):
+        raise ApiError("Invalid position selected")
+    user_id, name = caller.pilot(args)
+    flight, message = add_pilot(mission, args.get("flight_id"), user_id, name, position, args.get("aircraft_id"))
+    if not flight:
+        raise ApiError(message, 404 if message == "Flight not found" else 409)
+    return {"flight": flight.to_dict()}
+
+def _op_leave_flight(mission, args, caller):
+    user_id, _ = caller.pilot(args)
+    flight_id = args.get("flight_id")
+    flight, message = remove_pilot(mission, flight_id, user_id)
+    if flight:
+        return {"flight": flight.to_dict()}
+    if flight_id in mission.get("flights", {}) or message == "Flight not found":
+        raise ApiError(message, 404 if message == "Flight not found" else 409)
+    # The last pilot left and the flight was deleted
+    return {"removed": flight_id}
+
+def _op_delete_flight(mission, args, caller):
+    if not caller.is_manager:
+        raise ApiError("Only mission makers can delete flights", 403)
+    if not remove_flight(mission, args.get("flight_id")):
+        raise ApiError("Flight not found", 404)
+    return {"removed": args["flight_id"]}
+
+def _op_signup(mission, args, caller):
+    if not args.get("coalition") or not args.get("aircraft"):
+        raise ApiError("Please select both a coalition and an aircraft.")
+    user_id, name = caller.pilot(args)
+    signup, message = apply_signup(mission, user_id, name, args["coalition"], args["aircraft"])
+    return {"signup": dict(signup)}
+
+OPERATIONS = {
+    "create_flight": _op_create_flight,
+    "join_flight": _op_join_flight,
+    "leave_flight": _op_leave_flight,
+    "delete_flight": _op_delete_flight,
+    "signup": _op_signup,
+}
+
+def apply_operations(mission_id, operations, caller, indexed=False):
+    """Run [(op name, args)] against one mission in a single transaction. Returns (version, results).
+
+    With indexed=True an error reports which operation failed.
+    """
+    results = []
+    with mission_transaction(mission_id) as mission:
+        if not mission:
+            raise ApiError("Mission not found", 404)
+        for index, (name, args) in enumerate(operations):
+            handler = OPERATIONS.get(name)
+            try:
+                if handler is None:
+                    raise ApiError(f"Unknown operation '{name}'")
+                results.append(handler(mission, args, caller))
+            except ApiError as e:
+                # Raising out of the transaction discards every operation of the request
+                if indexed:
+                    e.index = index
+                raise
+    return mission.get("version", 0), results
+
+def _single(mission_id, name, args, status=200):
+    version, results = apply_operations(mission_id, [(name, args)], Caller())
+    return jsonify(dict(results[0], version=version)), status
+
+# --- Routes ---
+
+@api_bp.route("/missions/<mission_id>/flights", methods=["GET"])
+@api_login_required
+def list_flights(mission_id):
+    validator = make_validator("api_flights", mission_tag(mission_id))
+    response = not_modified(validator)
+    if response:
+        return response
+    mission = load_mission(mission_id)
+    if not mission:
+        raise ApiError("Mission not found", 404)
+    return with_validator(jsonify({
+        "mission_id": mission["id"],
+        "version": mission.get("version", 0),
+        "flights": list(mission.get("flights", {}).values())
+    }), validator)
+
+@api_bp.route("/missions/<mission_id>/flights", methods=["POST"])
+@api_login_required
+def create_flight(mission_id):
+    return _single(mission_id, "create_flight", _json_body(), status=201)
+
+@api_bp.route("/missions/<mission_id>/flights/<flight_id>/join", methods=["POST"])
+@api_login_required
+def join_flight(mission_id, flight_id):
+    return _single(mission_id, "join_flight", dict(_json_body(), flight_id=flight_id))
+
+@api_bp.route("/missions/<mission_id>/flights/<flight_id>/leave", methods=["POST"])
+@api_login_required
+def leave_flight(mission_id, flight_id):
+    # Send {} to leave yourself; mission makers can pass user_id to remove someone else
+    return _single(mission_id, "leave_flight", dict(_json_body(), flight_id=flight_id))
+
+@api_bp.route("/missions/<mission_id>/flights/<flight_id>", methods=["DELETE"])
+@api_login_required
+def delete_flight(mission_id, flight_id):
+    return _single(mission_id, "delete_flight", {"flight_id": flight_id})
+
+@api_bp.route("/missions/<mission_id>/signup", methods=["POST"])
+@api_login_required
+def signup(mission_id):
+    return _single(mission_id, "signup", _json_body())
+
+@api_bp.route("/missions/<mission_id>/changes", methods=["GET"])
+@api_login_required
+def changes(mission_id):
+    """Journal entries after ?since=<version>; 410 if the journal doesn't go back that far"""
+    since = request.args.get("since", type=int)
+    if since is None:
+        raise ApiError("since (a mission version) is required")
+    entries = mission_changes(mission_id, since)
+    if entries is None:
+        if mission_tag(mission_id) is None:
+            raise ApiError("Mission not found", 404)
+        raise ApiError(f"No journal entries back to version {since}, reload the mission", 410)
+    return jsonify({"since": since, "version": entries[-1]["seq"] if entries else since, "entries": entries})
+
+@api_bp.route("/missions/<mission_id>/batch", methods=["POST"])
+@api_login_required
+def batch(mission_id):
+    """Apply {"operations": [{"op": "create_flight", ...}, ...]} in one transaction.
+
+    Answers {"version": <mission version>, "results": [...]} in operation order,
+    or the first error with its "index"; then nothing was saved.
+    """
+    operations = _json_body().get("operations")
+    if not isinstance(operations, list) or not operations:
+        raise ApiError("operations must be a non-empty list")
+    limit = current_app.config.get("API_BATCH_LIMIT", DEFAULT_BATCH_LIMIT)
+    if len(operations) > limit:
+        raise ApiError(f"At most {limit} operations per batch", 413)
+    if not all(isinstance(op, dict) for op in operations):
+        raise ApiError("Each operation must be an object with an 'op' field")
+    version, results = apply_operations(
+        mission_id, [(op.get("op"), op) for op in operations], Caller(), indexed=True)
+    logger.info(f"Applied batch of {len(operations)} operations to mission {mission_id}, now version {version}")
+    return jsonify({"version": version, "results": results})
+
+@api_bp.route("/missions/<mission_id>/flights/import", methods=["POST"])
+@api_login_required
+def import_flights(mission_id):
+    """Create every flight of an ATO sheet (models/flight_sheet.py) in one transaction.
+
+    Send the sheet as the body: Content-Type text/csv, or application/json.
+    Answers 201 {"version", "flights": [...]} in sheet order, or 400 with
+    "errors": [{"row", "message"}, ...] for every bad row; then nothing was saved.
+    """
+    caller = Caller()
+    if not caller.is_manager:
+        raise ApiError("Only mission makers can import flights", 403)
+    if request.mimetype == "text/csv":
+        fmt = "csv"
+    elif request.is_json:
+        fmt = "json"
+    else:
+        raise ApiError("Send the sheet as text/csv or application/json", 415)
+    try:
+        rows = parse_sheet(request.get_data(as_text=True), fmt)
+        limit = current_app.config.get("API_BATCH_LIMIT", DEFAULT_BATCH_LIMIT)
+        if len(rows) > limit:
+            raise ApiError(f"At most {limit} flights per import", 413)
+        with mission_transaction(mission_id) as mission:
+            if not mission:
+                raise ApiError("Mission not found", 404)
+            flights = import_sheet(mission, rows)
+    except SheetError as e:
+        raise ApiError("The sheet can't be imported", errors=e.errors)
+    version = mission.get("version", 0)
+    logger.info(f"User {caller.user_id} imported {len(flights)} flights into mission {mission_id}, now version {version}")
+    return jsonify({"version": version, "flights": [flight.to_dict() for flight in flights]}), 201
+
+@api_bp.route("/missions/<mission_id>/flights/export", methods=["GET"])
+@api_login_required
+def export_flights(mission_id):
+    """The mission's flight table (ATO / comm card), one row per pilot, as ?format=csv (default) or json.
+
+    Rows are written out as they are produced instead of building the whole file first.
+    """
+    fmt = request.args.get("format", "csv")
+    if fmt not in ("csv", "json"):
+        raise ApiError("format must be csv or json")
+    validator = make_validator("api_export", mission_tag(mission_id), extra=(fmt,))
+    if validator is None:
+        raise ApiError("Mission not found", 404)
+    response = not_modified(validator)
+    if response:
+        return response
+    rows = export_rows(stored_flights(mission_id))
+    if fmt == "csv":
+        response = Response(stream_csv(rows), mimetype="text/csv")
+    else:
+        response = Response(stream_json(rows), mimetype="application/json")
+    response.headers["Content-Disposition"] = f'attachment; filename="{mission_id}-flights.{fmt}"'
+    return with_validator(response, validator)
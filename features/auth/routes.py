@@ -1,6 +1,8 @@
 from flask import redirect, url_for, current_app, session
 from . import auth_bp
 import logging
+from utils.members import invalidate_member
+from utils.identity import remember_user
 
 logger = logging.getLogger(__name__)
 
@@ -40,13 +42,11 @@ def callback():
         try:
             user = discord.fetch_user()
             logger.debug(f"Fetched user: {user.username} ({user.id})")
+            # Fresh login: make sure roles/nickname are re-read from the bot
+            invalidate_member(user.id)
             
             # Store essential data in session
-            session['user_id'] = user.id
-            session['username'] = user.username
-            session['avatar'] = user.avatar_url
-            session['is_authenticated'] = True
-            session.modified = True  # Mark session as modified to ensure it's saved
+            remember_user(user)
             
             logger.debug(f"Session after user data storage: {session}")
         except Exception as fetch_error:
@@ -69,6 +69,8 @@ def callback():
 def logout():
     """Handle logout requests"""
     logger.debug("User logged out")
+    if session.get('user_id'):
+        invalidate_member(session['user_id'])
     discord = current_app.discord
     discord.revoke()
     session.clear()
@@ -1,22 +1,28 @@
 from flask import render_template, redirect, url_for, request, flash
 from . import campaigns_bp
-from utils.storage import save_campaign, list_campaigns
+from utils.storage import save_campaign, list_campaigns, collection_tag
 from datetime import datetime
 import logging
 from utils.auth import login_required
+from utils.http_cache import make_validator, not_modified, with_validator
 
 logger = logging.getLogger(__name__)
 
 @campaigns_bp.route("/", methods=["GET"])
 @login_required
 def list_campaigns_route():
+    current_year = datetime.now().year
+    validator = make_validator("list_campaigns", collection_tag("campaigns"), extra=(current_year,), viewer=True)
+    response = not_modified(validator)
+    if response:
+        return response
     campaigns = list_campaigns()
     logger.debug(f"accessed campaigns root")
-    return render_template(
+    return with_validator(render_template(
         "list_campaigns.html",
         campaigns=campaigns,
-        current_year=datetime.now().year
-    )
+        current_year=current_year
+    ), validator)
 
 @campaigns_bp.route("/create", methods=["GET", "POST"])
 @login_required
@@ -2,8 +2,10 @@ from flask import render_template, redirect, url_for, request, current_app, flas
 from . import missions_bp
 import logging
 from datetime import datetime
-from utils.storage import generate_mission_id, save_mission, list_missions as storage_list_missions, list_campaigns, load_mission
+from utils.storage import (generate_mission_id, save_mission, list_missions as storage_list_missions,
+                           list_campaigns, load_mission, mission_tag, collection_tag)
 from utils.auth import login_required
+from utils.http_cache import make_validator, not_modified, with_validator
 
 logger = logging.getLogger(__name__)
 
@@ -12,12 +14,18 @@ logger = logging.getLogger(__name__)
 def list_missions():
     """Show list of available missions"""
     logger.debug(f"accessed missions root")
+    # Answer 304 from the collection tag alone if no mission changed since the last visit
+    current_year = datetime.now().year
+    validator = make_validator("list_missions", collection_tag("missions"), extra=(current_year,), viewer=True)
+    response = not_modified(validator)
+    if response:
+        return response
     missions = storage_list_missions()
-    return render_template(
+    return with_validator(render_template(
         "list_missions.html",
         missions=missions,
-        current_year=datetime.now().year
-    )
+        current_year=current_year
+    ), validator)
 
 @missions_bp.route("/create", methods=["GET", "POST"])
 @login_required
@@ -80,20 +88,25 @@ def create_mission():
 @login_required
 def view_mission(mission_id):
     """View a specific mission"""
+    current_year = datetime.now().year
+    validator = make_validator("view_mission", mission_tag(mission_id), extra=(current_year,), viewer=True)
+    response = not_modified(validator)
+    if response:
+        return response
     mission = load_mission(mission_id)
     if not mission:
         flash("Mission not found.", "danger")
         return redirect(url_for("missions.list_missions"))
-    return render_template(
+    return with_validator(render_template(
         "view.html",
         mission=mission,
-        current_year=datetime.now().year
-    )
+        current_year=current_year
+    ), validator)
 
 @missions_bp.route("/edit/<mission_id>", methods=["GET", "POST"])
 @login_required
 def edit_mission(mission_id):
-    from utils.storage import load_mission, save_mission, list_campaigns
+    from utils.storage import load_mission, mission_transaction, list_campaigns
     mission = load_mission(mission_id)
     if not mission:
         flash("Mission not found.", "danger")
@@ -112,15 +125,19 @@ def edit_mission(mission_id):
         time_ingame = f"{start_date_ingame}T{start_time_ingame}" if start_date_ingame and start_time_ingame else None
         # Easy mode
         flight_plan_easy_mode = bool(request.form.get("flight_plan_easy_mode"))
-        # Update mission fields
-        mission["campaign_id"] = campaign_id
-        mission["short_description"] = short_description
-        mission["description"] = description
-        mission["name"] = name
-        mission["time_real"] = time_real
-        mission["time_ingame"] = time_ingame
-        mission["flight_plan_easy_mode"] = flight_plan_easy_mode
-        save_mission(mission)
+        # Update mission fields on the current copy, so flights/signups added
+        # since the form was loaded are kept
+        with mission_transaction(mission_id) as mission:
+            if not mission:
+                flash("Mission not found.", "danger")
+                return redirect(url_for("missions.list_missions"))
+            mission["campaign_id"] = campaign_id
+            mission["short_description"] = short_description
+            mission["description"] = description
+            mission["name"] = name
+            mission["time_real"] = time_real
+            mission["time_ingame"] = time_ingame
+            mission["flight_plan_easy_mode"] = flight_plan_easy_mode
         flash(f"Mission '{mission['name']}' updated successfully!", "success")
         return redirect(url_for("missions.list_missions"))
     # For GET, parse date/time fields for form population
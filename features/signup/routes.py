@@ -1,56 +1,67 @@
-from flask import render_template, redirect, url_for, request, current_app, flash, session, jsonify
+from flask import (render_template, redirect, url_for, request, current_app, flash, session, jsonify,
+                   Response, stream_with_context)
 from . import signup_bp
 import logging
-import requests
-import re
 from datetime import datetime
-from utils.storage import load_mission, load_campaign
+from utils.storage import load_mission, load_campaign, mission_tag, collection_tag
 from features.missions.routes import storage_list_missions
 from utils.auth import login_required
+from utils.members import get_member_profile, get_member_profiles, profile_generation
+from utils.identity import get_current_user
 from models.flight import (create_flight, get_flight, get_mission_flights_data,
                           join_flight, leave_flight, delete_flight)
+from models.mission_view import MissionView
+from models.signup import apply_signup
+from utils.fragment_cache import mission_fragment
+from utils.http_cache import make_validator, not_modified, with_validator
+from utils.mission_events import mission_events, flight_changes, live_roster_enabled
 from utils.resources import (get_squadrons, get_bases, get_operations_areas, 
-                           get_aircraft_at_base)
+                           get_aircraft_at_base, get_mission_types, get_resources_stamp)
 import os
 import json
 
 logger = logging.getLogger(__name__)
 
+def _wants_json():
+    """True for fetch() callers asking for JSON instead of a redirect back to the page"""
+    return request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
+
+def _action_result(mission_id, message, category, ok=True, flight_ids=(), status=400, extra=None):
+    """Finish a signup action: flash and redirect to the mission page, or for JSON
+    callers return the message and the changed flights (same shape as the event stream's deltas)
+    """
+    if not _wants_json():
+        flash(message, category)
+        if status == 404:
+            return redirect(url_for("signup.dashboard"))
+        return redirect(url_for("signup.signup_mission", mission_id=mission_id))
+    if not ok:
+        return jsonify({"ok": False, "message": message, "category": category}), status
+    body = {"ok": True, "message": message, "category": category}
+    body.update(flight_changes(mission_id, flight_ids))
+    body.update(extra or {})
+    return jsonify(body)
+
+def _render_roster(mission, flights):
+    """Render _flight_roster.html, with every pilot's current display name looked up in one batch"""
+    fallback_names = {pilot.user_id: pilot.nickname or pilot.username
+                      for flight in flights for pilot in flight.pilots}
+    pilot_names = {user_id: profile["display_name"]
+                   for user_id, profile in get_member_profiles(fallback_names).items()}
+    return render_template("_flight_roster.html", mission=mission, flights=flights, pilot_names=pilot_names)
+
 @signup_bp.route("/")
 @login_required
 def dashboard():
     """Main dashboard showing available missions and flights"""
-    # Get discord client from current_app
-    discord = current_app.discord
-    
-    # Get Discord user
-    user = discord.fetch_user()
+    # Get Discord user (from the session)
+    user = get_current_user()
     user_id = user.id
     
-    # Fetch roles from your bot API
-    try:
-        logger.debug(f"Fetching roles and nickname for user ID {user_id}")
-        resp = requests.get(f"http://localhost:8000/roles/{user_id}", timeout=2)
-        resp.raise_for_status()
-        response_data = resp.json()
-        user_roles = response_data.get("roles", [])
-        
-        # Try to get nickname from bot API if available
-        nickname = response_data.get("nickname", user.username)
-        # Remove text within square brackets or parentheses and strip
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        # Make the whole name uppercase
-        display_name = clean_name.upper()
-        logger.debug(f"Final display name: '{display_name}'")
-    except Exception as e:
-        logger.error(f"Could not fetch roles from bot: {e}")
-        user_roles = []
-        nickname = user.username
-        # Remove text within square brackets or parentheses and strip
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        # Make the whole name uppercase
-        display_name = clean_name.upper()
-        logger.debug(f"Using Discord username as fallback: '{display_name}'")
+    # Roles and nickname from the bot (cached)
+    profile = get_member_profile(user_id, user.username)
+    user_roles = profile["roles"]
+    display_name = profile["display_name"]
         
     # Get config from current app
     app = current_app
@@ -92,29 +103,23 @@ def dashboard():
 def signup_mission(mission_id):
     """Mission-specific signup page"""
     # Get Discord user info
-    discord = current_app.discord
-    user = discord.fetch_user()
+    user = get_current_user()
     user_id = str(user.id)
     
-    # Get roles and nickname
-    try:
-        resp = requests.get(f"http://localhost:8000/roles/{user_id}", timeout=2)
-        resp.raise_for_status()
-        response_data = resp.json()
-        user_roles = response_data.get("roles", [])
-        nickname = response_data.get("nickname", user.username)
-        # Remove text within square brackets or parentheses and strip
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        # Make the whole name uppercase
-        display_name = clean_name.upper()
-    except Exception as e:
-        logger.error(f"Could not fetch roles from bot: {e}")
-        user_roles = []
-        nickname = user.username
-        # Remove text within square brackets or parentheses and strip
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        # Make the whole name uppercase
-        display_name = clean_name.upper()
+    # Get roles and nickname (cached)
+    profile = get_member_profile(user_id, user.username)
+    user_roles = profile["roles"]
+    display_name = profile["display_name"]
+    
+    # Answer 304 if neither the mission, the campaigns, the reference data nor the viewer changed
+    current_year = datetime.now().year
+    profiles = profile_generation()
+    validator = make_validator(
+        "signup_mission", mission_tag(mission_id), collection_tag("campaigns"), get_resources_stamp(),
+        extra=(user_id, display_name, current_year, live_roster_enabled(), profiles), viewer=True)
+    response = not_modified(validator)
+    if response:
+        return response
     
     # Get mission details
     mission = load_mission(mission_id)
@@ -131,54 +136,38 @@ def signup_mission(mission_id):
         if campaign:
             persistent_ac_location = campaign.get("persistent_ac_location", False)
     
-    # Get all flights for this mission
-    flights = get_mission_flights_data(mission_id)
+    # Flights of this mission, decoded only as the template touches them
+    flights = MissionView(mission)
     
     # Get resources for flight creation
     squadrons = get_squadrons()
     bases = get_bases()
     operations_areas = get_operations_areas()
 
-    # Load mission types from config/mission_types.json (fix path)
-    mission_types_path = os.path.join(current_app.root_path, "config", "mission_types.json")
-    logger.info(f"[MISSION_TYPES] Using mission_types_path: {mission_types_path}")
-    if not os.path.isfile(mission_types_path):
-        logger.error(f"[MISSION_TYPES] File does not exist: {mission_types_path}")
-        flash(f"mission_types.json not found at {mission_types_path}", "danger")
-        mission_types = {}
-    else:
-        try:
-            with open(mission_types_path) as f:
-                mission_types = json.load(f)  # Pass the full dict, not just keys
-            if not mission_types:
-                logger.warning(f"[MISSION_TYPES] mission_types.json is empty!")
-                flash("No mission types loaded! Check mission_types.json and file permissions.", "danger")
-        except Exception as e:
-            logger.error(f"Could not load mission_types.json: {e}")
-            flash("Error loading mission_types.json. See logs for details.", "danger")
-            mission_types = {}
+    # Mission types from config/mission_types.json (cached reference data)
+    mission_types = get_mission_types()  # Pass the full dict, not just keys
+    if not mission_types:
+        logger.warning(f"[MISSION_TYPES] mission_types.json is empty or missing!")
+        flash("No mission types loaded! Check mission_types.json and file permissions.", "danger")
 
     # Check user's current flight (if any)
-    user_flight = None
-    user_position = None
-    for flight in flights:
-        for pilot in flight.pilots:
-            if pilot["user_id"] == user_id:
-                user_flight = flight
-                user_position = pilot["position"]
-                break
-        if user_flight:
-            break
+    user_flight, user_position = flights.user_flight(user_id)
 
     # Load aircraft data for JS dropdowns
     from utils.resources import get_resources
     aircraft_data = get_resources().get("aircraft", {})
 
+    # The flight roster is the same for every viewer, so it's rendered once per
+    # mission version and member profile generation (pilot names)
+    roster_html = mission_fragment("flight_roster", mission, lambda: _render_roster(mission, flights),
+                                   variant=(profiles,))
+
     # Render the signup page
-    return render_template(
+    return with_validator(render_template(
         "signup_mission.html",
         mission=mission,
         flights=flights,
+        roster_html=roster_html,
         user=user,
         user_id=user_id,
         display_name=display_name,
@@ -189,110 +178,49 @@ def signup_mission(mission_id):
         operations_areas=operations_areas,
         mission_types=mission_types,
         aircraft_data=aircraft_data,
-        current_year=datetime.now().year,
+        current_year=current_year,
         is_authenticated=True,
-        persistent_ac_location=persistent_ac_location
-    )
+        persistent_ac_location=persistent_ac_location,
+        live_roster=live_roster_enabled()
+    ), validator)
 
 @signup_bp.route("/process_signup/<mission_id>", methods=["POST"])
 @login_required
 def process_signup(mission_id):
     """Process mission signup form submission"""
-    from utils.storage import load_mission, save_mission
+    from utils.storage import mission_transaction
     
     # Get form data
     coalition = request.form.get('coalition')
     aircraft = request.form.get('aircraft')
     
     if not coalition or not aircraft:
-        flash("Please select both a coalition and an aircraft.", "warning")
-        return redirect(url_for("signup.signup_mission", mission_id=mission_id))
+        return _action_result(mission_id, "Please select both a coalition and an aircraft.", "warning", ok=False)
     
     # Get Discord user info
-    discord = current_app.discord
-    user = discord.fetch_user()
+    user = get_current_user()
     user_id = user.id
     
-    # Get nickname
-    try:
-        resp = requests.get(f"http://localhost:8000/roles/{user_id}", timeout=2)
-        resp.raise_for_status()
-        response_data = resp.json()
-        nickname = response_data.get("nickname", user.username)
-        # Remove text within square brackets or parentheses and strip
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        # Make the whole name uppercase
-        display_name = clean_name.upper()
-    except Exception as e:
-        logger.error(f"Could not fetch nickname from bot: {e}")
-        nickname = user.username
-        # Remove text within square brackets or parentheses and strip
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        # Make the whole name uppercase
-        display_name = clean_name.upper()
-    
-    # Load mission data
-    mission = load_mission(mission_id)
-    if not mission:
-        flash("Mission not found.", "danger")
-        return redirect(url_for("signup.dashboard"))
+    # Get nickname (cached)
+    display_name = get_member_profile(user_id, user.username)["display_name"]
     
-    # Initialize signups list if it doesn't exist
-    if "signups" not in mission:
-        mission["signups"] = []
+    # Update or add the signup in one transaction so concurrent signups don't overwrite each other
+    with mission_transaction(mission_id) as mission:
+        if not mission:
+            return _action_result(mission_id, "Mission not found.", "danger", ok=False, status=404)
+        signup, message = apply_signup(mission, user_id, display_name, coalition, aircraft)
     
-    # Check if user already signed up
-    for signup in mission["signups"]:
-        if signup.get("user_id") == str(user_id):
-            # Update existing signup
-            signup["coalition"] = coalition
-            signup["aircraft"] = aircraft
-            signup["status"] = "Pending"  # Reset status for changed signup
-            flash("Your signup has been updated.", "success")
-            save_mission(mission)
-            return redirect(url_for("signup.signup_mission", mission_id=mission_id))
-    
-    # Create new signup entry
-    new_signup = {
-        "user_id": str(user_id),
-        "pilot": display_name,
-        "coalition": coalition,
-        "aircraft": aircraft,
-        "status": "Pending",
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    mission["signups"].append(new_signup)
-    save_mission(mission)
-    
-    flash("You have successfully signed up for this mission.", "success")
-    return redirect(url_for("signup.signup_mission", mission_id=mission_id))
+    return _action_result(mission_id, message, "success", extra={"signup": dict(signup)})
 
 @signup_bp.route("/mission/<mission_id>/create_flight", methods=["POST"])
 @login_required
 def create_new_flight(mission_id):
     """Create a new flight for a mission"""
     # Get Discord user info
-    discord = current_app.discord
-    user = discord.fetch_user()
+    user = get_current_user()
     user_id = str(user.id)
     # Use display_name for all flight creation/joining
-    try:
-        resp = requests.get(f"http://localhost:8000/roles/{user_id}", timeout=2)
-        resp.raise_for_status()
-        response_data = resp.json()
-        nickname = response_data.get("nickname", user.username)
-        # Remove text within square brackets or parentheses and strip
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        # Make the whole name uppercase
-        display_name = clean_name.upper()
-    except Exception as e:
-        logger.error(f"Could not fetch nickname from bot: {e}")
-        nickname = user.username
-        # Remove text within square brackets or parentheses and strip
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        # Make the whole name uppercase
-        display_name = clean_name.upper()
+    display_name = get_member_profile(user_id, user.username)["display_name"]
     username = display_name
     
     # Get form data
@@ -305,37 +233,6 @@ def create_new_flight(mission_id):
     aircraft_id = request.form.get("aircraft_id")
     logger.debug(f"[CREATE_NEW_FLIGHT] Received form data: squadron={squadron}, departure_base={departure_base}, recovery_base={recovery_base}, operations_area={operations_area}, mission_type={mission_type}, remarks={remarks}, aircraft_id={aircraft_id}")
     
-    # Enforce Persistent A/C Location rule
-    mission = load_mission(mission_id)
-    campaign_id = mission.get("campaign_id") if mission else None
-    persistent_ac_location = False
-    if campaign_id:
-        campaign = load_campaign(campaign_id)
-        if campaign:
-            persistent_ac_location = campaign.get("persistent_ac_location", False)
-    if persistent_ac_location:
-        # Only allow aircraft at their current location
-        from utils.resources import get_resources
-        resources = get_resources()
-        aircraft_data = resources.get("aircraft", {})
-        aircraft_meta = aircraft_data.get(aircraft_id, {})
-        aircraft_location = aircraft_meta.get("location")
-        if not aircraft_location or aircraft_location != departure_base:
-            flash("Persistent A/C Location is enabled: You can only select aircraft at their current base.", "danger")
-            logger.warning(f"[CREATE_NEW_FLIGHT] Attempted to create flight with aircraft {aircraft_id} at {departure_base}, but its location is {aircraft_location}.")
-            return redirect(url_for("signup.signup_mission", mission_id=mission_id))
-    else:
-        # If not persistent, allow any aircraft from the squadron at any base
-        # No restriction: skip location check
-        pass
-
-    # Validate required fields (remarks is optional)
-    if not all([squadron, departure_base, recovery_base, operations_area, mission_type, aircraft_id]):
-        flash("All fields except remarks are required", "danger")
-        logger.error(f"[CREATE_NEW_FLIGHT] Missing required fields.")
-        return redirect(url_for("signup.signup_mission", mission_id=mission_id))
-    
-    # Create the flight
     flight_data = {
         "squadron": squadron,
         "departure_base": departure_base,
@@ -345,46 +242,39 @@ def create_new_flight(mission_id):
         "remarks": remarks,
         "aircraft_id": aircraft_id
     }
+    
     try:
+        # create_flight checks flight_data against the mission it already loads
         flight = create_flight(mission_id, flight_data, user_id, username)
-        flash(f"Flight {flight.callsign} {flight.flight_number} created successfully", "success")
+    except LookupError:
+        return _action_result(mission_id, "Mission not found.", "danger", ok=False, status=404)
+    except ValueError as e:
+        # Missing fields, the Persistent A/C Location rule, or callsigns/channels ran out
+        return _action_result(mission_id, str(e), "danger", ok=False)
     except Exception as e:
         import traceback
         logger.error(f"[CREATE_NEW_FLIGHT] Failed to create flight: {e}\n{traceback.format_exc()}")
-        flash(f"Failed to create flight: {e}", "danger")
+        return _action_result(mission_id, f"Failed to create flight: {e}", "danger", ok=False)
     
-    return redirect(url_for("signup.signup_mission", mission_id=mission_id))
+    return _action_result(mission_id, f"Flight {flight.callsign} {flight.flight_number} created successfully",
+                          "success", flight_ids=[flight.flight_id])
 
 @signup_bp.route("/mission/<mission_id>/join_flight/<flight_id>", methods=["POST"])
 @login_required
 def join_existing_flight(mission_id, flight_id):
     logger.debug(f"[JOIN_FLIGHT] Received mission_id={mission_id}, flight_id={flight_id}")
-    discord = current_app.discord
-    user = discord.fetch_user()
+    user = get_current_user()
     user_id = str(user.id)
-    try:
-        resp = requests.get(f"http://localhost:8000/roles/{user_id}", timeout=2)
-        resp.raise_for_status()
-        response_data = resp.json()
-        nickname = response_data.get("nickname", user.username)
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        display_name = clean_name.upper()
-    except Exception as e:
-        logger.error(f"Could not fetch nickname from bot: {e}")
-        nickname = user.username
-        clean_name = re.sub(r'\[.*?\]|\(.*?\)', '', nickname).strip()
-        display_name = clean_name.upper()
+    display_name = get_member_profile(user_id, user.username)["display_name"]
     username = display_name
 
     position = request.form.get("position") or request.values.get("position")
     aircraft = request.form.get("aircraft_id") or request.form.get("aircraft") or request.values.get("aircraft_id") or request.values.get("aircraft")
     logger.debug(f"[JOIN_FLIGHT] Received position={position}, aircraft={aircraft}")
     if not position or position not in ["2", "3", "4"]:
-        flash("Invalid position selected", "danger")
-        return redirect(url_for("signup.signup_mission", mission_id=mission_id))
+        return _action_result(mission_id, "Invalid position selected", "danger", ok=False)
     if not aircraft:
-        flash("Aircraft must be selected", "danger")
-        return redirect(url_for("signup.signup_mission", mission_id=mission_id))
+        return _action_result(mission_id, "Aircraft must be selected", "danger", ok=False)
 
     # Extra debug: log available flight IDs in mission
     from utils.storage import load_mission
@@ -395,26 +285,56 @@ def join_existing_flight(mission_id, flight_id):
         logger.debug(f"[JOIN_FLIGHT] No flights found in mission {mission_id}")
 
     flight, message = join_flight(flight_id, user_id, username, position, mission_id, aircraft)
-    if flight:
-        flash(f"Successfully joined flight {flight.callsign} {flight.flight_number} as #{position}", "success")
-    else:
-        flash(message, "danger")
-    return redirect(url_for("signup.signup_mission", mission_id=mission_id))
+    if not flight:
+        return _action_result(mission_id, message, "danger", ok=False, status=409)
+    return _action_result(mission_id, f"Successfully joined flight {flight.callsign} {flight.flight_number} as #{position}",
+                          "success", flight_ids=[flight_id])
 
 @signup_bp.route("/mission/<mission_id>/leave_flight/<flight_id>", methods=["POST"])
 @login_required
 def leave_existing_flight(mission_id, flight_id):
     """Leave a flight"""
     # Get Discord user info
-    discord = current_app.discord
-    user = discord.fetch_user()
+    user = get_current_user()
     user_id = str(user.id)
     
-    # Leave the flight
+    # Leave the flight (flight is None both on failure and when the last pilot left and it was deleted)
     flight, message = leave_flight(flight_id, user_id, mission_id)
-    flash(message, "info")
-    
-    return redirect(url_for("signup.signup_mission", mission_id=mission_id))
+    ok = flight is not None or message.startswith("Flight deleted")
+    return _action_result(mission_id, message, "info", ok=ok, flight_ids=[flight_id])
+
+@signup_bp.route("/mission/<mission_id>/events")
+@login_required
+def mission_event_stream(mission_id):
+    """Server-Sent Events with the mission's flight changes (see utils/mission_events.py)"""
+    if not live_roster_enabled():
+        return jsonify({"error": "Live roster updates are disabled"}), 404
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    response = Response(stream_with_context(mission_events(mission_id, since)), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@signup_bp.route("/mission/<mission_id>/roster")
+@login_required
+def mission_roster(mission_id):
+    """The flight roster fragment alone, for the signup page to swap in when the event stream reports a change"""
+    # Pilot names come from the member profiles, which change without a mission write
+    profiles = profile_generation()
+    validator = make_validator("mission_roster", mission_tag(mission_id), get_resources_stamp(), extra=(profiles,))
+    response = not_modified(validator)
+    if response:
+        return response
+    mission = load_mission(mission_id)
+    if not mission:
+        return jsonify({"error": "Mission not found"}), 404
+    flights = MissionView(mission)
+    roster_html = mission_fragment("flight_roster", mission, lambda: _render_roster(mission, flights),
+                                   variant=(profiles,))
+    response = with_validator(roster_html, validator)
+    response.headers["X-Mission-Version"] = str(mission.get("version", 0))
+    return response
 
 @signup_bp.route("/get_aircraft", methods=["GET"])
 @login_required
@@ -426,75 +346,71 @@ def get_base_aircraft():
     if not base_id:
         return jsonify({"error": "Base ID required"}), 400
     
-    # Get aircraft at the base
-    aircraft = get_aircraft_at_base(base_id)
+    validator = make_validator("get_aircraft", get_resources_stamp(), extra=(base_id, squadron))
+    response = not_modified(validator)
+    if response:
+        return response
     
-    # Filter by squadron if provided
-    if squadron:
-        aircraft = {
-            tail: data for tail, data in aircraft.items()
-            if data.get("squadron") == squadron
-        }
+    # Get aircraft at the base, for one squadron if provided
+    aircraft = get_aircraft_at_base(base_id, squadron)
     
-    return jsonify({"aircraft": aircraft})
+    return with_validator(jsonify({"aircraft": aircraft}), validator)
 
-@signup_bp.route("/squadron-bases", methods=["POST"])
+@signup_bp.route("/squadron-bases", methods=["GET", "POST"])
 @login_required
 def squadron_bases_endpoint():
     """Return a list of bases for a given squadron (AJAX)"""
-    squadron = request.form.get("squadron")
-    persistent = request.form.get("persistent", "1") == "1"
-    from utils.resources import get_bases, get_aircraft_at_base
-    bases = []
+    # GET (query string) can be revalidated by the browser; POST is kept for older pages
+    squadron = request.values.get("squadron")
+    persistent = request.values.get("persistent", "1") == "1"
+    validator = make_validator("squadron_bases", get_resources_stamp(), extra=(squadron, persistent))
+    response = not_modified(validator)
+    if response:
+        return response
+    from utils.resources import get_bases, get_squadron_bases
     all_bases = get_bases()
     if persistent:
-        # Only show bases where this squadron has aircraft
-        for base_id, base in all_bases.items():
-            aircraft = get_aircraft_at_base(base_id)
-            if any(ac.get("squadron") == squadron for ac in aircraft.values()):
-                bases.append(base_id)
+        # Only show bases where this squadron has aircraft (kept in bases.json order)
+        squadron_bases = set(get_squadron_bases(squadron))
+        bases = [base_id for base_id in all_bases if base_id in squadron_bases]
     else:
         # Show all bases
         bases = list(all_bases.keys())
-    return jsonify({"bases": bases})
+    return with_validator(jsonify({"bases": bases}), validator)
 
-@signup_bp.route("/squadron-aircraft", methods=["POST"])
+@signup_bp.route("/squadron-aircraft", methods=["GET", "POST"])
 @login_required
 def squadron_aircraft_endpoint():
     """Return a list of aircraft for a given squadron and base (AJAX)"""
-    squadron = request.form.get("squadron")
-    base = request.form.get("base")
-    persistent = request.form.get("persistent", "1") == "1"
-    mission_id = request.form.get("mission_id")
-    from utils.resources import get_resources
-    resources = get_resources()
-    all_aircraft = resources.get("aircraft", {})
-
-    # Get all flights for this mission to check which aircraft are in use
-    in_use_aircraft = set()
+    squadron = request.values.get("squadron")
+    base = request.values.get("base")
+    persistent = request.values.get("persistent", "1") == "1"
+    mission_id = request.values.get("mission_id")
+    # Aircraft in use depend on the mission, so its tag is part of the ETag when one is given
+    tags = [get_resources_stamp()]
     if mission_id:
-        from models.flight import get_mission_flights_data
-        flights = get_mission_flights_data(mission_id)
-        for flight in flights:
-            for pilot in flight.pilots:
-                if pilot.get("aircraft"):
-                    in_use_aircraft.add(str(pilot["aircraft"]))
+        tags.append(mission_tag(mission_id))
+    validator = make_validator("squadron_aircraft", *tags, extra=(squadron, mission_id))
+    response = not_modified(validator)
+    if response:
+        return response
+    from utils.resources import get_squadron_aircraft, get_available_aircraft
 
-    if persistent:
-        # Show all squadron aircraft NOT in use, regardless of base
-        aircraft = [tail for tail, meta in all_aircraft.items()
-                    if meta.get("squadron") == squadron and str(tail) not in in_use_aircraft]
-    else:
-        # Show all squadron aircraft (regardless of base), but not in use
-        aircraft = [tail for tail, meta in all_aircraft.items()
-                    if meta.get("squadron") == squadron and str(tail) not in in_use_aircraft]
+    # Show all squadron aircraft NOT in use in this mission, regardless of base (persistent or not)
+    squadron_aircraft = get_squadron_aircraft(squadron)
+    if mission_id:
+        try:
+            squadron_aircraft = get_available_aircraft(mission_id, squadron)
+        except ValueError:
+            logger.warning(f"Mission {mission_id} not found, listing all squadron aircraft")
+    aircraft = list(squadron_aircraft)
     # Optionally, include base info for frontend display
     aircraft_info = []
     for tail in aircraft:
-        meta = all_aircraft.get(str(tail), {})
+        meta = squadron_aircraft.get(str(tail), {})
         aircraft_info.append({
             "tail": str(tail),
             "type": meta.get("type", ""),
             "location": meta.get("location", "")
         })
-    return jsonify({"aircraft": aircraft_info})
\ No newline at end of file
+    return with_validator(jsonify({"aircraft": aircraft_info}), validator)
\ No newline at end of file
@@ -1,266 +1,285 @@
 """
 Flight model for the signup module
 """
-import json
-import os
 from datetime import datetime
-from utils.storage import load_json, save_json
+from typing import List, Optional, Union
+import msgspec
 import logging
 import uuid
 
 logger = logging.getLogger(__name__)
 
-class Flight:
-    def __init__(self, mission_id, flight_id=None, squadron=None, callsign=None, 
-                flight_number=None, departure_base=None, recovery_base=None, 
-                operations_area=None, mission_type=None, remarks=None, aircraft_ids=None, 
-                transponder_codes=None, tacan_channel=None, intraflight_freq=None,
-                pilots=None, status="active", side="blue"):
-        self.flight_id = flight_id or str(uuid.uuid4())
-        self.mission_id = mission_id
-        self.squadron = squadron
-        self.callsign = callsign
-        self.flight_number = flight_number
-        self.departure_base = departure_base
-        self.recovery_base = recovery_base
-        self.operations_area = operations_area
-        self.mission_type = mission_type
-        self.remarks = remarks
-        self.aircraft_ids = aircraft_ids or []
-        self.transponder_codes = transponder_codes or []
-        self.tacan_channel = tacan_channel
-        self.intraflight_freq = intraflight_freq
-        self.pilots = pilots or []
-        self.status = status
-        self.side = side
-        self.created_at = datetime.now().isoformat()
-    
+class Pilot(msgspec.Struct, kw_only=True):
+    """One pilot slot in a flight"""
+    user_id: Union[str, int]
+    username: Optional[str] = None
+    nickname: Optional[str] = None
+    position: Union[str, int] = "1"
+    joined_at: str = msgspec.field(default_factory=lambda: datetime.now().isoformat())
+    callsign: Optional[str] = None
+    transponder: Optional[str] = None
+    aircraft: Union[str, int, None] = None
+
+    def __post_init__(self):
+        # Older missions stored some of these as numbers; always work with strings
+        self.user_id = str(self.user_id)
+        self.position = str(self.position)
+        if self.aircraft is not None:
+            self.aircraft = str(self.aircraft)
+
+class Flight(msgspec.Struct, kw_only=True):
+    mission_id: str
+    flight_id: str = msgspec.field(default_factory=lambda: str(uuid.uuid4()))
+    squadron: Optional[str] = None
+    callsign: Optional[str] = None
+    flight_number: Optional[int] = None
+    departure_base: Optional[str] = None
+    recovery_base: Optional[str] = None
+    operations_area: Optional[str] = None
+    mission_type: Optional[str] = None
+    remarks: Optional[str] = None
+    aircraft_ids: List[str] = []
+    transponder_codes: List[str] = []
+    tacan_channel: Optional[str] = None
+    intraflight_freq: Optional[str] = None
+    pilots: List[Pilot] = []
+    status: str = "active"
+    side: str = "blue"
+    created_at: str = msgspec.field(default_factory=lambda: datetime.now().isoformat())
+
     def to_dict(self):
-        return {
-            "flight_id": self.flight_id,
-            "mission_id": self.mission_id,
-            "squadron": self.squadron,
-            "callsign": self.callsign,
-            "flight_number": self.flight_number,
-            "departure_base": self.departure_base,
-            "recovery_base": self.recovery_base,
-            "operations_area": self.operations_area,
-            "mission_type": self.mission_type,
-            "remarks": self.remarks,
-            "aircraft_ids": self.aircraft_ids,
-            "transponder_codes": self.transponder_codes,
-            "tacan_channel": self.tacan_channel,
-            "intraflight_freq": self.intraflight_freq,
-            "pilots": self.pilots,
-            "status": self.status,
-            "side": self.side,
-            "created_at": self.created_at
-        }
+        return msgspec.to_builtins(self)
 
     @classmethod
     def from_dict(cls, data):
-        flight = cls(
-            mission_id=data["mission_id"],
-            flight_id=data["flight_id"],
-            squadron=data["squadron"],
-            callsign=data["callsign"],
-            flight_number=data["flight_number"],
-            departure_base=data["departure_base"],
-            recovery_base=data["recovery_base"],
-            operations_area=data["operations_area"],
-            mission_type=data.get("mission_type"),
-            remarks=data.get("remarks"),
-            aircraft_ids=data["aircraft_ids"],
-            transponder_codes=data["transponder_codes"],
-            tacan_channel=data["tacan_channel"],
-            intraflight_freq=data["intraflight_freq"],
-            pilots=data["pilots"],
-            status=data["status"],
-            side=data.get("side", "blue")
-        )
-        flight.created_at = data["created_at"]
-        return flight
+        """Build a Flight from a stored dict. Raises msgspec.ValidationError on malformed data."""
+        return msgspec.convert(data, cls)
+
+    def get_pilot(self, user_id):
+        """The pilot with this user_id, or None"""
+        user_id = str(user_id)
+        return next((pilot for pilot in self.pilots if pilot.user_id == user_id), None)
+
+class FlightDataError(ValueError):
+    """The create-flight fields are incomplete or break the campaign's rules (see flight_data_error)"""
+
+def pilot_positions(mission):
+    """Get the {user_id: {flight_id: position}} map of a mission dict (read-only).
+
+    A pilot can be in several flights of a mission. Kept up to date by
+    create/join/leave/delete; missions saved before it existed get a copy
+    rebuilt from their flights, stored only once a pilot is added or removed.
+    """
+    positions = mission.get("resources", {}).get("pilot_flights")
+    if positions is None:
+        positions = {}
+        for flight_id, flight in mission.get("flights", {}).items():
+            for pilot in flight.get("pilots", []):
+                positions.setdefault(str(pilot["user_id"]), {})[flight_id] = str(pilot["position"])
+    return positions
+
+def _stored_pilot_positions(mission):
+    """pilot_positions(), stored in the mission so it can be changed"""
+    from utils.resources import _resource_usage
+    resources = _resource_usage(mission)
+    # The earlier one-flight-per-pilot map, superseded by pilot_flights
+    resources.pop("pilots", None)
+    return resources.setdefault("pilot_flights", pilot_positions(mission))
+
+def _index_pilots(mission, flight):
+    index = _stored_pilot_positions(mission)
+    for pilot in flight.pilots:
+        index.setdefault(pilot.user_id, {})[flight.flight_id] = pilot.position
+
+def _unindex_pilot(mission, user_id, flight_id):
+    """Drop a pilot's flight_id entry from pilot_positions()"""
+    index = _stored_pilot_positions(mission)
+    flights = index.get(user_id)
+    if flights is None:
+        return
+    flights.pop(flight_id, None)
+    if not flights:
+        del index[user_id]
+
+def flights_from_dicts(flight_dicts):
+    """Convert many stored flight dicts at once"""
+    return msgspec.convert(list(flight_dicts), List[Flight])
+
+def build_flight(mission, flight_data, user_id, username, allocator=None, persistent=None):
+    """Allocate everything a new flight needs against one in-memory mission and add it.
+
+    Callsign, flight number, transponder block, TACAN channel and intraflight
+    frequency are all taken from (and recorded in) the given mission dict, so
+    the caller only has to save the mission once. Pass the same allocator when
+    building several flights so its bitsets are built once (and persistent,
+    see flight_data_error). Raises FlightDataError if flight_data is invalid
+    and ValueError if the flight can't be created.
+    """
+    from utils.resources import get_mission_types, claim_aircraft
+    from utils.allocators import MissionAllocator, TACAN_POOL, INTRAFLIGHT_POOL
+    # Required fields and the campaign's Persistent A/C Location rule
+    error = flight_data_error(mission, flight_data, persistent=persistent)
+    if error:
+        raise FlightDataError(error)
+    mission_id = mission["id"]
+    squadron_id = flight_data["squadron"]
+    allocator = allocator or MissionAllocator(mission)
+    # First free callsign/number pair of this squadron (numbers are per squadron)
+    selected_callsign, selected_number = allocator.allocate_callsign(squadron_id)
+    # Flight lead's aircraft (flight_data_error made sure one was selected)
+    aircraft_id = flight_data["aircraft_id"]
+    # Assign transponder codes using mission_type prefix and octal block
+    mission_type = flight_data.get("mission_type", "NONE")
+    remarks = flight_data.get("remarks", "")
+    # Transponder prefix comes from mission_types.json (cached reference data)
+    mission_types = get_mission_types()
+    prefix = mission_types.get(mission_type, {}).get("transponder", "00")
+    # Each flight gets a block of 4 octal codes (00-03, 04-07, ...), block N for flight number N
+    # when it's free, otherwise the first free block under this prefix. There are
+    # TRANSPONDER_BLOCKS (16) per prefix, so that is the most flights of one mission type.
+    transponder_codes = allocator.allocate_transponder_block(prefix, selected_number)
+    logger.debug(f"[CREATE_FLIGHT] Assigned transponder_codes={transponder_codes}")
+    # Get unique TACAN channel
+    tacan_channel = allocator.allocate(TACAN_POOL)
+    logger.debug(f"[CREATE_FLIGHT] Assigned tacan_channel={tacan_channel}")
+    # Get intraflight frequency
+    intraflight_freq = allocator.allocate(INTRAFLIGHT_POOL)
+    logger.debug(f"[CREATE_FLIGHT] Assigned intraflight_freq={intraflight_freq}")
+    # Create the flight with the assigned data
+    pilot_callsign = f"{selected_callsign}{selected_number}1"
+    pilot_transponder = transponder_codes[0] if transponder_codes else None
+    flight = Flight(
+        mission_id=mission_id,
+        squadron=squadron_id,
+        callsign=selected_callsign,
+        flight_number=selected_number,
+        departure_base=flight_data["departure_base"],
+        recovery_base=flight_data["recovery_base"],
+        operations_area=flight_data["operations_area"],
+        mission_type=mission_type,
+        remarks=remarks,
+        aircraft_ids=[aircraft_id],
+        transponder_codes=transponder_codes,
+        tacan_channel=tacan_channel,
+        intraflight_freq=intraflight_freq,
+        pilots=[Pilot(user_id=user_id, username=username, nickname=username, position="1",
+                      callsign=pilot_callsign, transponder=pilot_transponder, aircraft=aircraft_id)],
+        side=flight_data.get("side", "blue")
+    )
+    logger.debug(f"[CREATE_FLIGHT] Flight object created: {flight.to_dict()}")
+    # Raises (and the transaction is discarded) if another flight already has this tail
+    claim_aircraft(mission, aircraft_id, flight.flight_id)
+    # Add flight to mission
+    mission.setdefault("flights", {})[flight.flight_id] = flight.to_dict()
+    _index_pilots(mission, flight)
+    return flight
+
+REQUIRED_FLIGHT_FIELDS = ("squadron", "departure_base", "recovery_base", "operations_area", "mission_type", "aircraft_id")
+
+def persistent_ac_location(mission):
+    """Whether the mission's campaign only allows aircraft to depart from where they are"""
+    from utils.storage import load_campaign
+    campaign = load_campaign(mission["campaign_id"]) if mission.get("campaign_id") else None
+    return bool(campaign and campaign.get("persistent_ac_location", False))
+
+def flight_data_error(mission, flight_data, persistent=None):
+    """Why flight_data can't be used to create a flight in mission, or None if it can.
+
+    persistent is persistent_ac_location(mission), looked up if not given.
+    """
+    from utils.resources import get_resources
+    # Remarks is optional
+    if not all(flight_data.get(field) for field in REQUIRED_FLIGHT_FIELDS):
+        return "All fields except remarks are required"
+    if persistent is None:
+        persistent = persistent_ac_location(mission)
+    if persistent:
+        # Only allow aircraft at their current location
+        aircraft_meta = get_resources().get("aircraft", {}).get(flight_data["aircraft_id"], {})
+        aircraft_location = aircraft_meta.get("location")
+        if not aircraft_location or aircraft_location != flight_data["departure_base"]:
+            logger.warning(f"[CREATE_FLIGHT] Aircraft {flight_data['aircraft_id']} requested at {flight_data['departure_base']}, but its location is {aircraft_location}.")
+            return "Persistent A/C Location is enabled: You can only select aircraft at their current base."
+    return None
 
 def create_flight(mission_id, flight_data, user_id, username):
-    from utils.resources import get_squadrons, get_tacan_channel, get_intraflight_freq, get_aircraft_at_base
-    from utils.storage import load_mission, save_mission
+    from utils.storage import mission_transaction
     import traceback
     logger.debug(f"[CREATE_FLIGHT] mission_id={mission_id}, flight_data={flight_data}, user_id={user_id}, username={username}")
     try:
-        mission = load_mission(mission_id)
-        if not mission:
-            logger.error(f"Mission {mission_id} not found")
-            raise ValueError(f"Mission {mission_id} not found")
-        # Get all squadron callsigns
-        squadrons = get_squadrons()
-        squadron_id = flight_data["squadron"]
-        callsign_bank = squadrons.get(squadron_id, {}).get("callsigns", [squadron_id])
-        # Find all used callsigns and flight_numbers
-        used_callsigns = set()
-        used_numbers = set()
-        if "flights" in mission:
-            for f in mission["flights"].values():
-                used_callsigns.add(f["callsign"])
-                used_numbers.add(f["flight_number"])
-        selected_callsign = None
-        selected_number = None
-        found = False
-        for num in range(0, 9):  # 0-8 allowed
-            for callsign in callsign_bank:
-                if callsign not in used_callsigns and num not in used_numbers:
-                    selected_callsign = callsign
-                    selected_number = num
-                    found = True
-                    break
-            if found:
-                break
-        if not found:
-            raise ValueError("No available callsign/number pairs for this squadron")
-        # Assign transponder codes using mission_type prefix and octal block
-        mission_type = flight_data.get("mission_type", "NONE")
-        remarks = flight_data.get("remarks", "")
-        # Load mission_types.json for prefix
-        mission_types_path = os.path.join(os.path.dirname(__file__), '../config/mission_types.json')
-        with open(mission_types_path) as f:
-            mission_types = json.load(f)
-        prefix = mission_types.get(mission_type, {}).get("transponder", "00")
-        # Each flight gets a block of 4 octal codes (00-03, 04-07, ...)
-        block_start = selected_number * 4
-        transponder_codes = []
-        for i in range(4):
-            octal = format(block_start + i, '02o')  # octal, 2 digits
-            code = f"{prefix}{octal}"
-            transponder_codes.append(code)
-        logger.debug(f"[CREATE_FLIGHT] Assigned transponder_codes={transponder_codes}")
-        # Get unique TACAN channel
-        tacan_channel = get_tacan_channel(mission_id)
-        logger.debug(f"[CREATE_FLIGHT] Assigned tacan_channel={tacan_channel}")
-        # Get intraflight frequency
-        intraflight_freq = get_intraflight_freq(mission_id)
-        logger.debug(f"[CREATE_FLIGHT] Assigned intraflight_freq={intraflight_freq}")
-        # Get aircraft for flight lead - require explicit aircraft selection
-        aircraft_id = flight_data.get("aircraft_id")
-        if not aircraft_id:
-            raise ValueError("Aircraft must be selected")
-        # Create the flight with the assigned data
-        pilot_callsign = f"{selected_callsign}{selected_number}1"
-        pilot_transponder = transponder_codes[0] if transponder_codes else None
-        flight = Flight(
-            mission_id=mission_id,
-            squadron=squadron_id,
-            callsign=selected_callsign,
-            flight_number=selected_number,
-            departure_base=flight_data["departure_base"],
-            recovery_base=flight_data["recovery_base"],
-            operations_area=flight_data["operations_area"],
-            mission_type=mission_type,
-            remarks=remarks,
-            aircraft_ids=[aircraft_id],
-            transponder_codes=transponder_codes,
-            tacan_channel=tacan_channel,
-            intraflight_freq=intraflight_freq,
-            pilots=[{"user_id": user_id, "username": username, "nickname": username, "position": "1", "joined_at": datetime.now().isoformat(), "callsign": pilot_callsign, "transponder": pilot_transponder, "aircraft": aircraft_id}],
-            side=flight_data.get("side", "blue")
-        )
-        logger.debug(f"[CREATE_FLIGHT] Flight object created: {flight.to_dict()}")
-        # Add flight to mission
-        if "flights" not in mission:
-            mission["flights"] = {}
-        mission["flights"][flight.flight_id] = flight.to_dict()
-        logger.debug(f"[CREATE_FLIGHT] Mission structure before save: {mission}")
-        save_mission(mission)
+        # One load and one save: every allocation happens against the same snapshot,
+        # under the mission lock, so concurrent creations can't hand out the same resources
+        with mission_transaction(mission_id) as mission:
+            if not mission:
+                raise LookupError(f"Mission {mission_id} not found")
+            flight = build_flight(mission, flight_data, user_id, username)
         logger.info(f"[CREATE_FLIGHT] Flight {flight.flight_id} created and saved successfully.")
         return flight
+    except (FlightDataError, LookupError) as e:
+        # Bad form data or an unknown mission, not a failure; nothing was saved
+        logger.info(f"[CREATE_FLIGHT] Rejected: {e}")
+        raise
     except Exception as e:
         logger.error(f"[CREATE_FLIGHT] Exception: {e}\n{traceback.format_exc()}")
         raise
 
 def save_flight(flight):
     """Save a flight to the mission's flight list"""
-    from utils.storage import load_mission, save_mission
+    from utils.storage import save_flight as storage_save_flight
     
-    # Load the mission
-    mission = load_mission(flight.mission_id)
-    if not mission:
+    # Only this flight is written; backends with row storage don't touch the rest of the mission
+    if not storage_save_flight(flight.mission_id, flight.to_dict()):
         logger.error(f"Mission {flight.mission_id} not found")
         return False
-    
-    # Update or add flight to mission
-    if "flights" not in mission:
-        mission["flights"] = {}
-    
-    mission["flights"][flight.flight_id] = flight.to_dict()
-    
-    # Save the mission with the updated flight
-    save_mission(mission)
     return True
 
 def get_flight(flight_id, mission_id=None):
     """Get a flight by ID"""
-    from utils.storage import load_mission, list_missions
+    from utils.storage import load_flight, find_flight_mission
     logger.debug(f"[get_flight] Searching for flight_id={flight_id} in mission_id={mission_id}")
-    # If mission_id is provided, check only that mission
-    if mission_id:
-        mission = load_mission(mission_id)
-        if mission and "flights" in mission:
-            logger.debug(f"[get_flight] Available flight IDs in mission: {list(mission['flights'].keys())}")
-            if flight_id in mission["flights"]:
-                return Flight.from_dict(mission["flights"][flight_id])
-        return None
-    # Otherwise, check all missions
-    missions = list_missions()
-    for mission_id in missions:
-        mission = load_mission(mission_id)
-        if mission and "flights" in mission:
-            logger.debug(f"[get_flight] Available flight IDs in mission {mission_id}: {list(mission['flights'].keys())}")
-            if flight_id in mission["flights"]:
-                return Flight.from_dict(mission["flights"][flight_id])
-    logger.error(f"[get_flight] Flight {flight_id} not found in any mission")
+    # Without a mission_id, ask the flight index which mission holds it
+    if not mission_id:
+        mission_id = find_flight_mission(flight_id)
+        if not mission_id:
+            logger.error(f"[get_flight] Flight {flight_id} not found in any mission")
+            return None
+    flight_data = load_flight(mission_id, flight_id)
+    if flight_data:
+        return Flight.from_dict(flight_data)
     return None
 
 def get_mission_flights(mission_id):
     """Get all flight IDs for a mission"""
-    from utils.storage import load_mission
-    
-    mission = load_mission(mission_id)
-    if not mission:
-        return []
+    from utils.storage import list_flights
     
-    if "flights" not in mission:
-        return []
-    
-    return list(mission["flights"].keys())
+    return [flight_data["flight_id"] for flight_data in list_flights(mission_id)]
 
 def get_mission_flights_data(mission_id):
     """Get all flight data for a mission"""
-    from utils.storage import load_mission
-    
-    mission = load_mission(mission_id)
-    if not mission:
-        return []
+    from utils.storage import list_flights
     
-    if "flights" not in mission:
-        return []
-    
-    flights = []
-    for flight_data in mission["flights"].values():
-        flights.append(Flight.from_dict(flight_data))
-    
-    return flights
+    return flights_from_dicts(list_flights(mission_id))
 
-def join_flight(flight_id, user_id, username, position, mission_id=None, aircraft=None):
-    """Join a flight at the specified position, with selected aircraft"""
-    flight = get_flight(flight_id, mission_id)
-    if not flight:
+def _resolve_mission_id(flight_id, mission_id):
+    """Return mission_id, looking it up in the flight index if it wasn't given"""
+    from utils.storage import find_flight_mission
+    return mission_id or find_flight_mission(flight_id)
+
+def add_pilot(mission, flight_id, user_id, username, position, aircraft=None):
+    """Put a pilot into a flight of an in-memory mission. Returns (flight, message); flight is None on failure."""
+    from utils.resources import claim_aircraft
+
+    if flight_id not in mission.get("flights", {}):
         return None, "Flight not found"
+    flight = Flight.from_dict(mission["flights"][flight_id])
 
     # Check if position is available
-    positions = [p["position"] for p in flight.pilots]
+    positions = [p.position for p in flight.pilots]
     if position in positions:
         return None, f"Position {position} is already taken"
 
     # Check if user is already in flight
-    if any(p["user_id"] == user_id for p in flight.pilots):
+    if flight.get_pilot(user_id):
         return None, "You are already in this flight"
 
     # Ensure aircraft is provided
@@ -278,77 +297,119 @@ def join_flight(flight_id, user_id, username, position, mission_id=None, aircraf
     if flight.transponder_codes and 1 <= pos_num <= len(flight.transponder_codes):
         pilot_transponder = flight.transponder_codes[pos_num-1]
 
-    # Save the selected aircraft
+    # Save the selected aircraft, refusing a tail another pilot already has
     pilot_aircraft = aircraft
-    flight.pilots.append({
-        "user_id": user_id,
-        "username": username,
-        "position": position,
-        "joined_at": datetime.now().isoformat(),
-        "callsign": pilot_callsign,
-        "transponder": pilot_transponder,
-        "aircraft": pilot_aircraft
-    })
-
-    save_flight(flight)
+    try:
+        claim_aircraft(mission, pilot_aircraft, flight_id)
+    except ValueError as e:
+        return None, str(e)
+    flight.pilots.append(Pilot(
+        user_id=user_id,
+        username=username,
+        position=position,
+        callsign=pilot_callsign,
+        transponder=pilot_transponder,
+        aircraft=pilot_aircraft
+    ))
+
+    mission["flights"][flight_id] = flight.to_dict()
+    _index_pilots(mission, flight)
     return flight, "Successfully joined flight"
 
-def leave_flight(flight_id, user_id, mission_id=None):
-    """Leave a flight"""
-    flight = get_flight(flight_id, mission_id)
-    if not flight:
+def join_flight(flight_id, user_id, username, position, mission_id=None, aircraft=None):
+    """Join a flight at the specified position, with selected aircraft"""
+    from utils.storage import mission_transaction
+
+    mission_id = _resolve_mission_id(flight_id, mission_id)
+    if not mission_id:
+        return None, "Flight not found"
+
+    # Check and claim the position inside one transaction, so two pilots
+    # joining at the same moment can't both get the same slot
+    with mission_transaction(mission_id) as mission:
+        if not mission:
+            return None, "Flight not found"
+        return add_pilot(mission, flight_id, user_id, username, position, aircraft)
+
+def remove_pilot(mission, flight_id, user_id):
+    """Take a pilot out of a flight of an in-memory mission, deleting the flight if it ends up empty.
+
+    Returns (flight, message); flight is None on failure and when the flight was deleted.
+    """
+    from utils.resources import release_aircraft
+    from utils.allocators import MissionAllocator
+
+    if flight_id not in mission.get("flights", {}):
         return None, "Flight not found"
+    flight = Flight.from_dict(mission["flights"][flight_id])
     
     # Check if user is in flight
     pilot_index = None
     for i, pilot in enumerate(flight.pilots):
-        if pilot["user_id"] == user_id:
+        if pilot.user_id == str(user_id):
             pilot_index = i
             break
     
     if pilot_index is None:
         return None, "You are not in this flight"
     
-    # Remove pilot from flight
-    flight.pilots.pop(pilot_index)
+    # Remove pilot from flight and free their aircraft
+    pilot = flight.pilots.pop(pilot_index)
+    release_aircraft(mission, pilot.aircraft)
+    _unindex_pilot(mission, pilot.user_id, flight_id)
     
-    # If flight is now empty, delete it
+    # If flight is now empty, delete it and give back its TACAN/frequency/transponders
     if not flight.pilots:
-        delete_flight(flight_id, flight.mission_id)
+        MissionAllocator(mission).release_flight(mission["flights"][flight_id])
+        del mission["flights"][flight_id]
         return None, "Flight deleted - no pilots remaining"
     
     # If flight lead left, promote next pilot to lead
     if pilot_index == 0 and flight.pilots:
         # Update the first pilot's position to "1"
-        flight.pilots[0]["position"] = "1"
+        flight.pilots[0].position = "1"
+        _index_pilots(mission, flight)
     
     # Save flight
-    save_flight(flight)
+    mission["flights"][flight_id] = flight.to_dict()
     return flight, "Successfully left flight"
 
+def leave_flight(flight_id, user_id, mission_id=None):
+    """Leave a flight"""
+    from utils.storage import mission_transaction
+
+    mission_id = _resolve_mission_id(flight_id, mission_id)
+    if not mission_id:
+        return None, "Flight not found"
+
+    with mission_transaction(mission_id) as mission:
+        if not mission:
+            return None, "Flight not found"
+        return remove_pilot(mission, flight_id, user_id)
+
+def remove_flight(mission, flight_id):
+    """Delete a flight from an in-memory mission and free its aircraft and radio resources. Returns True if it existed."""
+    from utils.resources import release_aircraft
+    from utils.allocators import MissionAllocator
+
+    if flight_id not in mission.get("flights", {}):
+        return False
+    MissionAllocator(mission).release_flight(mission["flights"][flight_id])
+    for pilot in mission["flights"][flight_id].get("pilots", []):
+        release_aircraft(mission, pilot.get("aircraft"))
+        _unindex_pilot(mission, str(pilot.get("user_id")), flight_id)
+    del mission["flights"][flight_id]
+    return True
+
 def delete_flight(flight_id, mission_id=None):
     """Delete a flight"""
-    from utils.storage import load_mission, save_mission
+    from utils.storage import mission_transaction
     
-    # First try to find the flight
-    flight = get_flight(flight_id, mission_id)
-    if not flight:
+    mission_id = _resolve_mission_id(flight_id, mission_id)
+    if not mission_id:
         return False
-    
-    # If we know the mission_id, we can delete directly
-    if mission_id:
-        mission = load_mission(mission_id)
-        if mission and "flights" in mission and flight_id in mission["flights"]:
-            del mission["flights"][flight_id]
-            save_mission(mission)
-            return True
-    else:
-        # Otherwise, need to find which mission has this flight
-        mission_id = flight.mission_id
-        mission = load_mission(mission_id)
-        if mission and "flights" in mission and flight_id in mission["flights"]:
-            del mission["flights"][flight_id]
-            save_mission(mission)
-            return True
-    
-    return False
+    # Delete the flight and free its aircraft and radio resources in the same write
+    with mission_transaction(mission_id) as mission:
+        if not mission:
+            return False
+        return remove_flight(mission, flight_id)
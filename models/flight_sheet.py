@@ -0,0 +1,198 @@
+"""
+Bulk import and export of a mission's flight table (ATO-style sheets).
+
+A sheet is CSV with a header row or JSON (a list of objects, or
+{"flights": [...]}), one flight per row with the create-flight fields:
+
+    squadron,departure_base,recovery_base,operations_area,mission_type,aircraft_id,remarks,side,user_id,pilot
+
+user_id/pilot name the flight lead; without them the flight gets a
+placeholder lead a mission maker can replace later. Every row is checked
+against the reference data and the mission before anything is allocated, and
+all flights are then built in one transaction with one MissionAllocator, so an
+import is one write, one version and one journal entry, or nothing at all.
+
+The export is one row per pilot (one for an empty flight), in the columns of
+EXPORT_COLUMNS, and is produced row by row for streaming responses.
+"""
+import csv
+import io
+import json
+import logging
+from models.flight import build_flight, flight_data_error, persistent_ac_location, REQUIRED_FLIGHT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+IMPORT_COLUMNS = REQUIRED_FLIGHT_FIELDS + ("remarks", "side", "user_id", "pilot")
+
+EXPORT_COLUMNS = ("callsign", "flight_number", "squadron", "mission_type", "departure_base",
+                  "recovery_base", "operations_area", "tacan_channel", "intraflight_freq",
+                  "position", "pilot_callsign", "pilot", "aircraft", "transponder", "remarks", "flight_id")
+
+PLACEHOLDER_PILOT = "TBD"
+PLACEHOLDER_USER_ID = "placeholder"
+
+class SheetError(ValueError):
+    """A sheet that can't be imported; errors is a list of {"row": n, "message": ...} (row 0: the whole sheet)"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(f"row {e['row']}: {e['message']}" if e["row"] else e["message"] for e in errors))
+        self.errors = errors
+
+def parse_sheet(text, fmt):
+    """Parse CSV or JSON sheet text into a list of row dicts with string values"""
+    if fmt == "json":
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise SheetError([{"row": 0, "message": f"Invalid JSON: {e}"}])
+        if isinstance(data, dict):
+            data = data.get("flights")
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise SheetError([{"row": 0, "message": "Expected a list of flight objects"}])
+        rows = data
+    elif fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+        if not reader.fieldnames:
+            raise SheetError([{"row": 0, "message": "The sheet is empty"}])
+        # Spreadsheets like "Departure Base" headers; match them to departure_base
+        reader.fieldnames = [name.strip().lower().replace(" ", "_") for name in reader.fieldnames]
+        rows = list(reader)
+    else:
+        raise SheetError([{"row": 0, "message": f"Unknown sheet format '{fmt}'"}])
+    if not rows:
+        raise SheetError([{"row": 0, "message": "The sheet has no flights"}])
+    return [{key: str(row[key]).strip() for key in IMPORT_COLUMNS if row.get(key) not in (None, "")}
+            for row in rows]
+
+def check_sheet(mission, rows):
+    """Every problem with importing rows into mission, as [{"row": n, "message": ...}] (rows count from 1)"""
+    from utils.resources import get_resources, aircraft_in_use
+    resources = get_resources()
+    squadrons = resources.get("squadrons", {})
+    bases = resources.get("bases", {})
+    areas = resources.get("operations_areas", {})
+    mission_types = resources.get("mission_types", {})
+    all_aircraft = resources.get("aircraft", {})
+    in_use = aircraft_in_use(mission)
+    persistent = persistent_ac_location(mission)
+    tails = {}
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        def problem(message):
+            errors.append({"row": number, "message": message})
+        missing = [field for field in REQUIRED_FLIGHT_FIELDS if not row.get(field)]
+        if missing:
+            problem(f"Missing {', '.join(missing)}")
+            continue
+        if row["squadron"] not in squadrons:
+            problem(f"Unknown squadron {row['squadron']}")
+        for field in ("departure_base", "recovery_base"):
+            if row[field] not in bases:
+                problem(f"Unknown base {row[field]}")
+        if row["operations_area"] not in areas:
+            problem(f"Unknown operations area {row['operations_area']}")
+        if row["mission_type"] not in mission_types:
+            problem(f"Unknown mission type {row['mission_type']}")
+        if row.get("side", "blue") not in ("blue", "red"):
+            problem(f"Side must be blue or red, not {row['side']}")
+        tail = row["aircraft_id"]
+        aircraft = all_aircraft.get(tail)
+        if aircraft is None:
+            problem(f"Unknown aircraft {tail}")
+        elif str(aircraft.get("squadron")) != row["squadron"]:
+            problem(f"Aircraft {tail} belongs to squadron {aircraft.get('squadron')}")
+        elif tail in in_use:
+            problem(f"Aircraft {tail} is already in use")
+        elif tail in tails:
+            problem(f"Aircraft {tail} is also used in row {tails[tail]}")
+        else:
+            error = flight_data_error(mission, row, persistent=persistent)
+            if error:
+                problem(error)
+        tails.setdefault(tail, number)
+    return errors
+
+def import_sheet(mission, rows):
+    """Check rows, then build all their flights in the mission dict (the caller saves it).
+
+    Raises SheetError if any row is bad (before anything is allocated) or the
+    mission runs out of callsigns or channels part way (then the caller must
+    discard the mission, as mission_transaction does). Returns the new Flights in row order.
+    """
+    from utils.allocators import MissionAllocator
+    errors = check_sheet(mission, rows)
+    if errors:
+        raise SheetError(errors)
+    allocator = MissionAllocator(mission)
+    persistent = persistent_ac_location(mission)
+    flights = []
+    for number, row in enumerate(rows, start=1):
+        flight_data = {field: row[field] for field in REQUIRED_FLIGHT_FIELDS}
+        flight_data["remarks"] = row.get("remarks", "")
+        flight_data["side"] = row.get("side", "blue")
+        user_id = row.get("user_id") or PLACEHOLDER_USER_ID
+        try:
+            flights.append(build_flight(mission, flight_data, user_id, row.get("pilot") or PLACEHOLDER_PILOT,
+                                        allocator=allocator, persistent=persistent))
+        except ValueError as e:
+            # Callsigns, transponder blocks or channels ran out; the caller's transaction is discarded
+            raise SheetError([{"row": number, "message": str(e)}])
+    logger.info(f"Imported {len(flights)} flights into mission {mission['id']}")
+    return flights
+
+def import_flights(mission_id, rows):
+    """Import rows into a stored mission in one transaction. Returns (version, flights)."""
+    from utils.storage import mission_transaction
+    with mission_transaction(mission_id) as mission:
+        if not mission:
+            raise SheetError([{"row": 0, "message": "Mission not found"}])
+        flights = import_sheet(mission, rows)
+    return mission.get("version", 0), flights
+
+def export_rows(flights):
+    """Yield one EXPORT_COLUMNS dict per pilot of each flight dict (one row for a flight without pilots)"""
+    for flight in flights:
+        base = {
+            "callsign": flight.get("callsign"),
+            "flight_number": flight.get("flight_number"),
+            "squadron": flight.get("squadron"),
+            "mission_type": flight.get("mission_type"),
+            "departure_base": flight.get("departure_base"),
+            "recovery_base": flight.get("recovery_base"),
+            "operations_area": flight.get("operations_area"),
+            "tacan_channel": flight.get("tacan_channel"),
+            "intraflight_freq": flight.get("intraflight_freq"),
+            "remarks": flight.get("remarks", ""),
+            "flight_id": flight.get("flight_id")
+        }
+        pilots = sorted(flight.get("pilots", []), key=lambda p: str(p.get("position")))
+        if not pilots:
+            yield dict(base, position="", pilot_callsign="", pilot="", aircraft="", transponder="")
+        for pilot in pilots:
+            yield dict(base,
+                       position=pilot.get("position"),
+                       pilot_callsign=pilot.get("callsign"),
+                       pilot=pilot.get("nickname") or pilot.get("username"),
+                       aircraft=pilot.get("aircraft"),
+                       transponder=pilot.get("transponder"))
+
+def stream_csv(rows):
+    """Yield CSV text a line at a time: the header, then one line per row dict"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def stream_json(rows):
+    """Yield a JSON array of row dicts an element at a time"""
+    separator = "["
+    for row in rows:
+        yield separator + json.dumps(row)
+        separator = ",\n"
+    yield "[]" if separator == "[" else "]"
@@ -0,0 +1,43 @@
+"""
+Read-only view of a mission for page renders.
+
+Flights stay as the stored dicts until something touches them, and each is
+decoded into a Flight at most once. The current user's flight is found
+through the mission's pilot map instead of scanning every flight and pilot.
+"""
+from models.flight import Flight, pilot_positions
+
+class MissionView:
+    def __init__(self, mission):
+        self.mission = mission
+        self._raw = mission.get("flights", {})
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __bool__(self):
+        return bool(self._raw)
+
+    def __iter__(self):
+        for flight_id in self._raw:
+            yield self.get_flight(flight_id)
+
+    def flight_ids(self):
+        return list(self._raw)
+
+    def get_flight(self, flight_id):
+        """The decoded Flight, or None if the mission has no such flight"""
+        flight = self._decoded.get(flight_id)
+        if flight is None and flight_id in self._raw:
+            flight = Flight.from_dict(self._raw[flight_id])
+            self._decoded[flight_id] = flight
+        return flight
+
+    def user_flight(self, user_id):
+        """Return (flight, position) for the first flight user_id is in, or (None, None)"""
+        for flight_id, position in pilot_positions(self.mission).get(str(user_id), {}).items():
+            flight = self.get_flight(flight_id)
+            if flight is not None:
+                return flight, position
+        return None, None
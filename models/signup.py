@@ -0,0 +1,24 @@
+"""
+Mission signups (coalition + aircraft preference per user)
+"""
+from datetime import datetime
+
+def apply_signup(mission, user_id, pilot_name, coalition, aircraft):
+    """Add or update user_id's signup on an in-memory mission. Returns (signup, message)."""
+    signups = mission.setdefault("signups", [])
+    for signup in signups:
+        if signup.get("user_id") == str(user_id):
+            signup["coalition"] = coalition
+            signup["aircraft"] = aircraft
+            signup["status"] = "Pending"  # Reset status for changed signup
+            return signup, "Your signup has been updated."
+    signup = {
+        "user_id": str(user_id),
+        "pilot": pilot_name,
+        "coalition": coalition,
+        "aircraft": aircraft,
+        "status": "Pending",
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    signups.append(signup)
+    return signup, "You have successfully signed up for this mission."
@@ -0,0 +1,38 @@
+"""
+Shared fixtures: a bare Flask app over a temporary instance folder, run once
+per storage backend, with the repo's config/ and data/ reference files.
+"""
+import os
+import pytest
+from flask import Flask
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(params=["json", "sqlite"])
+def app(request, tmp_path):
+    instance = tmp_path / "instance"
+    for name in ("missions", "campaigns"):
+        (instance / name).mkdir(parents=True)
+    app = Flask("app", instance_path=str(instance), root_path=ROOT)
+    app.config.update(TESTING=True, SECRET_KEY="test", STORAGE_BACKEND=request.param)
+    with app.app_context():
+        yield app
+
+@pytest.fixture
+def backend(app):
+    from utils.backends import get_backend
+    return get_backend()
+
+@pytest.fixture
+def mission(app):
+    """An empty stored mission; returns its ID"""
+    from utils.storage import save_mission
+    return save_mission({"id": "TEST | EX01", "name": "TEST | EX01", "status": "planned"})
+
+@pytest.fixture
+def flight_data():
+    """Builds create-flight form fields: flight_data(tail, mission_type="CAP", squadron="331")"""
+    def build(aircraft_id, mission_type="CAP", squadron="331"):
+        return {"squadron": squadron, "departure_base": "ENBO", "recovery_base": "ENBO",
+                "operations_area": "east", "mission_type": mission_type, "aircraft_id": aircraft_id}
+    return build
@@ -0,0 +1,62 @@
+"""MissionAllocator pools: running out, giving values back, and transponder block fallback"""
+import pytest
+from utils.allocators import (MissionAllocator, ResourceExhausted, FLIGHT_NUMBERS, TRANSPONDER_BLOCKS,
+                              transponder_block_codes)
+from utils.resources import get_squadrons
+
+@pytest.fixture
+def allocator(app):
+    return MissionAllocator({"id": "TEST | EX01", "flights": {}})
+
+def test_callsigns_run_out(allocator):
+    bank = get_squadrons()["331"]["callsigns"]
+    pairs = [allocator.allocate_callsign("331") for _ in range(len(FLIGHT_NUMBERS) * len(bank))]
+    assert len(set(pairs)) == len(pairs) == 9 * len(bank)
+    # Number-major: every callsign gets 0 before any gets 1
+    assert pairs[:len(bank)] == [(callsign, 0) for callsign in bank]
+    with pytest.raises(ResourceExhausted):
+        allocator.allocate_callsign("331")
+
+def test_released_callsign_is_reused(allocator):
+    bank = get_squadrons()["331"]["callsigns"]
+    for _ in range(len(FLIGHT_NUMBERS) * len(bank)):
+        allocator.allocate_callsign("331")
+    allocator.release_flight({"squadron": "331", "callsign": bank[1], "flight_number": 4})
+    assert allocator.allocate_callsign("331") == (bank[1], 4)
+    with pytest.raises(ResourceExhausted):
+        allocator.allocate_callsign("331")
+
+def test_transponder_block_falls_back_when_number_is_shared(allocator):
+    # Flight 0 of two squadrons under the same mission type prefix
+    assert allocator.allocate_transponder_block("10", 0) == transponder_block_codes("10", 0)
+    assert allocator.allocate_transponder_block("10", 0) == transponder_block_codes("10", 1)
+    # Flight 1 now finds its own block taken as well
+    assert allocator.allocate_transponder_block("10", 1) == transponder_block_codes("10", 2)
+    # Other prefixes are separate pools
+    assert allocator.allocate_transponder_block("20", 0) == transponder_block_codes("20", 0)
+
+def test_transponder_blocks_cap_flights_per_mission_type(allocator):
+    blocks = [allocator.allocate_transponder_block("10", 0)[0] for _ in range(TRANSPONDER_BLOCKS)]
+    assert len(set(blocks)) == TRANSPONDER_BLOCKS == 16
+    with pytest.raises(ResourceExhausted):
+        allocator.allocate_transponder_block("10", 0)
+    allocator.release_flight({"transponder_codes": transponder_block_codes("10", 5)})
+    assert allocator.allocate_transponder_block("10", 0) == transponder_block_codes("10", 5)
+
+def test_callsign_shared_by_two_squadrons_is_taken_once(allocator):
+    squadrons = get_squadrons()
+    assert "VIPER" in squadrons["331"]["callsigns"] and "VIPER" in squadrons["339"]["callsigns"]
+    pairs = [allocator.allocate_callsign(squadron) for _ in range(3) for squadron in ("331", "339")]
+    assert len(set(pairs)) == len(pairs)
+    assert [pair for pair in pairs if pair[0] == "VIPER"] == [("VIPER", 0)]
+
+def test_shared_callsign_seen_in_legacy_mission(app):
+    # Saved with per-squadron allocations: 331's VIPER 0 must still block 339's
+    mission = {"id": "TEST | EX01", "resources": {"allocations": {"callsign:331": ["VIPER 0"]}},
+               "flights": {"f1": {"squadron": "331", "callsign": "VIPER", "flight_number": 0}}}
+    allocator = MissionAllocator(mission)
+    pairs = [allocator.allocate_callsign("339") for _ in range(3)]
+    assert ("VIPER", 0) not in pairs
+    assert mission["resources"]["allocations"]["callsign"] == ["VIPER 0"] + [f"{c} {n}" for c, n in pairs]
+    allocator.release_flight(mission["flights"]["f1"])
+    assert allocator.allocate_callsign("339") == ("VIPER", 0)
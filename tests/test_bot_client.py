@@ -0,0 +1,39 @@
+"""BotClient's circuit breaker lets one probe through after the cooldown, and always releases it"""
+import pytest
+import requests
+from utils.bot_client import BotClient, BotUnavailable
+
+def _client(monkeypatch, *errors):
+    client = BotClient("http://bot.invalid", failure_threshold=1, cooldown=0)
+    calls = iter(errors)
+
+    def request(*args, **kwargs):
+        raise next(calls)
+    monkeypatch.setattr(client.session, "request", request)
+    return client
+
+def test_probe_released_after_unexpected_error(monkeypatch):
+    client = _client(monkeypatch, requests.ConnectionError("down"), RuntimeError("bug"),
+                     requests.ConnectionError("still down"))
+    with pytest.raises(BotUnavailable):
+        client.get("/roles/1")
+    # The probe fails with something that isn't a RequestException
+    with pytest.raises(RuntimeError):
+        client.get("/roles/1")
+    # ...and the next call is still let through to probe, not short-circuited forever
+    with pytest.raises(BotUnavailable, match="still down"):
+        client.get("/roles/1")
+    assert client.stats()["short_circuited"] == 0
+
+def test_probe_released_when_cancelled(monkeypatch):
+    import asyncio
+    client = _client(monkeypatch, requests.ConnectionError("down"))
+    with pytest.raises(BotUnavailable):
+        client.get("/roles/1")
+
+    class CancelledSession:
+        def request(self, *args, **kwargs):
+            raise asyncio.CancelledError()
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(client.request_async(CancelledSession(), "GET", "/roles/1"))
+    assert not client._probing
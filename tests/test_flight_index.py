@@ -0,0 +1,81 @@
+"""find_flight_mission/get_flight must follow every way a flight appears or disappears"""
+import json
+import pytest
+from models.flight import create_flight, join_flight, leave_flight, delete_flight, get_flight, FlightDataError
+from utils.storage import find_flight_mission, make_key, load_mission
+
+def test_found_after_create(mission, flight_data):
+    flight = create_flight(mission, flight_data("659"), "1", "alice")
+    assert find_flight_mission(flight.flight_id) == make_key(mission)
+    assert get_flight(flight.flight_id).pilots[0].user_id == "1"
+
+def test_not_created_without_aircraft(mission, flight_data):
+    before = load_mission(mission)
+    with pytest.raises(FlightDataError, match="All fields except remarks are required"):
+        create_flight(mission, flight_data(""), "1", "alice")
+    assert load_mission(mission) == before
+
+def test_found_after_leave(mission, flight_data):
+    flight = create_flight(mission, flight_data("659"), "1", "alice")
+    joined, message = join_flight(flight.flight_id, "2", "bob", "2", aircraft="660")
+    assert joined, message
+    left, message = leave_flight(flight.flight_id, "2")
+    assert left, message
+    assert find_flight_mission(flight.flight_id) == make_key(mission)
+    assert [p.user_id for p in get_flight(flight.flight_id).pilots] == ["1"]
+
+def test_gone_after_last_pilot_leaves(mission, flight_data):
+    flight = create_flight(mission, flight_data("659"), "1", "alice")
+    remaining, message = leave_flight(flight.flight_id, "1")
+    assert remaining is None and "deleted" in message
+    assert find_flight_mission(flight.flight_id) is None
+    assert get_flight(flight.flight_id) is None
+
+def test_gone_after_delete(mission, flight_data):
+    flight = create_flight(mission, flight_data("659"), "1", "alice")
+    other = create_flight(mission, flight_data("660"), "2", "bob")
+    assert delete_flight(flight.flight_id)
+    assert find_flight_mission(flight.flight_id) is None
+    assert get_flight(flight.flight_id) is None
+    assert find_flight_mission(other.flight_id) == make_key(mission)
+
+def test_unknown_flight(mission):
+    assert find_flight_mission("no-such-flight") is None
+    assert get_flight("no-such-flight") is None
+
+@pytest.fixture
+def mission_file(app, backend, mission):
+    if app.config["STORAGE_BACKEND"] != "json":
+        pytest.skip("only the JSON backend keeps missions in files")
+    return backend.mission_path(make_key(mission))
+
+def _edit(path, change):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    change(data)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def test_new_mission_file_written_out_of_band(mission, mission_file, flight_data):
+    flight = create_flight(mission, flight_data("659"), "1", "alice")
+    copy = dict(json.loads(mission_file.read_text()), id="TEST | EX02", name="TEST | EX02")
+    # Moved by hand into a new mission file: the old one no longer has it
+    moved = copy["flights"].pop(flight.flight_id)
+    copy["flights"]["hand-made"] = dict(moved, flight_id="hand-made", mission_id="TEST | EX02")
+    mission_file.with_name("TESTEX02.json").write_text(json.dumps(copy))
+    assert find_flight_mission("hand-made") == "TESTEX02"
+    assert get_flight("hand-made").mission_id == "TEST | EX02"
+
+def test_mission_file_edited_in_place(monkeypatch, mission, mission_file, flight_data):
+    import utils.backends.json_backend as json_backend
+    flight = create_flight(mission, flight_data("659"), "1", "alice")
+    assert find_flight_mission(flight.flight_id) == make_key(mission)
+
+    def rename(data):
+        data["flights"]["renamed"] = dict(data["flights"].pop(flight.flight_id), flight_id="renamed")
+    _edit(mission_file, rename)
+    # An in-place write doesn't touch the folder; it is picked up on the next periodic re-check
+    monkeypatch.setattr(json_backend, "INDEX_RECHECK_INTERVAL", 0)
+    assert find_flight_mission("renamed") == make_key(mission)
+    assert get_flight("renamed").flight_id == "renamed"
+    assert get_flight(flight.flight_id) is None
@@ -0,0 +1,66 @@
+"""The pilot_positions() map kept in step with the flights, and rejected joins that change nothing"""
+from models.flight import create_flight, join_flight, leave_flight, delete_flight, remove_pilot, pilot_positions
+from models.mission_view import MissionView
+from utils.storage import load_mission, save_mission
+
+def test_pilot_in_two_flights(mission, flight_data):
+    first = create_flight(mission, flight_data("659"), "1", "alice")
+    second = create_flight(mission, flight_data("660"), "2", "bob")
+    flight, message = join_flight(second.flight_id, "1", "alice", "2", aircraft="664")
+    assert flight, message
+    assert pilot_positions(load_mission(mission))["1"] == {first.flight_id: "1", second.flight_id: "2"}
+    flight, message = join_flight(second.flight_id, "1", "alice", "3", aircraft="665")
+    assert flight is None and message == "You are already in this flight"
+
+def test_leaving_one_flight_keeps_the_other(mission, flight_data):
+    first = create_flight(mission, flight_data("659"), "1", "alice")
+    second = create_flight(mission, flight_data("660"), "1", "alice")
+    leave_flight(first.flight_id, "1")
+    data = load_mission(mission)
+    assert pilot_positions(data)["1"] == {second.flight_id: "1"}
+    assert MissionView(data).user_flight("1")[0].flight_id == second.flight_id
+    delete_flight(second.flight_id)
+    data = load_mission(mission)
+    assert "1" not in pilot_positions(data)
+    assert MissionView(data).user_flight("1") == (None, None)
+
+def test_map_replaces_the_single_flight_one(mission, flight_data):
+    first = create_flight(mission, flight_data("659"), "1", "alice")
+    second = create_flight(mission, flight_data("660"), "2", "bob")
+    # Saved with the earlier {user_id: [flight_id, position]} map
+    data = load_mission(mission)
+    del data["resources"]["pilot_flights"]
+    data["resources"]["pilots"] = {"1": [first.flight_id, "1"], "2": [second.flight_id, "1"]}
+    save_mission(data)
+    data = load_mission(mission)
+    flight, message = remove_pilot(data, second.flight_id, "2")
+    assert flight is None
+    assert "pilots" not in data["resources"]
+    assert data["resources"]["pilot_flights"] == {"1": {first.flight_id: "1"}}
+
+def _legacy(mission):
+    """Strip the derived maps, as in a mission saved before they existed"""
+    data = load_mission(mission)
+    del data["resources"]["aircraft_in_use"]
+    del data["resources"]["pilot_flights"]
+    save_mission(data)
+    return load_mission(mission)
+
+def test_rejected_join_leaves_legacy_mission_unchanged(mission, flight_data):
+    flight = create_flight(mission, flight_data("659"), "1", "alice")
+    before = _legacy(mission)
+    joined, message = join_flight(flight.flight_id, "2", "bob", "2", aircraft="659")
+    assert joined is None and message == "Aircraft 659 is already in use"
+    joined, message = join_flight(flight.flight_id, "1", "alice", "2", aircraft="660")
+    assert joined is None
+    assert load_mission(mission) == before
+
+def test_join_stores_maps_of_legacy_mission(mission, flight_data):
+    flight = create_flight(mission, flight_data("659"), "1", "alice")
+    before = _legacy(mission)
+    joined, message = join_flight(flight.flight_id, "2", "bob", "2", aircraft="660")
+    assert joined, message
+    after = load_mission(mission)
+    assert after["version"] == before["version"] + 1
+    assert after["resources"]["aircraft_in_use"] == {"659": flight.flight_id, "660": flight.flight_id}
+    assert after["resources"]["pilot_flights"] == {"1": {flight.flight_id: "1"}, "2": {flight.flight_id: "2"}}
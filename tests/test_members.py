@@ -0,0 +1,20 @@
+"""profile_generation() must change with every pilot name the roster fragment could show"""
+from utils.members import profile_generation, make_profile, get_member_store, invalidate_member, _store
+
+def test_changes_when_the_bot_writes_the_store(app):
+    store = get_member_store()
+    before = profile_generation()
+    store.upsert_member("1", "Alice [331]", [])
+    after_upsert = profile_generation()
+    assert after_upsert != before
+    store.remove_member("1")
+    assert profile_generation() != after_upsert
+
+def test_changes_when_a_cached_nickname_changes(app):
+    invalidate_member()
+    _store("1", make_profile("1", [], "Alice"), True)
+    before = profile_generation()
+    _store("1", make_profile("1", [], "Alice"), True)
+    assert profile_generation() == before
+    _store("1", make_profile("1", [], "Alicia"), True)
+    assert profile_generation() != before
@@ -0,0 +1,230 @@
+"""
+Per-mission allocators for TACAN channels, intraflight frequencies and transponder codes.
+
+Each resource is a fixed, ordered pool of values:
+
+- tacan: the channels in tacan_channels.json first, then the rest of 1X-126Y
+- intraflight: the frequencies in frequencies.json, then 140.25-149.75 MHz
+  in 0.25 MHz steps
+- transponder:<prefix>: the 16 blocks of 4 octal codes under a mission type
+  prefix (block 0 = <prefix>00-03, block 1 = <prefix>04-07, ...). Every
+  flight takes a block, so a mission holds at most 16 flights per transponder
+  prefix; the 17th raises ResourceExhausted
+- callsign:<squadron>: every "<callsign> <number>" pair of the squadron's
+  callsign bank and flight numbers 0-8, number-major (VIKING 0, HAWK 0, VIKING 1, ...).
+  Squadrons can share a callsign (VIPER), so the pairs taken are kept once
+  for the whole mission, in resources["allocations"]["callsign"]
+
+A mission stores the values it has taken per pool in
+resources["allocations"][pool]. When allocating, the taken values are turned
+into a bitset over the pool so the first free value is found with a couple of
+integer operations. Allocation is deterministic (lowest free value, or the
+preferred one if it's free). When a pool runs out, ResourceExhausted is raised
+instead of inventing a random value that might collide.
+
+Values (not bit positions) are stored, so editing a config pool doesn't shift
+what a mission already holds.
+
+Fallbacks: tacan_channels.json is optional and isn't shipped, so by default
+TACAN channels are simply 1X, 2X, ... in order. The intraflight list in
+frequencies.json only has 8 entries; past those, the 140.25-149.75 MHz
+fallback replaces the random "1xx.xx" frequency the old allocator made up.
+Neither is an agreed frequency plan: list the real channels and frequencies
+in config/ to use them first.
+"""
+import logging
+from utils.resources import get_resources, get_resources_version, _resource_usage
+
+logger = logging.getLogger(__name__)
+
+TACAN_POOL = "tacan"
+INTRAFLIGHT_POOL = "intraflight"
+# Per mission type prefix: transponder:<prefix>
+TRANSPONDER_POOL = "transponder"
+TRANSPONDER_BLOCK_SIZE = 4
+# Two octal digits per prefix: 64 codes, 16 blocks of 4
+TRANSPONDER_BLOCKS = 64 // TRANSPONDER_BLOCK_SIZE
+CALLSIGN_POOL = "callsign"
+FLIGHT_NUMBERS = range(0, 9)  # 0-8 allowed
+
+class ResourceExhausted(ValueError):
+    """No free value left in a pool for this mission"""
+
+class Pool:
+    def __init__(self, name, values):
+        self.name = name
+        self.values = list(dict.fromkeys(values))
+        self.positions = {value: i for i, value in enumerate(self.values)}
+        self.full = (1 << len(self.values)) - 1
+
+    def __len__(self):
+        return len(self.values)
+
+def tacan_space():
+    """Every TACAN channel, 1X-126X then 1Y-126Y"""
+    return [f"{n}{band}" for band in "XY" for n in range(1, 127)]
+
+def intraflight_fallback():
+    """VHF channels handed out once the configured intraflight frequencies run out"""
+    # In kHz: 140250, 140500, ... 149750
+    return [f"{khz / 1000:.2f}" for khz in range(140250, 150000, 250)]
+
+def transponder_block_codes(prefix, block):
+    """The codes of one transponder block, e.g. ("10", 1) -> 1004-1007"""
+    start = block * TRANSPONDER_BLOCK_SIZE
+    return [f"{prefix}{format(start + i, '02o')}" for i in range(TRANSPONDER_BLOCK_SIZE)]
+
+# Pools built from the current reference data: {"version": int, "pools": {name: Pool}}
+_pools = {"version": None, "pools": {}}
+
+def get_pool(name):
+    """The pool called name, rebuilt when the reference data changes"""
+    global _pools
+    version = get_resources_version()
+    if _pools["version"] != version:
+        _pools = {"version": version, "pools": {}}
+    pool = _pools["pools"].get(name)
+    if pool is None:
+        pool = Pool(name, _pool_values(name))
+        _pools["pools"][name] = pool
+    return pool
+
+def _pool_values(name):
+    resources = get_resources()
+    if name == TACAN_POOL:
+        return list(resources.get("tacan_channels", []) or []) + tacan_space()
+    if name == INTRAFLIGHT_POOL:
+        return list(resources.get("frequencies", {}).get("intraflight", [])) + intraflight_fallback()
+    if name.startswith(CALLSIGN_POOL + ":"):
+        squadron_id = name.split(":", 1)[1]
+        callsign_bank = resources.get("squadrons", {}).get(squadron_id, {}).get("callsigns", [squadron_id])
+        return [f"{callsign} {number}" for number in FLIGHT_NUMBERS for callsign in callsign_bank]
+    if name.startswith(TRANSPONDER_POOL + ":"):
+        prefix = name.split(":", 1)[1]
+        # A block is identified by its first code
+        return [transponder_block_codes(prefix, block)[0] for block in range(TRANSPONDER_BLOCKS)]
+    raise KeyError(f"Unknown resource pool {name}")
+
+def transponder_pool_name(prefix):
+    return f"{TRANSPONDER_POOL}:{prefix}"
+
+def callsign_pool_name(squadron_id):
+    return f"{CALLSIGN_POOL}:{squadron_id}"
+
+def _seed(mission, pool_name):
+    """Values already taken in a mission saved before it had allocations for this pool"""
+    flights = mission.get("flights", {}).values()
+    if pool_name == TACAN_POOL:
+        return [f["tacan_channel"] for f in flights if f.get("tacan_channel")]
+    if pool_name == INTRAFLIGHT_POOL:
+        return [f["intraflight_freq"] for f in flights if f.get("intraflight_freq")]
+    if pool_name == CALLSIGN_POOL:
+        return [f"{f['callsign']} {f['flight_number']}" for f in flights
+                if f.get("callsign") is not None and f.get("flight_number") is not None]
+    prefix = pool_name.split(":", 1)[1]
+    return [f["transponder_codes"][0] for f in flights
+            if f.get("transponder_codes") and f["transponder_codes"][0][:-2] == prefix]
+
+class MissionAllocator:
+    """Allocates resources against one in-memory mission dict (the caller saves the mission)"""
+
+    def __init__(self, mission):
+        self.mission = mission
+        self.allocations = _resource_usage(mission).setdefault("allocations", {})
+        # pool name -> bitset of taken positions, built on first use
+        self._bits = {}
+
+    def _taken(self, pool):
+        if pool.name not in self.allocations:
+            self.allocations[pool.name] = list(dict.fromkeys(_seed(self.mission, pool.name)))
+        return self.allocations[pool.name]
+
+    def _bitset(self, pool):
+        bits = self._bits.get(pool.name)
+        if bits is None:
+            bits = 0
+            for value in self._taken(pool):
+                position = pool.positions.get(value)
+                if position is not None:
+                    bits |= 1 << position
+            self._bits[pool.name] = bits
+        return bits
+
+    def allocate(self, pool_name, preferred=None):
+        """Take the preferred value if it's free, otherwise the lowest free one"""
+        pool = get_pool(pool_name)
+        bits = self._bitset(pool)
+        position = pool.positions.get(preferred)
+        if position is None or bits >> position & 1:
+            free = pool.full & ~bits
+            if not free:
+                raise ResourceExhausted(f"No free {pool_name} values left in this mission ({len(pool)} in pool)")
+            position = (free & -free).bit_length() - 1
+        value = pool.values[position]
+        self._bits[pool.name] = bits | 1 << position
+        self._taken(pool).append(value)
+        return value
+
+    def release(self, pool_name, value):
+        """Give a value back to its pool"""
+        pool = get_pool(pool_name)
+        taken = self._taken(pool)
+        if value in taken:
+            taken.remove(value)
+        position = pool.positions.get(value)
+        if position is not None and pool.name in self._bits:
+            self._bits[pool.name] &= ~(1 << position)
+
+    def free_count(self, pool_name):
+        pool = get_pool(pool_name)
+        return len(pool) - bin(self._bitset(pool)).count("1")
+
+    def allocate_transponder_block(self, prefix, preferred_block=None):
+        """Take a block of 4 transponder codes under a mission type prefix"""
+        preferred = None
+        if preferred_block is not None and 0 <= preferred_block < TRANSPONDER_BLOCKS:
+            preferred = transponder_block_codes(prefix, preferred_block)[0]
+        first = self.allocate(transponder_pool_name(prefix), preferred)
+        block = int(first[-2:], 8) // TRANSPONDER_BLOCK_SIZE
+        return transponder_block_codes(prefix, block)
+
+    def _taken_callsigns(self):
+        """The callsign/number pairs taken by any squadron in the mission"""
+        if CALLSIGN_POOL not in self.allocations:
+            # Missions saved with a list per squadron: rebuild the mission-wide one from the flights
+            for name in [name for name in self.allocations if name.startswith(CALLSIGN_POOL + ":")]:
+                del self.allocations[name]
+            self.allocations[CALLSIGN_POOL] = list(dict.fromkeys(_seed(self.mission, CALLSIGN_POOL)))
+        return self.allocations[CALLSIGN_POOL]
+
+    def allocate_callsign(self, squadron_id):
+        """Take the squadron's first callsign/flight number pair no flight of the mission has. Returns (callsign, number)."""
+        pool = get_pool(callsign_pool_name(squadron_id))
+        taken = self._taken_callsigns()
+        bits = 0
+        for pair in taken:
+            position = pool.positions.get(pair)
+            if position is not None:
+                bits |= 1 << position
+        free = pool.full & ~bits
+        if not free:
+            raise ResourceExhausted("No available callsign/number pairs for this squadron")
+        pair = pool.values[(free & -free).bit_length() - 1]
+        taken.append(pair)
+        callsign, number = pair.rsplit(" ", 1)
+        return callsign, int(number)
+
+    def release_flight(self, flight):
+        """Give back everything a flight dict was allocated"""
+        if flight.get("callsign") is not None and flight.get("flight_number") is not None:
+            pair = f"{flight['callsign']} {flight['flight_number']}"
+            taken = self._taken_callsigns()
+            if pair in taken:
+                taken.remove(pair)
+        if flight.get("tacan_channel"):
+            self.release(TACAN_POOL, flight["tacan_channel"])
+        if flight.get("intraflight_freq"):
+            self.release(INTRAFLIGHT_POOL, flight["intraflight_freq"])
+        codes = flight.get("transponder_codes")
+        if codes:
+            self.release(transponder_pool_name(codes[0][:-2]), codes[0])
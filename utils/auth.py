@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import session, redirect, url_for, request, flash
+from flask import session, redirect, url_for, request, flash, jsonify
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,3 +35,13 @@ def login_required(f):
         logger.debug(f"User {session.get('username', 'unknown')} is authenticated, proceeding to {request.path}")
         return f(*args, **kwargs)
     return decorated_function
+
+def api_login_required(f):
+    """login_required for JSON endpoints: answers 401 instead of redirecting to the login page"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not (session.get('user_id') or session.get('is_authenticated') is True):
+            logger.debug(f"Unauthorized API access to {request.path}")
+            return jsonify({"error": "Login required"}), 401
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,35 @@
+"""
+Storage backends for missions and campaigns.
+
+utils.storage is the only module the rest of the app should talk to; it picks a
+backend from the STORAGE_BACKEND config value ("json" or "sqlite").
+"""
+from flask import current_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("json", "sqlite")
+
+def create_backend(name, instance_path, config=None):
+    """Create a backend instance by name"""
+    config = config or {}
+    if name == "json":
+        from utils.backends.json_backend import JSONBackend
+        return JSONBackend(instance_path, config.get("MISSION_FILE_FORMAT") or "pretty")
+    if name == "sqlite":
+        from utils.backends.sqlite_backend import SQLiteBackend
+        db_path = config.get("SQLITE_DATABASE") or None
+        return SQLiteBackend(instance_path, db_path)
+    raise ValueError(f"Unknown storage backend '{name}' (expected one of {', '.join(BACKENDS)})")
+
+def get_backend():
+    """Get the storage backend configured for the current app (created once per app)"""
+    app = current_app._get_current_object()
+    backend = app.extensions.get("storage_backend")
+    if backend is None:
+        name = app.config.get("STORAGE_BACKEND", "json") or "json"
+        backend = create_backend(name, app.instance_path, app.config)
+        app.extensions["storage_backend"] = backend
+        logger.debug(f"Using '{name}' storage backend")
+    return backend
@@ -0,0 +1,194 @@
+"""
+Common interface shared by all storage backends.
+
+Missions and campaigns are addressed by their "key": the ID with every
+non-alphanumeric character removed (e.g. "PP15 | EX01" -> "PP15EX01").
+"""
+
+# Keys holding per-flight/per-pilot payloads. These are never part of a mission summary.
+MISSION_PAYLOAD_KEYS = ("flights", "signups", "resources")
+
+# Fields copied out of a campaign document by list_campaigns
+CAMPAIGN_SUMMARY_KEYS = ("id", "name", "shorthand", "type", "status")
+
+def make_key(raw_id):
+    """Turn a mission/campaign ID into its storage key (e.g. PP15 | EX01 -> PP15EX01)"""
+    return ''.join(c for c in raw_id if c.isalnum())
+
+def normalize_mission(mission, mission_key):
+    """Always set 'id' to the key (PP15EX01), and 'name' to the stylized name (PP15 | EX01)"""
+    mission['id'] = mission_key
+    mission['name'] = mission.get('id_raw') or mission.get('name') or mission.get('id')
+    if 'id_raw' in mission:
+        del mission['id_raw']
+    return mission
+
+def next_version(current_version):
+    """The version a mission gets when it is written (missions saved before versioning start at 0)"""
+    return (current_version or 0) + 1
+
+def mission_summary(mission):
+    """Return the lightweight part of a mission (everything except flights/signups/resources)"""
+    return {k: v for k, v in mission.items() if k not in MISSION_PAYLOAD_KEYS}
+
+def campaign_summary(campaign, campaign_key):
+    """Return the fields shown in campaign lists"""
+    summary = {k: campaign.get(k) for k in CAMPAIGN_SUMMARY_KEYS}
+    if not summary["id"]:
+        summary["id"] = campaign_key
+    return summary
+
+def matches_filters(summary, campaign_id=None, status=None):
+    """Check a mission summary against the optional list_missions filters"""
+    if campaign_id is not None and summary.get("campaign_id") != campaign_id:
+        return False
+    if status is not None and summary.get("status") != status:
+        return False
+    return True
+
+class StorageBackend:
+    """Base class for storage backends.
+
+    Subclasses must implement the mission and campaign document methods. The
+    flight and signup methods have document-based defaults (a mission
+    transaction that changes one entry); backends that can do better override them.
+    """
+
+    name = None
+
+    # --- Missions ---
+
+    def load_mission(self, mission_key):
+        """Return the full mission document, or None if it does not exist"""
+        raise NotImplementedError
+
+    def save_mission(self, mission_key, mission_data):
+        """Store the full mission document.
+
+        Every write of a mission, through any method, increments mission["version"],
+        so anything derived from a mission can be cached against that number.
+        """
+        raise NotImplementedError
+
+    def mission_transaction(self, mission_key):
+        """Context manager for an atomic read-modify-write of one mission.
+
+        Yields the mission dict (or None if it doesn't exist) while holding a
+        lock that excludes other writers, including other processes. Changes made
+        to the dict are saved when the block exits normally and discarded if it
+        raises.
+        """
+        raise NotImplementedError
+
+    def list_missions(self, campaign_id=None, status=None):
+        """Return mission summaries sorted by time_real, optionally filtered"""
+        raise NotImplementedError
+
+    def list_mission_keys(self, prefix=""):
+        """Return the keys of all stored missions starting with prefix"""
+        raise NotImplementedError
+
+    # --- Campaigns ---
+
+    def load_campaign(self, campaign_key):
+        """Return the full campaign document, or None if it does not exist"""
+        raise NotImplementedError
+
+    def save_campaign(self, campaign_key, campaign_data):
+        """Store the full campaign document"""
+        raise NotImplementedError
+
+    def list_campaigns(self):
+        """Return campaign summaries"""
+        raise NotImplementedError
+
+    # --- Change tags ---
+
+    def mission_tag(self, mission_key):
+        """Return (tag, mtime) for a mission without loading it, or None if it does not exist.
+
+        tag changes on every write of the mission; mtime is the time of the last
+        write in seconds, or None if the backend doesn't know it.
+        """
+        return None
+
+    def collection_tag(self, name):
+        """Return (tag, mtime) that changes whenever any mission ("missions") or
+        campaign ("campaigns") is written, or None if the backend can't tell cheaply.
+        """
+        return None
+
+    # --- Change journal ---
+
+    def mission_changes(self, mission_key, since):
+        """Return the journal entries of a mission with seq (= version) greater than since.
+
+        Returns None if the journal doesn't reach back to since (compacted, or
+        the mission predates the journal); the caller then has to load the mission.
+        """
+        return None
+
+    # --- Flights ---
+
+    def list_flights(self, mission_key):
+        """Return the flight dicts of a mission, in creation order"""
+        mission = self.load_mission(mission_key)
+        if not mission:
+            return []
+        return list(mission.get("flights", {}).values())
+
+    def load_flight(self, mission_key, flight_id):
+        """Return a single flight dict, or None"""
+        mission = self.load_mission(mission_key)
+        if not mission:
+            return None
+        return mission.get("flights", {}).get(flight_id)
+
+    def find_flight_mission(self, flight_id):
+        """Return the key of the mission holding flight_id, or None.
+
+        This default scans every mission; backends keep an index so it doesn't have to.
+        """
+        for mission_key in self.list_mission_keys():
+            if self.load_flight(mission_key, flight_id):
+                return mission_key
+        return None
+
+    def save_flight(self, mission_key, flight_data):
+        """Add or replace one flight of a mission. Returns False if the mission does not exist."""
+        with self.mission_transaction(mission_key) as mission:
+            if not mission:
+                return False
+            mission.setdefault("flights", {})[flight_data["flight_id"]] = flight_data
+        return True
+
+    def delete_flight(self, mission_key, flight_id):
+        """Remove one flight from a mission. Returns True if it existed."""
+        with self.mission_transaction(mission_key) as mission:
+            if not mission or flight_id not in mission.get("flights", {}):
+                return False
+            del mission["flights"][flight_id]
+        return True
+
+    # --- Signups ---
+
+    def list_signups(self, mission_key):
+        """Return the signup dicts of a mission"""
+        mission = self.load_mission(mission_key)
+        if not mission:
+            return []
+        return list(mission.get("signups", []))
+
+    def save_signup(self, mission_key, signup):
+        """Add or replace the signup of signup['user_id']. Returns False if the mission does not exist."""
+        with self.mission_transaction(mission_key) as mission:
+            if not mission:
+                return False
+            signups = mission.setdefault("signups", [])
+            for i, existing in enumerate(signups):
+                if existing.get("user_id") == signup.get("user_id"):
+                    signups[i] = signup
+                    break
+            else:
+                signups.append(signup)
+        return True
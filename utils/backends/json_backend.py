@@ -0,0 +1,369 @@
+"""
+JSON file backend: one file per mission/campaign under the instance folder.
+
+instance/missions/PP15EX01.json   (or .msgpack, see utils/serialization.py)
+instance/campaigns/PP15.json
+instance/mission_index/PP15EX01.json   <- index entry used for listings and flight lookups
+instance/journal/PP15EX01.jsonl   <- change journal, one JSON line per mission write
+instance/locks/               <- per-mission lock files for read-modify-write
+
+Files are always replaced atomically, so readers never need a lock.
+"""
+import os
+import time
+import threading
+from pathlib import Path
+import logging
+from contextlib import contextmanager
+import msgspec
+from utils.fileio import file_lock, atomic_write_bytes
+from utils.serialization import get_codec, read_document, EXTENSIONS, DEFAULT_FORMAT
+from utils.backends.base import (StorageBackend, normalize_mission, mission_summary,
+                                 campaign_summary, matches_filters, next_version)
+from utils import journal
+
+logger = logging.getLogger(__name__)
+
+# The index lives next to (not inside) instance/missions so it never shows up as a mission.
+# There is one small entry file per mission, holding the summary fields used by the
+# mission lists, the mission's flight IDs, and the mission file's mtime/size. A write
+# only replaces its own entry, a listing only re-parses files that changed on disk,
+# and a flight can be found without opening every mission.
+MISSION_INDEX_DIRNAME = "mission_index"
+MISSION_INDEX_VERSION = 3
+# Written by earlier versions: one file for the whole index
+LEGACY_INDEX_FILENAME = "mission_index.json"
+# A flight ID that isn't in the index makes it re-check the missions folder, but no
+# more often than this (seconds) unless the folder changed, so unknown IDs stay cheap
+INDEX_RECHECK_INTERVAL = 2
+
+class JSONBackend(StorageBackend):
+    name = "json"
+
+    def __init__(self, instance_path, file_format=DEFAULT_FORMAT):
+        self.instance_path = Path(instance_path)
+        # Format new writes use; files in any format are still read
+        self.codec = get_codec(file_format)
+        self.missions_dir = self.instance_path / "missions"
+        self.campaigns_dir = self.instance_path / "campaigns"
+        self.index_dir = self.instance_path / MISSION_INDEX_DIRNAME
+        self.locks_dir = self.instance_path / "locks"
+        self.journal_dir = self.instance_path / "journal"
+        self.missions_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.campaigns_dir.mkdir(parents=True, exist_ok=True)
+        self.locks_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            os.unlink(self.instance_path / LEGACY_INDEX_FILENAME)
+        except FileNotFoundError:
+            pass
+        # In-process copy of the index: mission key -> entry, and flight_id -> mission key
+        self._entries = {}
+        self._flight_map = {}
+        self._index_lock = threading.Lock()
+        # missions folder mtime and monotonic time of the last check against the folder
+        self._checked_dir_mtime = None
+        self._checked_at = None
+
+    def mission_path(self, mission_key):
+        """Where the mission is written in the configured format"""
+        return self.missions_dir / f"{mission_key}{self.codec.extension}"
+
+    def campaign_path(self, campaign_key):
+        return self.campaigns_dir / f"{campaign_key}{self.codec.extension}"
+
+    def _existing_path(self, directory, key):
+        """The file holding a document, preferring the configured format. None if there is none."""
+        preferred = directory / f"{key}{self.codec.extension}"
+        if preferred.exists():
+            return preferred
+        for extension in EXTENSIONS:
+            path = directory / f"{key}{extension}"
+            if path.exists():
+                return path
+        return None
+
+    def _write_document(self, directory, key, data):
+        """Write a document in the configured format and drop any copy in another format"""
+        path = directory / f"{key}{self.codec.extension}"
+        atomic_write_bytes(path, self.codec.encode(data))
+        for extension in EXTENSIONS:
+            if extension != self.codec.extension:
+                try:
+                    os.unlink(directory / f"{key}{extension}")
+                except FileNotFoundError:
+                    pass
+        return path
+
+    def _document_files(self, directory, prefix=""):
+        """{key: path} of every document in a directory, one path per key"""
+        files = {}
+        for extension in EXTENSIONS:
+            for path in directory.glob(f"{prefix}*{extension}"):
+                if path.stem not in files or extension == self.codec.extension:
+                    files[path.stem] = path
+        return files
+
+    def mission_lock(self, mission_key):
+        """Cross-process lock serializing writers of one mission"""
+        return file_lock(self.locks_dir / f"mission-{mission_key}.lock")
+
+    # --- Missions ---
+
+    def load_mission(self, mission_key):
+        file_path = self._existing_path(self.missions_dir, mission_key)
+        if file_path is None:
+            return None
+        return normalize_mission(read_document(file_path), mission_key)
+
+    def save_mission(self, mission_key, mission_data):
+        with self.mission_lock(mission_key):
+            # Continue from the stored version, not whatever the caller loaded earlier
+            current = self.load_mission(mission_key)
+            self._write_mission(mission_key, mission_data, current)
+
+    def _write_mission(self, mission_key, mission_data, before):
+        # Caller must hold the mission lock
+        mission_data["version"] = next_version(before.get("version") if before else None)
+        self._write_document(self.missions_dir, mission_key, mission_data)
+        self._append_journal(mission_key, mission_data["version"], journal.diff_mission(before, mission_data))
+        # Keep the mission index in step with the file we just wrote
+        self.update_mission_index(mission_key, mission_data)
+
+    @contextmanager
+    def mission_transaction(self, mission_key):
+        with self.mission_lock(mission_key):
+            mission = self.load_mission(mission_key)
+            before = msgspec.json.encode(mission) if mission is not None else None
+            yield mission
+            # Skip the write entirely if the block didn't change anything
+            if mission is not None and msgspec.json.encode(mission) != before:
+                self._write_mission(mission_key, mission, msgspec.json.decode(before))
+
+    def list_missions(self, campaign_id=None, status=None):
+        entries = self.refresh_mission_index()
+        missions = [dict(entry["summary"]) for entry in entries.values()
+                    if matches_filters(entry["summary"], campaign_id, status)]
+        missions.sort(key=lambda m: m.get('time_real') or '')
+        return missions
+
+    def list_mission_keys(self, prefix=""):
+        return list(self._document_files(self.missions_dir, prefix))
+
+    # --- Campaigns ---
+
+    def load_campaign(self, campaign_key):
+        file_path = self._existing_path(self.campaigns_dir, campaign_key)
+        if file_path is None:
+            return None
+        return read_document(file_path)
+
+    def campaign_files(self):
+        """{campaign key: file path} of every stored campaign"""
+        return self._document_files(self.campaigns_dir)
+
+    def save_campaign(self, campaign_key, campaign_data):
+        self._write_document(self.campaigns_dir, campaign_key, campaign_data)
+
+    def list_campaigns(self):
+        campaigns = []
+        for campaign_key, campaign_file in self.campaign_files().items():
+            try:
+                campaign_data = read_document(campaign_file)
+            except msgspec.DecodeError:
+                continue
+            campaigns.append(campaign_summary(campaign_data, campaign_key))
+        return campaigns
+
+    # --- Change tags ---
+
+    def mission_tag(self, mission_key):
+        file_path = self._existing_path(self.missions_dir, mission_key)
+        if file_path is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return f"{file_path.suffix}-{stat.st_mtime_ns}-{stat.st_size}", stat.st_mtime
+
+    def collection_tag(self, name):
+        # Every write replaces a file via rename, which updates the directory's mtime
+        directory = {"missions": self.missions_dir, "campaigns": self.campaigns_dir}[name]
+        stat = os.stat(directory)
+        return f"{stat.st_mtime_ns}-{stat.st_nlink}", stat.st_mtime
+
+    # --- Change journal ---
+
+    def journal_path(self, mission_key):
+        return self.journal_dir / f"{mission_key}.jsonl"
+
+    def _read_journal(self, mission_key):
+        try:
+            with open(self.journal_path(mission_key), 'rb') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(msgspec.json.decode(line))
+            except msgspec.DecodeError:
+                # A last line still being appended (or torn by a crash); everything before it is intact
+                logger.debug(f"Skipping incomplete journal line of mission {mission_key}")
+        return entries
+
+    def _append_journal(self, mission_key, seq, changes):
+        # Caller must hold the mission lock, so appends never interleave
+        with open(self.journal_path(mission_key), 'ab') as f:
+            f.write(msgspec.json.encode(journal.make_entry(seq, changes)) + b"\n")
+        if journal.compaction_due(seq):
+            entries = self._read_journal(mission_key)[-journal.JOURNAL_KEEP:]
+            atomic_write_bytes(self.journal_path(mission_key),
+                               b"".join(msgspec.json.encode(entry) + b"\n" for entry in entries))
+            logger.debug(f"Compacted journal of mission {mission_key} to {len(entries)} entries")
+
+    def mission_changes(self, mission_key, since):
+        # Readers don't lock: appends are whole lines and compaction replaces the file atomically
+        return journal.entries_since(self._read_journal(mission_key), since)
+
+    # --- Mission index ---
+
+    def index_entry_path(self, mission_key):
+        return self.index_dir / f"{mission_key}.json"
+
+    def _index_entry(self, mission, stat):
+        return {
+            "version": MISSION_INDEX_VERSION,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "time_real": mission.get("time_real") or "",
+            "summary": mission_summary(mission),
+            "flights": list(mission.get("flights", {}))
+        }
+
+    def _read_index_entry(self, mission_key):
+        """The stored index entry of a mission, or None if it's missing, unreadable or outdated"""
+        try:
+            with open(self.index_entry_path(mission_key), 'rb') as f:
+                entry = msgspec.json.decode(f.read())
+        except (FileNotFoundError, msgspec.DecodeError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != MISSION_INDEX_VERSION:
+            return None
+        return entry
+
+    def _set_entry(self, mission_key, entry):
+        """Put an entry into the in-process index. Caller holds _index_lock."""
+        old = self._entries.get(mission_key)
+        if old:
+            for flight_id in old["flights"]:
+                if self._flight_map.get(flight_id) == mission_key:
+                    del self._flight_map[flight_id]
+        self._entries[mission_key] = entry
+        for flight_id in entry["flights"]:
+            self._flight_map[flight_id] = mission_key
+
+    def _drop_entry(self, mission_key):
+        """Remove a mission from the in-process index. Caller holds _index_lock."""
+        old = self._entries.pop(mission_key, None)
+        if old:
+            for flight_id in old["flights"]:
+                if self._flight_map.get(flight_id) == mission_key:
+                    del self._flight_map[flight_id]
+
+    def refresh_mission_index(self):
+        """Bring the index up to date with instance/missions and return {mission key: entry}.
+
+        Mission files are only parsed when their mtime or size differs from both
+        the in-process entry and the stored entry file; entries of deleted
+        missions are dropped.
+        """
+        with self._index_lock:
+            self._refresh_mission_index()
+            return dict(self._entries)
+
+    def _refresh_mission_index(self):
+        # Caller holds _index_lock. The folder mtime is read first, so a write during the scan is seen next time.
+        dir_mtime = os.stat(self.missions_dir).st_mtime_ns
+        files = {}
+        for entry in os.scandir(self.missions_dir):
+            mission_key, extension = os.path.splitext(entry.name)
+            if extension not in EXTENSIONS or entry.name.startswith('.') or not entry.is_file():
+                continue
+            # If a mission exists in two formats, the configured one wins
+            if mission_key not in files or extension == self.codec.extension:
+                files[mission_key] = entry
+        parsed = 0
+        for mission_key, entry in files.items():
+            stat = entry.stat()
+            if self._entry_matches(self._entries.get(mission_key), stat):
+                continue
+            index_entry = self._read_index_entry(mission_key)
+            if not self._entry_matches(index_entry, stat):
+                try:
+                    mission = read_document(Path(entry.path))
+                except (msgspec.DecodeError, OSError) as e:
+                    logger.error(f"Skipping unreadable mission file {entry.name}: {e}")
+                    self._drop_entry(mission_key)
+                    continue
+                index_entry = self._index_entry(normalize_mission(mission, mission_key), stat)
+                atomic_write_bytes(self.index_entry_path(mission_key), msgspec.json.encode(index_entry))
+                parsed += 1
+            self._set_entry(mission_key, index_entry)
+        for mission_key in list(self._entries):
+            if mission_key not in files:
+                self._drop_entry(mission_key)
+        for entry in os.scandir(self.index_dir):
+            mission_key, extension = os.path.splitext(entry.name)
+            # Entry files of missions that are gone (checked again, the mission may have just been created)
+            if extension == ".json" and mission_key not in files and \
+                    self._existing_path(self.missions_dir, mission_key) is None:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+        if parsed:
+            logger.debug(f"Mission index refreshed, re-read {parsed} of {len(files)} missions")
+        self._checked_dir_mtime = dir_mtime
+        self._checked_at = time.monotonic()
+
+    @staticmethod
+    def _entry_matches(entry, stat):
+        return entry is not None and entry.get("mtime") == stat.st_mtime_ns and entry.get("size") == stat.st_size
+
+    def rebuild_mission_index(self):
+        """Throw the index away and rebuild it from every mission file. Returns {mission key: entry}."""
+        with self._index_lock:
+            for entry in os.scandir(self.index_dir):
+                if entry.name.endswith(".json"):
+                    os.unlink(entry.path)
+            self._entries = {}
+            self._flight_map = {}
+            self._refresh_mission_index()
+            return dict(self._entries)
+
+    def _recheck_due(self):
+        """Whether a flight lookup miss should re-check the missions folder"""
+        if self._checked_at is None or time.monotonic() - self._checked_at >= INDEX_RECHECK_INTERVAL:
+            return True
+        # Every write replaces a file via rename, which updates the folder's mtime
+        return os.stat(self.missions_dir).st_mtime_ns != self._checked_dir_mtime
+
+    def find_flight_mission(self, flight_id):
+        with self._index_lock:
+            mission_key = self._flight_map.get(flight_id)
+            if mission_key is None and self._recheck_due():
+                # A mission written by another process, or changed outside the app
+                self._refresh_mission_index()
+                mission_key = self._flight_map.get(flight_id)
+        return mission_key
+
+    def update_mission_index(self, mission_key, mission_data):
+        """Replace a mission's index entry after its file has been written (caller holds the mission lock)"""
+        mission = normalize_mission(dict(mission_data), mission_key)
+        entry = self._index_entry(mission, os.stat(self.mission_path(mission_key)))
+        atomic_write_bytes(self.index_entry_path(mission_key), msgspec.json.encode(entry))
+        with self._index_lock:
+            self._set_entry(mission_key, entry)
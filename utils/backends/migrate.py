@@ -0,0 +1,39 @@
+"""
+One-shot import of the JSON file layout (instance/missions/*.json, instance/campaigns/*.json)
+into another storage backend, e.g. when switching STORAGE_BACKEND to "sqlite".
+
+Run it with:  flask --app app migrate-storage --to sqlite
+"""
+import logging
+import msgspec
+from utils.backends.json_backend import JSONBackend
+
+logger = logging.getLogger(__name__)
+
+def import_json_storage(instance_path, target):
+    """Copy every JSON mission and campaign into target. Returns (missions, campaigns) counts.
+
+    Existing records in the target with the same key are overwritten, so the
+    import can safely be re-run.
+    """
+    source = JSONBackend(instance_path)
+    campaign_count = 0
+    for campaign_key, campaign_file in sorted(source.campaign_files().items()):
+        try:
+            campaign = source.load_campaign(campaign_key)
+        except msgspec.DecodeError as e:
+            logger.error(f"Skipping unreadable campaign file {campaign_file.name}: {e}")
+            continue
+        target.save_campaign(campaign_key, campaign)
+        campaign_count += 1
+    mission_count = 0
+    for mission_key in sorted(source.list_mission_keys()):
+        try:
+            mission = source.load_mission(mission_key)
+        except msgspec.DecodeError as e:
+            logger.error(f"Skipping unreadable mission file {mission_key}: {e}")
+            continue
+        target.save_mission(mission_key, mission)
+        mission_count += 1
+    logger.info(f"Imported {mission_count} missions and {campaign_count} campaigns into {target.name} storage")
+    return mission_count, campaign_count
@@ -0,0 +1,352 @@
+"""
+SQLite backend: missions, flights, signups and campaigns in one WAL-mode database file.
+
+Flights and signups are stored as their own rows, so adding a pilot to a flight
+rewrites one flight row instead of the whole mission document, and mission
+listings/filters are answered from indexed columns.
+"""
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+import logging
+from utils.backends.base import (StorageBackend, normalize_mission, mission_summary,
+                                 campaign_summary, next_version)
+from utils import journal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_FILENAME = "ajac.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS missions (
+    id TEXT PRIMARY KEY,
+    campaign_id TEXT,
+    status TEXT,
+    time_real TEXT NOT NULL DEFAULT '',
+    summary TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_missions_time_real ON missions(time_real);
+CREATE INDEX IF NOT EXISTS idx_missions_campaign ON missions(campaign_id, time_real);
+CREATE INDEX IF NOT EXISTS idx_missions_status ON missions(status, time_real);
+
+CREATE TABLE IF NOT EXISTS flights (
+    flight_id TEXT PRIMARY KEY,
+    mission_id TEXT NOT NULL REFERENCES missions(id) ON DELETE CASCADE,
+    squadron TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_flights_mission ON flights(mission_id);
+
+CREATE TABLE IF NOT EXISTS signups (
+    mission_id TEXT NOT NULL REFERENCES missions(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    PRIMARY KEY (mission_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+
+-- Change journal: one entry per mission write, seq = the version the write produced
+CREATE TABLE IF NOT EXISTS journal (
+    mission_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (mission_id, seq)
+);
+
+-- One counter per collection ("missions", "campaigns"), bumped by every write
+CREATE TABLE IF NOT EXISTS changes (
+    name TEXT PRIMARY KEY,
+    counter INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+"""
+
+def _dumps(data):
+    return json.dumps(data, separators=(',', ':'))
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, instance_path, db_path=None):
+        self.db_path = Path(db_path) if db_path else Path(instance_path) / DEFAULT_DATABASE_FILENAME
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        self._local = threading.local()
+        # executescript manages its own transaction
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: we issue BEGIN/COMMIT ourselves
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """Run statements in one write transaction (BEGIN IMMEDIATE takes the write lock up front)"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- Missions ---
+
+    def load_mission(self, mission_key):
+        return self._load_mission(self._connect(), mission_key)
+
+    def _load_mission(self, conn, mission_key):
+        row = conn.execute("SELECT doc FROM missions WHERE id = ?", (mission_key,)).fetchone()
+        if row is None:
+            return None
+        mission = json.loads(row[0])
+        flights = conn.execute(
+            "SELECT flight_id, doc FROM flights WHERE mission_id = ? ORDER BY rowid", (mission_key,)
+        ).fetchall()
+        if flights:
+            mission["flights"] = {flight_id: json.loads(doc) for flight_id, doc in flights}
+        signups = conn.execute(
+            "SELECT doc FROM signups WHERE mission_id = ? ORDER BY rowid", (mission_key,)
+        ).fetchall()
+        if signups:
+            mission["signups"] = [json.loads(doc) for (doc,) in signups]
+        return normalize_mission(mission, mission_key)
+
+    def _upsert_mission_row(self, conn, mission_key, mission_data):
+        doc = {k: v for k, v in mission_data.items() if k not in ("flights", "signups")}
+        summary = mission_summary(normalize_mission(dict(doc), mission_key))
+        conn.execute(
+            """INSERT INTO missions (id, campaign_id, status, time_real, summary, doc)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(id) DO UPDATE SET campaign_id = excluded.campaign_id,
+                   status = excluded.status, time_real = excluded.time_real,
+                   summary = excluded.summary, doc = excluded.doc""",
+            (mission_key, doc.get("campaign_id"), doc.get("status"),
+             doc.get("time_real") or "", _dumps(summary), _dumps(doc))
+        )
+
+    def _upsert_flight_row(self, conn, mission_key, flight_id, flight_data):
+        conn.execute(
+            """INSERT INTO flights (flight_id, mission_id, squadron, doc) VALUES (?, ?, ?, ?)
+               ON CONFLICT(flight_id) DO UPDATE SET mission_id = excluded.mission_id,
+                   squadron = excluded.squadron, doc = excluded.doc""",
+            (flight_id, mission_key, flight_data.get("squadron"), _dumps(flight_data))
+        )
+
+    def _upsert_signup_row(self, conn, mission_key, signup):
+        conn.execute(
+            """INSERT INTO signups (mission_id, user_id, doc) VALUES (?, ?, ?)
+               ON CONFLICT(mission_id, user_id) DO UPDATE SET doc = excluded.doc""",
+            (mission_key, str(signup.get("user_id", "")), _dumps(signup))
+        )
+
+    def save_mission(self, mission_key, mission_data):
+        with self._write() as conn:
+            self._save_mission(conn, mission_key, mission_data, self._load_mission(conn, mission_key))
+
+    def _save_mission(self, conn, mission_key, mission_data, before):
+        # Only touch the rows that actually changed
+        flights = mission_data.get("flights", {})
+        signups = mission_data.get("signups", [])
+        changed = False
+        existing = dict(conn.execute(
+            "SELECT flight_id, doc FROM flights WHERE mission_id = ?", (mission_key,)))
+        for flight_id, flight_data in flights.items():
+            if existing.get(flight_id) != _dumps(flight_data):
+                self._upsert_flight_row(conn, mission_key, flight_id, flight_data)
+                changed = True
+        for flight_id in existing.keys() - flights.keys():
+            conn.execute("DELETE FROM flights WHERE flight_id = ?", (flight_id,))
+            changed = True
+        existing = dict(conn.execute(
+            "SELECT user_id, doc FROM signups WHERE mission_id = ?", (mission_key,)))
+        wanted = set()
+        for signup in signups:
+            user_id = str(signup.get("user_id", ""))
+            wanted.add(user_id)
+            if existing.get(user_id) != _dumps(signup):
+                self._upsert_signup_row(conn, mission_key, signup)
+                changed = True
+        for user_id in existing.keys() - wanted:
+            conn.execute("DELETE FROM signups WHERE mission_id = ? AND user_id = ?",
+                         (mission_key, user_id))
+            changed = True
+        row = conn.execute("SELECT doc FROM missions WHERE id = ?", (mission_key,)).fetchone()
+        doc = {k: v for k, v in mission_data.items() if k not in ("flights", "signups")}
+        if row is None or changed or row[0] != _dumps(doc):
+            stored_version = json.loads(row[0]).get("version") if row else None
+            mission_data["version"] = next_version(stored_version)
+            self._upsert_mission_row(conn, mission_key, mission_data)
+            self._touch(conn, "missions")
+            self._append_journal(conn, mission_key, mission_data["version"],
+                                 journal.diff_mission(before, mission_data))
+
+    def _bump_version(self, conn, mission_key, changes):
+        """Increment the version of a mission whose rows were changed directly, and journal the changes"""
+        conn.execute(
+            """UPDATE missions SET
+                   doc = json_set(doc, '$.version', coalesce(json_extract(doc, '$.version'), 0) + 1),
+                   summary = json_set(summary, '$.version', coalesce(json_extract(doc, '$.version'), 0) + 1)
+               WHERE id = ?""", (mission_key,))
+        self._touch(conn, "missions")
+        version = conn.execute("SELECT json_extract(doc, '$.version') FROM missions WHERE id = ?",
+                               (mission_key,)).fetchone()[0]
+        self._append_journal(conn, mission_key, version, changes)
+
+    def _append_journal(self, conn, mission_key, seq, changes):
+        conn.execute("INSERT OR REPLACE INTO journal (mission_id, seq, entry) VALUES (?, ?, ?)",
+                     (mission_key, seq, _dumps(journal.make_entry(seq, changes))))
+        if journal.compaction_due(seq):
+            conn.execute("DELETE FROM journal WHERE mission_id = ? AND seq <= ?",
+                         (mission_key, seq - journal.JOURNAL_KEEP))
+
+    def _touch(self, conn, name):
+        """Record a write to a collection (see collection_tag)"""
+        conn.execute(
+            """INSERT INTO changes (name, counter, modified) VALUES (?, 1, ?)
+               ON CONFLICT(name) DO UPDATE SET counter = counter + 1, modified = excluded.modified""",
+            (name, time.time()))
+
+    @contextmanager
+    def mission_transaction(self, mission_key):
+        # BEGIN IMMEDIATE holds the database write lock until commit, across processes
+        with self._write() as conn:
+            mission = self._load_mission(conn, mission_key)
+            # Copy to diff against for the journal
+            before = json.loads(_dumps(mission)) if mission is not None else None
+            yield mission
+            if mission is not None:
+                self._save_mission(conn, mission_key, mission, before)
+
+    def list_missions(self, campaign_id=None, status=None):
+        query = "SELECT summary FROM missions"
+        clauses, params = [], []
+        if campaign_id is not None:
+            clauses.append("campaign_id = ?")
+            params.append(campaign_id)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY time_real"
+        return [json.loads(summary) for (summary,) in self._connect().execute(query, params)]
+
+    def list_mission_keys(self, prefix=""):
+        rows = self._connect().execute(
+            "SELECT id FROM missions WHERE substr(id, 1, ?) = ?", (len(prefix), prefix))
+        return [mission_key for (mission_key,) in rows]
+
+    # --- Campaigns ---
+
+    def load_campaign(self, campaign_key):
+        row = self._connect().execute("SELECT doc FROM campaigns WHERE id = ?", (campaign_key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_campaign(self, campaign_key, campaign_data):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO campaigns (id, doc) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET doc = excluded.doc",
+                (campaign_key, _dumps(campaign_data))
+            )
+            self._touch(conn, "campaigns")
+
+    def list_campaigns(self):
+        rows = self._connect().execute("SELECT id, doc FROM campaigns ORDER BY rowid")
+        return [campaign_summary(json.loads(doc), campaign_key) for campaign_key, doc in rows]
+
+    # --- Change tags ---
+
+    def mission_tag(self, mission_key):
+        row = self._connect().execute(
+            "SELECT coalesce(json_extract(doc, '$.version'), 0) FROM missions WHERE id = ?",
+            (mission_key,)).fetchone()
+        return (f"v{row[0]}", None) if row else None
+
+    def collection_tag(self, name):
+        row = self._connect().execute(
+            "SELECT counter, modified FROM changes WHERE name = ?", (name,)).fetchone()
+        return (str(row[0]), row[1]) if row else ("0", None)
+
+    # --- Change journal ---
+
+    def mission_changes(self, mission_key, since):
+        rows = self._connect().execute(
+            "SELECT entry FROM journal WHERE mission_id = ? AND seq >= ? ORDER BY seq",
+            (mission_key, since)).fetchall()
+        entries = [json.loads(entry) for (entry,) in rows]
+        if entries and entries[0]["seq"] == since:
+            # The entry at since itself only proves the journal reaches back that far
+            return entries[1:]
+        return journal.entries_since(entries, since)
+
+    # --- Flights (row-level) ---
+
+    def list_flights(self, mission_key):
+        rows = self._connect().execute(
+            "SELECT doc FROM flights WHERE mission_id = ? ORDER BY rowid", (mission_key,))
+        return [json.loads(doc) for (doc,) in rows]
+
+    def load_flight(self, mission_key, flight_id):
+        row = self._connect().execute(
+            "SELECT doc FROM flights WHERE flight_id = ? AND mission_id = ?", (flight_id, mission_key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_flight_mission(self, flight_id):
+        row = self._connect().execute(
+            "SELECT mission_id FROM flights WHERE flight_id = ?", (flight_id,)).fetchone()
+        return row[0] if row else None
+
+    def save_flight(self, mission_key, flight_data):
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM missions WHERE id = ?", (mission_key,)).fetchone() is None:
+                return False
+            flight_id = flight_data["flight_id"]
+            row = conn.execute("SELECT doc FROM flights WHERE flight_id = ? AND mission_id = ?",
+                               (flight_id, mission_key)).fetchone()
+            before = {flight_id: json.loads(row[0])} if row else {}
+            self._upsert_flight_row(conn, mission_key, flight_id, flight_data)
+            self._bump_version(conn, mission_key, journal.diff_flights(before, {flight_id: flight_data}))
+        return True
+
+    def delete_flight(self, mission_key, flight_id):
+        with self._write() as conn:
+            row = conn.execute("SELECT doc FROM flights WHERE flight_id = ? AND mission_id = ?",
+                               (flight_id, mission_key)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM flights WHERE flight_id = ? AND mission_id = ?", (flight_id, mission_key))
+            self._bump_version(conn, mission_key, journal.diff_flights({flight_id: json.loads(row[0])}, {}))
+        return True
+
+    # --- Signups (row-level) ---
+
+    def list_signups(self, mission_key):
+        rows = self._connect().execute(
+            "SELECT doc FROM signups WHERE mission_id = ? ORDER BY rowid", (mission_key,))
+        return [json.loads(doc) for (doc,) in rows]
+
+    def save_signup(self, mission_key, signup):
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM missions WHERE id = ?", (mission_key,)).fetchone() is None:
+                return False
+            self._upsert_signup_row(conn, mission_key, signup)
+            self._bump_version(conn, mission_key, [{"op": "signup_saved", "signup": signup}])
+        return True
@@ -0,0 +1,188 @@
+"""
+Shared HTTP client for the Discord bot API (disc_bot.py).
+
+One pooled requests.Session per app keeps connections to the bot alive
+instead of opening a new TCP connection for every call. Calls use separate
+connect/read timeouts, and a circuit breaker stops calling the bot for
+BOT_API_COOLDOWN seconds after BOT_API_FAILURE_THRESHOLD failures in a row,
+so a dead bot costs callers nothing instead of a timeout per request.
+
+Callers catch BotUnavailable and use their fallback.
+"""
+import time
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOT_API_URL = "http://localhost:8000"
+DEFAULT_CONNECT_TIMEOUT = 0.5
+DEFAULT_READ_TIMEOUT = 2
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 30
+DEFAULT_POOL_SIZE = 10
+
+class BotUnavailable(Exception):
+    """The bot could not be reached, answered with a server error, or the circuit is open"""
+
+class BotError(Exception):
+    """The bot answered, but with a client error (e.g. 404 member not found)"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+class BotClient:
+    def __init__(self, base_url, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN, pool_size=DEFAULT_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        # Only one request is let through to probe the bot once the cooldown is over
+        self._probing = False
+        self._stats = {"requests": 0, "errors": 0, "short_circuited": 0, "total_latency": 0.0}
+
+    def _before_request(self):
+        """Raise BotUnavailable while the circuit is open. Returns True if this call is the probe."""
+        with self._lock:
+            if self._failures >= self.failure_threshold:
+                if time.time() < self._open_until or self._probing:
+                    self._stats["short_circuited"] += 1
+                    raise BotUnavailable("Bot API circuit is open")
+                self._probing = True
+                return True
+        return False
+
+    def _end_probe(self):
+        with self._lock:
+            self._probing = False
+
+    def _record(self, ok, latency):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["total_latency"] += latency
+            if ok:
+                if self._failures >= self.failure_threshold:
+                    logger.info("Bot API is reachable again, closing circuit")
+                self._failures = 0
+                return
+            self._stats["errors"] += 1
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open_until = time.time() + self.cooldown
+                logger.warning(f"Bot API failed {self._failures} times in a row, "
+                               f"not calling it for {self.cooldown}s")
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """Call the bot and return the decoded JSON body.
+
+        Raises BotUnavailable on connection errors, timeouts, server errors or an
+        open circuit, and BotError on 4xx responses (which don't trip the circuit).
+        """
+        probe = self._before_request()
+        try:
+            return self._request(method, path, timeout, **kwargs)
+        finally:
+            # Whatever happened (including errors that aren't RequestExceptions), let the next probe through
+            if probe:
+                self._end_probe()
+
+    def _request(self, method, path, timeout, **kwargs):
+        start = time.perf_counter()
+        try:
+            resp = self.session.request(method, f"{self.base_url}{path}",
+                                        timeout=timeout or self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self._record(False, time.perf_counter() - start)
+            raise BotUnavailable(str(e)) from e
+        latency = time.perf_counter() - start
+        if resp.status_code >= 500:
+            self._record(False, latency)
+            raise BotUnavailable(f"Bot API returned {resp.status_code} for {path}")
+        self._record(True, latency)
+        if resp.status_code >= 400:
+            raise BotError(resp.status_code, f"Bot API returned {resp.status_code} for {path}")
+        return resp.json()
+
+    async def request_async(self, http, method, path, timeout=None, **kwargs):
+        """request() for code running on an event loop (asgi.py), through an aiohttp.ClientSession.
+
+        Shares the circuit breaker and stats with the blocking calls.
+        """
+        probe = self._before_request()
+        try:
+            return await self._request_async(http, method, path, timeout, **kwargs)
+        finally:
+            # Also when the task is cancelled mid-request
+            if probe:
+                self._end_probe()
+
+    async def _request_async(self, http, method, path, timeout, **kwargs):
+        import asyncio
+        import aiohttp
+        connect, read = timeout or self.timeout
+        start = time.perf_counter()
+        try:
+            async with http.request(method, f"{self.base_url}{path}",
+                                    timeout=aiohttp.ClientTimeout(connect=connect, sock_read=read), **kwargs) as resp:
+                status = resp.status
+                body = await resp.json(content_type=None) if status < 400 else None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self._record(False, time.perf_counter() - start)
+            raise BotUnavailable(str(e) or type(e).__name__) from e
+        latency = time.perf_counter() - start
+        if status >= 500:
+            self._record(False, latency)
+            raise BotUnavailable(f"Bot API returned {status} for {path}")
+        self._record(True, latency)
+        if status >= 400:
+            raise BotError(status, f"Bot API returned {status} for {path}")
+        return body
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def is_open(self):
+        """True while calls are being short-circuited"""
+        with self._lock:
+            return self._failures >= self.failure_threshold and time.time() < self._open_until
+
+    def stats(self):
+        """Request/error counters and the average latency in milliseconds"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["consecutive_failures"] = self._failures
+        stats["avg_latency_ms"] = (stats.pop("total_latency") / stats["requests"] * 1000) if stats["requests"] else 0.0
+        stats["circuit_open"] = self.is_open()
+        return stats
+
+def get_bot_client():
+    """The app's shared BotClient, created from config on first use"""
+    client = current_app.extensions.get("bot_client")
+    if client is None:
+        config = current_app.config
+        client = BotClient(
+            config.get("BOT_API_URL", DEFAULT_BOT_API_URL),
+            connect_timeout=config.get("BOT_API_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT),
+            read_timeout=config.get("BOT_API_READ_TIMEOUT", DEFAULT_READ_TIMEOUT),
+            failure_threshold=config.get("BOT_API_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD),
+            cooldown=config.get("BOT_API_COOLDOWN", DEFAULT_COOLDOWN),
+        )
+        current_app.extensions["bot_client"] = client
+    return client
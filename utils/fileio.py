@@ -0,0 +1,51 @@
+"""
+Crash- and concurrency-safe file helpers.
+
+Apache/mod_wsgi runs several worker processes, so anything that does
+read -> modify -> write on a shared file has to hold a lock that works across
+processes, and every write has to replace the file in one step so readers
+never see half a file.
+"""
+import os
+import json
+import fcntl
+import tempfile
+from contextlib import contextmanager
+
+@contextmanager
+def file_lock(lock_path):
+    """Hold an exclusive lock on lock_path (created if missing) for the duration of the block.
+
+    Uses flock(), which is released automatically if the process dies.
+    """
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+def atomic_write_bytes(path, data):
+    """Write data to path atomically: temp file in the same directory, fsync, then os.replace"""
+    path = os.fspath(path)
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".part")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # mkstemp creates files as 0600; keep them readable like a normal open() would
+            os.fchmod(f.fileno(), 0o644)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def atomic_write_json(path, data, indent=4):
+    """Serialize data as JSON and write it atomically"""
+    atomic_write_bytes(path, json.dumps(data, indent=indent).encode('utf-8'))
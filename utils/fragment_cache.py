@@ -0,0 +1,58 @@
+"""
+In-process cache for rendered page fragments.
+
+A fragment is cached under a key that changes whenever its inputs change:
+the mission's version (bumped by every mission write, see
+utils/backends/base.py), the reference data version and any viewer-specific
+bits the fragment depends on. Nothing ever has to be invalidated explicitly;
+a write just makes the next render use a new key, and old keys age out of the LRU.
+"""
+import threading
+import logging
+from cachetools import LRUCache
+from markupsafe import Markup
+from flask import current_app
+from utils.resources import get_resources_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZE = 256
+
+_cache = None
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = LRUCache(maxsize=current_app.config.get("FRAGMENT_CACHE_SIZE", DEFAULT_SIZE))
+    return _cache
+
+def mission_fragment(name, mission, render, variant=()):
+    """Return the cached fragment for this mission version, calling render() on a miss.
+
+    variant holds anything viewer-specific the fragment depends on (keep it
+    small, e.g. (is_admin,)); render must return the fragment HTML.
+    """
+    key = (name, mission["id"], mission.get("version", 0), get_resources_version(), tuple(variant))
+    with _cache_lock:
+        cache = _get_cache()
+        html = cache.get(key)
+        if html is not None:
+            _stats["hits"] += 1
+            return html
+        _stats["misses"] += 1
+    html = Markup(render())
+    with _cache_lock:
+        cache[key] = html
+    logger.debug(f"Rendered fragment {name} for mission {mission['id']} v{key[2]}")
+    return html
+
+def clear_fragments():
+    with _cache_lock:
+        if _cache is not None:
+            _cache.clear()
+
+def fragment_stats():
+    with _cache_lock:
+        return dict(_stats, size=len(_cache) if _cache is not None else 0)
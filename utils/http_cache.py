@@ -0,0 +1,111 @@
+"""
+Conditional GET (ETag / Last-Modified) for pages and JSON endpoints.
+
+A route builds a Validator from tags it can get without loading anything: a
+mission's change tag, the tag of the mission or campaign collection (see
+StorageBackend.mission_tag/collection_tag), the reference data stamp and, for
+pages that show who is logged in, the viewer. If the browser already has that
+ETag the route answers 304 before touching storage; otherwise it renders as
+usual and attaches the validator:
+
+    validator = make_validator("list_missions", collection_tag("missions"), viewer=True)
+    response = not_modified(validator)
+    if response:
+        return response
+    ...
+    return with_validator(render_template(...), validator)
+
+Pages are never answered with 304 while flash messages are waiting in the
+session, and a response that showed flash messages gets no validator, so a
+message is never replayed from the browser cache.
+"""
+import os
+import hashlib
+import logging
+from datetime import datetime, timezone
+from flask import current_app, request, session, make_response
+from flask.globals import request_ctx
+
+logger = logging.getLogger(__name__)
+
+class Validator:
+    def __init__(self, etag, last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def __repr__(self):
+        return f"<Validator {self.etag}>"
+
+def _templates_stamp():
+    """Newest template mtime, computed once per process, so a deploy that only changes templates gets new ETags"""
+    app = current_app._get_current_object()
+    stamp = app.extensions.get("templates_stamp")
+    if stamp is None:
+        stamp = 0
+        loaders = [app.jinja_loader] + [bp.jinja_loader for bp in app.iter_blueprints()]
+        for loader in loaders:
+            for folder in getattr(loader, "searchpath", []):
+                for dirpath, _, filenames in os.walk(folder):
+                    for filename in filenames:
+                        stamp = max(stamp, os.stat(os.path.join(dirpath, filename)).st_mtime_ns)
+        app.extensions["templates_stamp"] = stamp
+    return stamp
+
+def viewer_parts():
+    """What base.html shows about the logged-in user, read from the session"""
+    return tuple(session.get(k) for k in ("user_id", "username", "display_name", "is_admin", "is_mission_maker"))
+
+def make_validator(name, *tags, extra=(), viewer=False):
+    """Build a Validator for the endpoint called name.
+
+    tags are (tag, mtime) pairs as returned by the storage tag functions and
+    get_resources_stamp(); the newest mtime becomes Last-Modified. If any tag is
+    None (e.g. the mission doesn't exist) None is returned and the response is
+    left uncached. extra holds anything else the response depends on (request
+    arguments, user bits); pass viewer=True for pages that differ per logged-in user.
+    """
+    if any(tag is None for tag in tags):
+        return None
+    key = [name, _templates_stamp(), [tag for tag, _ in tags], list(extra)]
+    if viewer:
+        key.append(viewer_parts())
+    etag = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:24]
+    mtimes = [mtime for _, mtime in tags if mtime is not None]
+    last_modified = datetime.fromtimestamp(int(max(mtimes)), timezone.utc) if mtimes else None
+    return Validator(etag, last_modified)
+
+def _flashes_pending():
+    return bool(session.get("_flashes")) or bool(request_ctx.flashes)
+
+def _set_headers(response, validator):
+    response.set_etag(validator.etag)
+    if validator.last_modified is not None:
+        response.last_modified = validator.last_modified
+    # Logged-in content: the browser may keep it, but must check back every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def not_modified(validator):
+    """Return a 304 response if the client already has this version, else None"""
+    if validator is None or request.method not in ("GET", "HEAD") or _flashes_pending():
+        return None
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(validator.etag)
+    elif request.if_modified_since and validator.last_modified is not None:
+        fresh = request.if_modified_since >= validator.last_modified
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    logger.debug(f"304 for {request.path} ({validator.etag})")
+    return _set_headers(current_app.response_class(status=304), validator)
+
+def with_validator(rv, validator):
+    """Attach the validator to a successful response (rv is anything a view may return)"""
+    response = make_response(rv)
+    if validator is None or request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return response
+    if _flashes_pending():
+        return response
+    return _set_headers(response, validator)
@@ -0,0 +1,62 @@
+"""
+The logged-in Discord user, served from the session.
+
+The OAuth callbacks store user_id/username/avatar in the session, so routes
+don't need to call discord.fetch_user() (a Discord REST call) on every page
+load. The user is only re-fetched from Discord once every IDENTITY_REFRESH_TTL
+seconds (0 disables refreshing), or if the session is missing the username.
+"""
+import time
+import logging
+from flask import current_app, session, g
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_TTL = 3600
+
+class CurrentUser:
+    """Session-backed stand-in for flask_discord's User (id, username, avatar_url)"""
+
+    def __init__(self, id, username, avatar_url=None):
+        self.id = id
+        self.username = username
+        self.avatar_url = avatar_url
+
+    def __repr__(self):
+        return f"<CurrentUser {self.username} ({self.id})>"
+
+def remember_user(user):
+    """Store a freshly fetched Discord user in the session"""
+    session['user_id'] = user.id
+    session['username'] = user.username
+    session['avatar'] = user.avatar_url
+    session['is_authenticated'] = True
+    session['identity_checked_at'] = time.time()
+    session.modified = True
+    g.current_user = CurrentUser(user.id, user.username, user.avatar_url)
+
+def _refresh_due():
+    ttl = current_app.config.get("IDENTITY_REFRESH_TTL", DEFAULT_REFRESH_TTL)
+    if not session.get('username'):
+        return True
+    if not ttl:
+        return False
+    return time.time() - session.get('identity_checked_at', 0) >= ttl
+
+def get_current_user():
+    """Return the logged-in user, only calling Discord when the session data is due a refresh"""
+    if 'current_user' in g:
+        return g.current_user
+    if _refresh_due():
+        try:
+            remember_user(current_app.discord.fetch_user())
+            logger.debug(f"Refreshed identity of {session['username']} from Discord")
+            return g.current_user
+        except Exception as e:
+            if not session.get('user_id'):
+                raise
+            # Keep using the session data; try Discord again after another TTL
+            logger.warning(f"Could not refresh user from Discord, using session data: {e}")
+            session['identity_checked_at'] = time.time()
+    g.current_user = CurrentUser(session['user_id'], session.get('username'), session.get('avatar'))
+    return g.current_user
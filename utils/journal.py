@@ -0,0 +1,132 @@
+"""
+Per-mission change journal.
+
+Every write of a mission appends one entry, computed by diffing the mission
+before and after the write (inside the same lock/transaction, see the
+storage backends). The entry's seq is the version the write gave the
+mission, so "changes since version N" is a journal read:
+
+    {"seq": 8, "time": "2025-06-01T18:02:11Z", "actor": "123456789",
+     "changes": [{"op": "pilot_joined", "flight_id": "...", "pilot": {...}, "flight": {...}}]}
+
+Operations:
+- mission_created, mission_updated {"fields": {name: new value}}
+- flight_created / flight_updated {"flight_id", "flight"}
+- pilot_joined / pilot_left {"flight_id", "pilot", "flight"}: flight is the flight after the change
+- flight_deleted {"flight_id", "flight"}: flight is the deleted flight
+- signup_saved {"signup"}, signup_removed {"user_id"}
+
+The mission document is always written in full, so the journal is only
+history: it is compacted by dropping old entries (keeping the last
+JOURNAL_KEEP) every COMPACT_EVERY versions. Reads that reach further back
+than what is kept return None, and the caller falls back to loading the
+mission.
+"""
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from flask import has_request_context, session
+from utils.backends.base import MISSION_PAYLOAD_KEYS
+
+JOURNAL_KEEP = 500
+COMPACT_EVERY = 100
+
+# Who is making changes when there's no logged-in user (bot, CLI, imports)
+_actor = contextvars.ContextVar("journal_actor", default=None)
+
+@contextmanager
+def journal_actor(actor):
+    """Record changes made inside the block as made by actor"""
+    token = _actor.set(str(actor))
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+def current_actor():
+    """The explicit actor, else the logged-in user's ID, else "system" """
+    actor = _actor.get()
+    if actor is not None:
+        return actor
+    if has_request_context() and session.get("user_id"):
+        return str(session["user_id"])
+    return "system"
+
+def diff_flights(before, after):
+    """Journal changes between two {flight_id: flight dict} maps"""
+    changes = []
+    for flight_id, flight in after.items():
+        old = before.get(flight_id)
+        if old is None:
+            changes.append({"op": "flight_created", "flight_id": flight_id, "flight": flight})
+            continue
+        if old == flight:
+            continue
+        old_pilots = {p.get("user_id"): p for p in old.get("pilots", [])}
+        new_pilots = {p.get("user_id"): p for p in flight.get("pilots", [])}
+        pilot_changes = [{"op": "pilot_joined", "flight_id": flight_id, "pilot": p, "flight": flight}
+                         for user_id, p in new_pilots.items() if user_id not in old_pilots]
+        pilot_changes += [{"op": "pilot_left", "flight_id": flight_id, "pilot": p, "flight": flight}
+                          for user_id, p in old_pilots.items() if user_id not in new_pilots]
+        changes.extend(pilot_changes or [{"op": "flight_updated", "flight_id": flight_id, "flight": flight}])
+    for flight_id, flight in before.items():
+        if flight_id not in after:
+            changes.append({"op": "flight_deleted", "flight_id": flight_id, "flight": flight})
+    return changes
+
+def diff_signups(before, after):
+    """Journal changes between two signup lists"""
+    old = {s.get("user_id"): s for s in before}
+    new = {s.get("user_id"): s for s in after}
+    changes = [{"op": "signup_saved", "signup": s} for user_id, s in new.items() if old.get(user_id) != s]
+    changes += [{"op": "signup_removed", "user_id": user_id} for user_id in old if user_id not in new]
+    return changes
+
+def diff_mission(before, after):
+    """Journal changes between two versions of a mission document (before is None for a new mission)"""
+    if before is None:
+        return [{"op": "mission_created"}]
+    changes = []
+    # The version always moves and resources are derived from the flights, so neither is journaled
+    fields = {key: after.get(key) for key in set(before) | set(after)
+              if key not in MISSION_PAYLOAD_KEYS and key != "version" and before.get(key) != after.get(key)}
+    if fields:
+        changes.append({"op": "mission_updated", "fields": fields})
+    changes += diff_flights(before.get("flights", {}), after.get("flights", {}))
+    changes += diff_signups(before.get("signups", []), after.get("signups", []))
+    return changes
+
+def make_entry(seq, changes):
+    return {
+        "seq": seq,
+        "time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "actor": current_actor(),
+        "changes": changes
+    }
+
+def compaction_due(seq):
+    return seq % COMPACT_EVERY == 0
+
+def entries_since(entries, since):
+    """Entries after since, or None if the kept entries don't reach back to since"""
+    if not entries or entries[0]["seq"] > since + 1:
+        return None
+    return [entry for entry in entries if entry["seq"] > since]
+
+def entries_to_delta(entries):
+    """Fold journal entries into one flight delta: {"flights": {changed flights}, "removed": [flight_ids]}"""
+    flights, removed = {}, []
+    for entry in entries:
+        for change in entry["changes"]:
+            flight_id = change.get("flight_id")
+            if flight_id is None:
+                continue
+            if change["op"] == "flight_deleted":
+                flights.pop(flight_id, None)
+                if flight_id not in removed:
+                    removed.append(flight_id)
+            else:
+                flights[flight_id] = change["flight"]
+                if flight_id in removed:
+                    removed.remove(flight_id)
+    return {"flights": flights, "removed": removed}
@@ -0,0 +1,134 @@
+"""
+Local member store shared by disc_bot.py (writer) and the Flask app (reader).
+
+The bot already holds the whole guild member list in memory, so it pushes
+every member's roles and nickname into a small SQLite file next to the app:
+a full snapshot when it connects, then one row per on_member_update /
+on_member_join / on_member_remove. The website reads a member with a local
+indexed lookup instead of an HTTP call to the bot.
+
+The bot also writes a heartbeat; if the heartbeat is too old the website
+treats the store as stale and falls back to asking the bot directly. Every
+member write also stamps "changed_at", which the website uses to tell when
+pages showing display names have to be rendered again.
+
+This module must not import Flask: the bot imports it too.
+"""
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+DEFAULT_FILENAME = "members.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    user_id TEXT PRIMARY KEY,
+    nickname TEXT NOT NULL,
+    roles TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+class MemberStore:
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Writer side (bot) ---
+
+    def upsert_member(self, user_id, nickname, roles):
+        """Store one member. roles is a list of {"id", "name"} dicts."""
+        self._connect().execute(
+            """INSERT INTO members (user_id, nickname, roles, updated_at) VALUES (?, ?, ?, ?)
+               ON CONFLICT(user_id) DO UPDATE SET nickname = excluded.nickname,
+                   roles = excluded.roles, updated_at = excluded.updated_at""",
+            (str(user_id), nickname, json.dumps(roles), time.time())
+        )
+        self._changed()
+
+    def remove_member(self, user_id):
+        self._connect().execute("DELETE FROM members WHERE user_id = ?", (str(user_id),))
+        self._changed()
+
+    def replace_all(self, members):
+        """Replace the whole store with a snapshot: {user_id: {"nickname", "roles"}}"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM members")
+            conn.executemany(
+                "INSERT INTO members (user_id, nickname, roles, updated_at) VALUES (?, ?, ?, ?)",
+                [(str(user_id), m["nickname"], json.dumps(m["roles"]), now) for user_id, m in members.items()]
+            )
+            self._set_meta(conn, "synced_at", now)
+            self._set_meta(conn, "heartbeat_at", now)
+            self._set_meta(conn, "changed_at", now)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def heartbeat(self):
+        """Mark the store as live (the bot is connected and pushing updates)"""
+        self._set_meta(self._connect(), "heartbeat_at", time.time())
+
+    def _changed(self):
+        # time.time() alone could repeat within a clock tick; only the value changing matters
+        conn = self._connect()
+        changed_at = max(time.time(), (self.get_meta("changed_at") or 0) + 1e-6)
+        self._set_meta(conn, "changed_at", changed_at)
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                     "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    # --- Reader side (website) ---
+
+    def get_member(self, user_id):
+        """Return {"nickname", "roles"} for a member, or None if they aren't in the guild"""
+        row = self._connect().execute(
+            "SELECT nickname, roles FROM members WHERE user_id = ?", (str(user_id),)).fetchone()
+        if row is None:
+            return None
+        return {"nickname": row[0], "roles": json.loads(row[1])}
+
+    def get_members(self, user_ids):
+        """Return {user_id: {"nickname", "roles"}} for the given IDs that are in the guild"""
+        user_ids = [str(user_id) for user_id in user_ids]
+        members = {}
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(user_ids), 500):
+            chunk = user_ids[i:i + 500]
+            rows = self._connect().execute(
+                f"SELECT user_id, nickname, roles FROM members WHERE user_id IN ({','.join('?' * len(chunk))})",
+                chunk).fetchall()
+            for user_id, nickname, roles in rows:
+                members[user_id] = {"nickname": nickname, "roles": json.loads(roles)}
+        return members
+
+    def get_meta(self, key):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def is_live(self, max_age):
+        """True if the bot has synced the store and sent a heartbeat within max_age seconds"""
+        heartbeat = self.get_meta("heartbeat_at")
+        return heartbeat is not None and time.time() - heartbeat < max_age
@@ -0,0 +1,323 @@
+"""
+Cached Discord member profiles (roles, nickname, display name) from the bot API.
+
+Every page used to ask the bot for the user's roles on every request. Profiles
+are now kept in memory per worker process:
+
+- fresh for MEMBER_CACHE_TTL seconds: served straight from memory
+- stale (up to MEMBER_CACHE_STALE_TTL): served from memory while a background
+  thread refreshes it, so the request never waits on the bot
+- bot unreachable: a fallback profile (no roles, Discord username) is cached
+  for MEMBER_CACHE_NEGATIVE_TTL seconds so a dead bot isn't retried on every request
+
+When disc_bot.py is keeping the local member store up to date (its heartbeat
+is younger than MEMBER_STORE_MAX_AGE), profiles are read from the store and
+the bot is never called per request. If the store has never been synced, the
+cache is warm-started once per process from the bot's GET /members snapshot.
+
+Profiles read from the store are kept in the cache too, so profile_due() is
+an in-memory check whatever the source. Under asgi.py a profile that is due is
+fetched on the event loop (prefetch_member_profile) before the request is
+handed to Flask.
+
+profile_generation() changes whenever a profile might have, so anything
+cached with display names in it (the mission roster fragment) can put it in
+its cache key.
+"""
+import os
+import re
+import time
+import threading
+import logging
+import msgspec
+from flask import current_app
+from utils.bot_client import get_bot_client, BotUnavailable, BotError
+from utils.member_store import MemberStore, DEFAULT_FILENAME as MEMBER_STORE_FILENAME
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+DEFAULT_STALE_TTL = 3600
+DEFAULT_NEGATIVE_TTL = 30
+DEFAULT_STORE_MAX_AGE = 180
+
+# user_id -> {"profile": dict, "fetched_at": float, "ok": bool}
+_cache = {}
+_cache_lock = threading.Lock()
+# user_ids with a background refresh in flight
+_refreshing = set()
+# Set once the GET /members warm start has been tried in this process
+_warm_started = False
+# Bumped whenever a cached profile changes or is dropped
+_generation = 0
+
+def clean_display_name(nickname):
+    """Remove text within square brackets or parentheses, strip, and make the whole name uppercase"""
+    return re.sub(r'\[.*?\]|\(.*?\)', '', nickname or '').strip().upper()
+
+def make_profile(user_id, roles, nickname):
+    return {
+        "user_id": str(user_id),
+        "roles": roles,
+        "nickname": nickname,
+        "display_name": clean_display_name(nickname)
+    }
+
+def _cache_ttls():
+    config = current_app.config
+    return {
+        "ttl": config.get("MEMBER_CACHE_TTL", DEFAULT_TTL),
+        "stale_ttl": config.get("MEMBER_CACHE_STALE_TTL", DEFAULT_STALE_TTL),
+        "negative_ttl": config.get("MEMBER_CACHE_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL),
+    }
+
+def _settings():
+    return dict(
+        _cache_ttls(),
+        # Resolved here because background refreshes run outside the app context
+        client=get_bot_client(),
+        store_max_age=current_app.config.get("MEMBER_STORE_MAX_AGE", DEFAULT_STORE_MAX_AGE),
+    )
+
+def get_member_store():
+    """The member store written by disc_bot.py, opened once per app"""
+    store = current_app.extensions.get("member_store")
+    if store is None:
+        path = current_app.config.get("MEMBER_STORE_PATH") or \
+            os.path.join(current_app.instance_path, MEMBER_STORE_FILENAME)
+        store = MemberStore(path)
+        current_app.extensions["member_store"] = store
+    return store
+
+def _profile_from_store(store, user_id, fallback_name):
+    """Profile from the member store; members not in the guild get no roles"""
+    member = store.get_member(user_id)
+    if member is None:
+        return make_profile(user_id, [], fallback_name)
+    return make_profile(user_id, member["roles"], member["nickname"])
+
+def _warm_start(settings):
+    """Fill the cache from the bot's member snapshot (once per process)"""
+    global _warm_started, _generation
+    with _cache_lock:
+        if _warm_started:
+            return
+        _warm_started = True
+    try:
+        members = settings["client"].get("/members", timeout=(0.5, 5)).get("members", {})
+    except (BotUnavailable, BotError) as e:
+        logger.error(f"Could not warm-start member cache from bot: {e}")
+        return
+    now = time.time()
+    with _cache_lock:
+        for user_id, member in members.items():
+            _cache[user_id] = {"profile": make_profile(user_id, member.get("roles", []), member.get("nickname")),
+                               "fetched_at": now, "ok": True}
+        _generation += 1
+    logger.info(f"Member cache warm-started with {len(members)} members")
+
+def _fetch_profile(settings, user_id, fallback_name):
+    """Ask the bot for roles and nickname. Returns (profile, ok)."""
+    try:
+        logger.debug(f"Fetching roles and nickname for user ID {user_id}")
+        response_data = settings["client"].get(f"/roles/{user_id}")
+        return make_profile(user_id, response_data.get("roles", []),
+                            response_data.get("nickname", fallback_name)), True
+    except BotError as e:
+        # The bot answered: the user just isn't in the guild
+        logger.debug(f"Bot has no member {user_id}: {e}")
+        return make_profile(user_id, [], fallback_name), True
+    except (BotUnavailable, ValueError) as e:
+        logger.error(f"Could not fetch roles from bot: {e}")
+        return make_profile(user_id, [], fallback_name), False
+
+def _store(user_id, profile, ok):
+    global _generation
+    with _cache_lock:
+        previous = _cache.get(user_id)
+        if not ok and previous and previous["ok"]:
+            # Keep serving the last good profile rather than dropping the user's roles;
+            # just push its timestamp so the bot isn't retried on every request
+            previous["fetched_at"] = time.time()
+            return previous["profile"]
+        if previous and previous["profile"] != profile:
+            _generation += 1
+        _cache[user_id] = {"profile": profile, "fetched_at": time.time(), "ok": ok}
+        return profile
+
+def _refresh_in_background(settings, user_id, fallback_name):
+    with _cache_lock:
+        if user_id in _refreshing:
+            return
+        _refreshing.add(user_id)
+
+    def run():
+        try:
+            profile, ok = _fetch_profile(settings, user_id, fallback_name)
+            _store(user_id, profile, ok)
+        finally:
+            with _cache_lock:
+                _refreshing.discard(user_id)
+
+    threading.Thread(target=run, name=f"member-refresh-{user_id}", daemon=True).start()
+
+def get_member_profile(user_id, fallback_name):
+    """Get {"user_id", "roles", "nickname", "display_name"} for a Discord user.
+
+    fallback_name (usually the Discord username) is used as the nickname when
+    the bot can't be reached.
+    """
+    user_id = str(user_id)
+    settings = _settings()
+    try:
+        store = get_member_store()
+        if store.is_live(settings["store_max_age"]):
+            return _store(user_id, _profile_from_store(store, user_id, fallback_name), True)
+        if store.get_meta("synced_at") is None:
+            _warm_start(settings)
+    except Exception as e:
+        logger.error(f"Member store unavailable, asking the bot instead: {e}")
+    now = time.time()
+    with _cache_lock:
+        entry = _cache.get(user_id)
+    if entry:
+        age = now - entry["fetched_at"]
+        ttl = settings["ttl"] if entry["ok"] else settings["negative_ttl"]
+        if age < ttl:
+            return entry["profile"]
+        if entry["ok"] and age < settings["stale_ttl"]:
+            _refresh_in_background(settings, user_id, fallback_name)
+            return entry["profile"]
+    profile, ok = _fetch_profile(settings, user_id, fallback_name)
+    return _store(user_id, profile, ok)
+
+def prefetch_settings():
+    """Settings for prefetch_member_profile(), or None while profiles don't come from the bot.
+
+    Used by asgi.py once profile_due() says the user's profile is missing: it
+    is then fetched on the event loop before the request reaches Flask, so the
+    view finds it in the cache.
+    """
+    settings = _settings()
+    try:
+        store = get_member_store()
+        if store.is_live(settings["store_max_age"]):
+            return None
+        if store.get_meta("synced_at") is None and not _warm_started:
+            # The first lookup warm-starts the whole cache instead
+            return None
+    except Exception:
+        # get_member_profile logs it and asks the bot
+        pass
+    if settings["client"].is_open():
+        return None
+    return settings
+
+def profile_due(user_id):
+    """True if get_member_profile(user_id) would have to look the profile up (memory only, no I/O)"""
+    settings = _cache_ttls()
+    with _cache_lock:
+        entry = _cache.get(str(user_id))
+    if not entry:
+        return True
+    age = time.time() - entry["fetched_at"]
+    if age < (settings["ttl"] if entry["ok"] else settings["negative_ttl"]):
+        return False
+    return not (entry["ok"] and age < settings["stale_ttl"])
+
+async def prefetch_member_profile(settings, http, user_id, fallback_name):
+    """Fetch a profile through an aiohttp session and cache it, like get_member_profile's blocking fetch"""
+    user_id = str(user_id)
+    try:
+        response_data = await settings["client"].request_async(http, "GET", f"/roles/{user_id}")
+        profile, ok = make_profile(user_id, response_data.get("roles", []),
+                                   response_data.get("nickname", fallback_name)), True
+    except BotError as e:
+        logger.debug(f"Bot has no member {user_id}: {e}")
+        profile, ok = make_profile(user_id, [], fallback_name), True
+    except BotUnavailable as e:
+        logger.error(f"Could not fetch roles from bot: {e}")
+        profile, ok = make_profile(user_id, [], fallback_name), False
+    return _store(user_id, profile, ok)
+
+def _fetch_profiles(settings, fallback_names):
+    """Resolve many users with one POST /members call. Returns ({user_id: profile}, ok)."""
+    try:
+        body = msgspec.json.encode({"user_ids": list(fallback_names)})
+        response_data = settings["client"].post("/members", data=body,
+                                                headers={"Content-Type": "application/json"})
+    except (BotUnavailable, BotError, ValueError) as e:
+        logger.error(f"Could not fetch member batch from bot: {e}")
+        return {user_id: make_profile(user_id, [], name) for user_id, name in fallback_names.items()}, False
+    members = response_data.get("members", {})
+    profiles = {}
+    for user_id, name in fallback_names.items():
+        member = members.get(user_id)
+        if member is None:
+            profiles[user_id] = make_profile(user_id, [], name)
+        else:
+            profiles[user_id] = make_profile(user_id, member.get("roles", []), member.get("nickname", name))
+    return profiles, True
+
+def get_member_profiles(fallback_names):
+    """Get profiles for many users at once, e.g. everyone on a mission roster.
+
+    fallback_names maps user_id -> name to use when the bot doesn't know the user.
+    Returns {user_id: profile}. Cached profiles are reused, and everything
+    else is resolved with a single batch call to the bot.
+    """
+    fallback_names = {str(user_id): name for user_id, name in fallback_names.items()}
+    if not fallback_names:
+        return {}
+    settings = _settings()
+    try:
+        store = get_member_store()
+        if store.is_live(settings["store_max_age"]):
+            members = store.get_members(fallback_names)
+            return {user_id: make_profile(user_id, members[user_id]["roles"], members[user_id]["nickname"])
+                    if user_id in members else make_profile(user_id, [], name)
+                    for user_id, name in fallback_names.items()}
+    except Exception as e:
+        logger.error(f"Member store unavailable, asking the bot instead: {e}")
+
+    now = time.time()
+    profiles = {}
+    missing = {}
+    with _cache_lock:
+        for user_id, name in fallback_names.items():
+            entry = _cache.get(user_id)
+            ttl = settings["ttl"] if entry and entry["ok"] else settings["negative_ttl"]
+            if entry and now - entry["fetched_at"] < ttl:
+                profiles[user_id] = entry["profile"]
+            else:
+                missing[user_id] = name
+    if missing:
+        fetched, ok = _fetch_profiles(settings, missing)
+        for user_id, profile in fetched.items():
+            profiles[user_id] = _store(user_id, profile, ok)
+    return profiles
+
+def profile_generation():
+    """A value that changes whenever any member profile may have changed.
+
+    Combines this process's cache generation with the member store's last
+    write by the bot, so a nickname change counts whichever one served it.
+    """
+    with _cache_lock:
+        generation = _generation
+    try:
+        changed_at = get_member_store().get_meta("changed_at")
+    except Exception as e:
+        logger.error(f"Member store unavailable: {e}")
+        changed_at = None
+    return (generation, changed_at)
+
+def invalidate_member(user_id=None):
+    """Drop one cached profile (or all of them) so the next lookup asks the bot again"""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(str(user_id), None)
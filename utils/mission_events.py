@@ -0,0 +1,142 @@
+"""
+Server-Sent Events stream of flight changes for one mission.
+
+The stream polls the mission's change tag (a stat() or one indexed row, see
+StorageBackend.mission_tag) every SSE_POLL_INTERVAL seconds. When the tag
+moves, the new entries of the mission's change journal (utils/journal.py)
+are read and sent as deltas, so the mission itself is only loaded when the
+journal can't answer (first connect of an old client, or compacted history).
+Polling storage instead of an in-process queue means writes made by any
+worker process show up.
+
+Events (data is JSON, the event id is the mission version):
+
+    snapshot  {"version": 7, "flights": {flight_id: flight, ...}}
+    delta     {"version": 8, "flights": {changed or added flights}, "removed": [flight_ids]}
+    deleted   {}   the mission no longer exists; the stream ends
+
+A client reconnecting with Last-Event-ID (or ?since=<version>) is sent only
+what it missed. Streams end after SSE_MAX_DURATION seconds so a worker thread
+isn't held forever; EventSource reconnects by itself. Under the ASGI server
+(asgi.py) the same MissionEventStream is driven from the event loop instead,
+so a waiting stream holds no thread at all.
+
+The stream is off unless LIVE_ROSTER is set: under mod_wsgi every open
+signup page would hold a worker thread. asgi.py turns it on unless the
+config says otherwise; without it the roster is as of the page load.
+"""
+import json
+import time
+import logging
+from flask import current_app
+from utils.storage import load_mission, mission_tag, mission_changes
+from utils.journal import entries_to_delta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_MAX_DURATION = 300
+KEEPALIVE_INTERVAL = 15
+# Sent once per stream: how long (ms) EventSource waits before reconnecting
+RETRY_MS = 3000
+
+def sse_event(event, data, event_id=None):
+    """Format one Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+def flight_changes(mission_id, flight_ids):
+    """The current state of some flights as a delta: present ones under "flights", missing ones under "removed" """
+    mission = load_mission(mission_id) or {}
+    flights = mission.get("flights", {})
+    return {
+        "version": mission.get("version", 0),
+        "flights": {flight_id: flights[flight_id] for flight_id in flight_ids if flight_id in flights},
+        "removed": [flight_id for flight_id in flight_ids if flight_id not in flights]
+    }
+
+def _parse_version(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class MissionEventStream:
+    """What one client has been sent so far; poll() returns the events to send now.
+
+    poll() only reads storage (it needs an app context), so a server can call it
+    from whatever thread or event loop it serves the stream from.
+    """
+
+    def __init__(self, mission_id, since=None):
+        self.mission_id = mission_id
+        self.version = _parse_version(since)
+        self.tag = None
+        self.recheck = False
+        self.last_sent = time.monotonic()
+        # Set once the mission is gone and the stream should end
+        self.done = False
+
+    def poll(self):
+        events = []
+        current = mission_tag(self.mission_id)
+        if current is None:
+            self.done = True
+            return [sse_event("deleted", {})]
+        changed = current[0] != self.tag
+        if changed or self.recheck:
+            self.tag = current[0]
+            entries = mission_changes(self.mission_id, self.version) if self.version is not None else None
+            if entries is None:
+                # Nothing to replay from: send the whole flight table
+                mission = load_mission(self.mission_id)
+                if mission is None:
+                    self.done = True
+                    return [sse_event("deleted", {})]
+                if mission.get("version", 0) != self.version:
+                    self.version = mission.get("version", 0)
+                    events.append(sse_event("snapshot", {"version": self.version, "flights": mission.get("flights", {})},
+                                            self.version))
+                self.recheck = False
+            else:
+                for entry in entries:
+                    self.version = entry["seq"]
+                    events.append(sse_event("delta", dict(entries_to_delta([entry]), version=self.version), self.version))
+                # The JSON backend appends the journal entry just after writing the mission file,
+                # so a new tag with no entry yet is looked at once more on the next poll
+                self.recheck = changed and not entries
+        elif time.monotonic() - self.last_sent >= KEEPALIVE_INTERVAL:
+            # Comment line: keeps proxies from closing an idle connection
+            events.append(": keepalive\n\n")
+        if events:
+            self.last_sent = time.monotonic()
+        return events
+
+def live_roster_enabled():
+    """Whether signup pages open the event stream (LIVE_ROSTER, off by default)"""
+    return bool(current_app.config.get("LIVE_ROSTER", False))
+
+def stream_settings():
+    """(poll interval, max duration) in seconds, from config"""
+    return (current_app.config.get("SSE_POLL_INTERVAL", DEFAULT_POLL_INTERVAL),
+            current_app.config.get("SSE_MAX_DURATION", DEFAULT_MAX_DURATION))
+
+def stream_opening():
+    return f"retry: {RETRY_MS}\n\n"
+
+def mission_events(mission_id, since=None):
+    """Generator of SSE text for a mission; run it inside stream_with_context"""
+    poll_interval, max_duration = stream_settings()
+    deadline = time.monotonic() + max_duration
+    stream = MissionEventStream(mission_id, since)
+    yield stream_opening()
+    while time.monotonic() < deadline:
+        yield from stream.poll()
+        if stream.done:
+            return
+        time.sleep(poll_interval)
+    logger.debug(f"Event stream for mission {mission_id} reached SSE_MAX_DURATION, client will reconnect")
@@ -3,185 +3,221 @@ Utilities for managing resources like callsigns, frequencies, etc.
 """
 import os
 import json
-import random
-from utils.storage import load_json, save_json, load_mission, save_mission
+import time
+import threading
+from utils.storage import load_json, load_mission
 import logging
 
 logger = logging.getLogger(__name__)
 
-def load_resources():
-    """Load resource files from config directory"""
-    resources = {}
-    # Use project-level config directory instead of instance/config
-    config_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
-    
-    resource_files = {
-        "squadrons": "squadrons.json",
-        "bases": "bases.json",
-        "aircraft": "aircraft.json",
-        "frequencies": "frequencies.json",
-        "operations_areas": "operations_areas.json",
-        "tacan_channels": "tacan_channels.json"
-    }
-    
-    for resource_name, filename in resource_files.items():
-        try:
-            resource_path = os.path.join(config_dir, filename)
-            resources[resource_name] = load_json(resource_path)
-        except FileNotFoundError:
-            logger.warning(f"Resource file {filename} not found, creating empty resource")
-            resources[resource_name] = {}
-            # Do not try to create config_dir or save files if missing, just skip or log
-    
-    return resources
-
-# Global resources cache
-_resources = None
+# Project-level config directory (not instance/config)
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
+
+RESOURCE_FILES = {
+    "squadrons": "squadrons.json",
+    "bases": "bases.json",
+    "aircraft": "aircraft.json",
+    "frequencies": "frequencies.json",
+    "operations_areas": "operations_areas.json",
+    "tacan_channels": "tacan_channels.json",
+    "mission_types": "mission_types.json",
+    "navdata": "navdata.json"
+}
+
+# Files a deployment may leave out; the allocators fall back to the full
+# TACAN channel space (see utils/allocators.py)
+OPTIONAL_RESOURCE_FILES = {"tacan_channels": []}
+
+# How often (seconds) get_resources() stats the config files for changes.
+# In between, the cached data is returned without touching the disk.
+CHECK_INTERVAL = 2
+
+# Reference data cache. "data" is replaced by a new dict whenever a file changes,
+# so a caller holding the old dict never sees a half-reloaded state.
+_cache = {"data": {}, "stamps": {}, "version": 0, "checked_at": None}
+_cache_lock = threading.Lock()
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _reload_changed():
+    """Reload the config files whose mtime/size changed. Caller holds _cache_lock."""
+    stamps = dict(_cache["stamps"])
+    changed = {}
+    for resource_name, filename in RESOURCE_FILES.items():
+        resource_path = os.path.join(CONFIG_DIR, filename)
+        stamp = _file_stamp(resource_path)
+        if resource_name in stamps and stamps[resource_name] == stamp:
+            continue
+        if stamp is None:
+            # Logged once per process: the missing file's stamp (None) is remembered below
+            if resource_name in OPTIONAL_RESOURCE_FILES:
+                logger.info(f"Optional resource file {filename} not found, using the defaults")
+                changed[resource_name] = OPTIONAL_RESOURCE_FILES[resource_name]
+            else:
+                logger.warning(f"Resource file {filename} not found, creating empty resource")
+                changed[resource_name] = {}
+        else:
+            try:
+                changed[resource_name] = load_json(resource_path)
+            except (json.JSONDecodeError, OSError) as e:
+                # Keep serving the last good copy (e.g. the file is mid-edit)
+                logger.error(f"Could not reload {filename}, keeping previous data: {e}")
+                if resource_name in _cache["data"]:
+                    continue
+                changed[resource_name] = {}
+        stamps[resource_name] = stamp
+    if changed:
+        data = dict(_cache["data"])
+        data.update(changed)
+        _cache["data"] = data
+        _cache["stamps"] = stamps
+        _cache["version"] += 1
+        logger.info(f"Reference data reloaded ({', '.join(changed)}), version {_cache['version']}")
+
+def _check_due(now):
+    checked_at = _cache["checked_at"]
+    return checked_at is None or now - checked_at >= CHECK_INTERVAL
 
 def get_resources():
-    """Get resources, loading from disk if necessary"""
-    global _resources
-    if _resources is None:
-        _resources = load_resources()
-    return _resources
-
-def get_mission_resource_usage(mission_id):
-    """Get or initialize resource usage for a mission (stored inside the mission JSON)."""
-    mission = load_mission(mission_id)
-    if mission is None:
-        raise ValueError(f"Mission {mission_id} not found")
-    # Initialize resources if not present
+    """Get the reference data, reloading any config file that changed on disk.
+
+    The returned dict is shared: treat it as read-only.
+    """
+    now = time.monotonic()
+    if _check_due(now):
+        with _cache_lock:
+            if _check_due(now):
+                _reload_changed()
+                _cache["checked_at"] = now
+    return _cache["data"]
+
+def get_resources_version():
+    """Counter bumped every time reference data is reloaded; use it to invalidate derived data"""
+    get_resources()
+    return _cache["version"]
+
+def get_resources_stamp():
+    """Return (fingerprint, mtime) of the config files for HTTP validators.
+
+    Unlike the version counter, these are the same in every worker process and
+    after a restart. mtime is the newest file's modification time (seconds), or None.
+    """
+    get_resources()
+    stamps = _cache["stamps"]
+    fingerprint = tuple(sorted(stamps.items(), key=lambda item: item[0]))
+    mtimes = [stamp[0] for stamp in stamps.values() if stamp]
+    return fingerprint, (max(mtimes) / 1e9 if mtimes else None)
+
+def reload_resources():
+    """Check the config files right now instead of waiting for CHECK_INTERVAL"""
+    with _cache_lock:
+        _cache["checked_at"] = None
+    return get_resources()
+
+def _resource_usage(mission):
+    """Get or initialize resource usage inside a mission dict"""
     if 'resources' not in mission:
         mission['resources'] = {
-            "flight_numbers": {},  # By squadron
-            "transponder_codes": [],
-            "tacan_channels": [],
-            "frequencies": []
+            "allocations": {}  # Taken values per pool, see utils/allocators.py
         }
-        save_mission(mission)
     return mission['resources']
 
-def save_mission_resource_usage(mission_id, resource_usage):
-    """Save resource usage for a mission (inside the mission JSON)."""
+def aircraft_in_use(mission):
+    """Get the {tail: flight_id} map of aircraft taken in a mission dict (read-only).
+
+    Missions saved before the map existed get a copy rebuilt from their pilots,
+    which isn't stored until an aircraft is claimed or released, so checking a
+    tail never changes the mission.
+    """
+    in_use = mission.get("resources", {}).get("aircraft_in_use")
+    if in_use is None:
+        in_use = {
+            str(pilot["aircraft"]): flight_id
+            for flight_id, flight in mission.get("flights", {}).items()
+            for pilot in flight.get("pilots", [])
+            if pilot.get("aircraft")
+        }
+    return in_use
+
+def _stored_aircraft_in_use(mission):
+    """aircraft_in_use(), stored in the mission so it can be changed"""
+    return _resource_usage(mission).setdefault("aircraft_in_use", aircraft_in_use(mission))
+
+def claim_aircraft(mission, tail, flight_id):
+    """Mark a tail as used by a flight (caller saves the mission). Raises ValueError if it's taken."""
+    tail = str(tail)
+    if tail in aircraft_in_use(mission):
+        raise ValueError(f"Aircraft {tail} is already in use")
+    _stored_aircraft_in_use(mission)[tail] = flight_id
+
+def release_aircraft(mission, tail):
+    """Free a tail again (caller saves the mission)"""
+    if tail:
+        _stored_aircraft_in_use(mission).pop(str(tail), None)
+
+def get_available_aircraft(mission_id, squadron):
+    """Get the squadron's aircraft that no flight in the mission is using"""
     mission = load_mission(mission_id)
     if mission is None:
         raise ValueError(f"Mission {mission_id} not found")
-    mission['resources'] = resource_usage
-    save_mission(mission)
-
-def get_next_flight_number(mission_id, squadron):
-    """Get the next flight number for a squadron"""
-    resources = get_mission_resource_usage(mission_id)
-    
-    # If squadron doesn't exist in flight numbers, add it
-    if squadron not in resources["flight_numbers"]:
-        resources["flight_numbers"][squadron] = 0
-    
-    # Increment flight number
-    resources["flight_numbers"][squadron] += 1
-    
-    # Save updated resources
-    save_mission_resource_usage(mission_id, resources)
-    
-    return resources["flight_numbers"][squadron]
-
-def get_callsign(squadron):
-    """Get a callsign from the squadron's callsign bank"""
-    resources = get_resources()
-    
-    # Get squadron data
-    squadron_data = resources["squadrons"].get(squadron, {})
-    callsigns = squadron_data.get("callsigns", ["UNKNOWN"])
-    
-    # Return a random callsign from the bank
-    return random.choice(callsigns)
-
-def get_transponder_codes(mission_id, count=4):
-    """Get a bank of unique transponder codes"""
-    resources = get_mission_resource_usage(mission_id)
-    all_resources = get_resources()
-    
-    # Get available transponder codes
-    available_codes = all_resources.get("frequencies", {}).get("transponder", [])
-    used_codes = resources["transponder_codes"]
-    
-    # Filter out used codes
-    available_codes = [code for code in available_codes if code not in used_codes]
-    
-    # If we don't have enough available codes, generate random ones
-    if len(available_codes) < count:
-        available_codes.extend([f"{random.randint(0, 7)}{random.randint(0, 7)}{random.randint(0, 7)}{random.randint(0, 7)}" 
-                              for _ in range(count - len(available_codes))])
-    
-    # Select 'count' codes
-    selected_codes = random.sample(available_codes, count)
-    
-    # Update used codes
-    resources["transponder_codes"].extend(selected_codes)
-    save_mission_resource_usage(mission_id, resources)
-    
-    return selected_codes
-
-def get_tacan_channel(mission_id):
-    """Get a unique TACAN channel"""
-    resources = get_mission_resource_usage(mission_id)
-    all_resources = get_resources()
-    
-    # Get available TACAN channels
-    available_channels = all_resources.get("tacan_channels", [])
-    used_channels = resources["tacan_channels"]
-    
-    # Filter out used channels
-    available_channels = [ch for ch in available_channels if ch not in used_channels]
-    
-    # If no channels are available, generate a random one
-    if not available_channels:
-        # Format: 2-digit number (1-126) + X/Y
-        channel = f"{random.randint(1, 126)}{random.choice(['X', 'Y'])}"
-    else:
-        channel = random.choice(available_channels)
-    
-    # Update used channels
-    resources["tacan_channels"].append(channel)
-    save_mission_resource_usage(mission_id, resources)
-    
-    return channel
-
-def get_intraflight_freq(mission_id):
-    """Get a unique intraflight frequency"""
-    resources = get_mission_resource_usage(mission_id)
-    all_resources = get_resources()
-    
-    # Get available frequencies
-    available_freqs = all_resources.get("frequencies", {}).get("intraflight", [])
-    used_freqs = resources["frequencies"]
-    
-    # Filter out used frequencies
-    available_freqs = [freq for freq in available_freqs if freq not in used_freqs]
-    
-    # If no frequencies are available, generate a random one
-    if not available_freqs:
-        # Format: VHF frequency in format 1xx.xx
-        freq = f"1{random.randint(0, 9)}{random.randint(0, 9)}.{random.randint(0, 9)}{random.randint(0, 5)}"
-    else:
-        freq = random.choice(available_freqs)
-    
-    # Update used frequencies
-    resources["frequencies"].append(freq)
-    save_mission_resource_usage(mission_id, resources)
-    
-    return freq
-
-def get_aircraft_at_base(base_id):
-    """Get available aircraft at a specific base (uses 'location' field)"""
-    resources = get_resources()
-    all_aircraft = resources.get("aircraft", {})
-    # Use 'location' instead of 'base' for matching
-    aircraft_at_base = {
-        ac_id: ac_data for ac_id, ac_data in all_aircraft.items()
-        if ac_data.get("location") == base_id
-    }
-    return aircraft_at_base
+    in_use = aircraft_in_use(mission)
+    return {tail: data for tail, data in get_squadron_aircraft(squadron).items() if tail not in in_use}
+
+# Aircraft lookups, rebuilt whenever the reference data version changes.
+# by_location/by_squadron/by_squadron_location/by_type map to {tail: aircraft data};
+# squadron_locations maps a squadron to the bases where it has aircraft.
+_aircraft_index = {"version": None}
+
+def _build_aircraft_index(all_aircraft):
+    index = {"by_location": {}, "by_squadron": {}, "by_squadron_location": {}, "by_type": {}}
+    for ac_id, ac_data in all_aircraft.items():
+        location = ac_data.get("location")
+        squadron = ac_data.get("squadron")
+        index["by_location"].setdefault(location, {})[ac_id] = ac_data
+        index["by_squadron"].setdefault(squadron, {})[ac_id] = ac_data
+        index["by_squadron_location"].setdefault((squadron, location), {})[ac_id] = ac_data
+        index["by_type"].setdefault(ac_data.get("type"), {})[ac_id] = ac_data
+    index["squadron_locations"] = {}
+    for squadron, location in index["by_squadron_location"]:
+        index["squadron_locations"].setdefault(squadron, []).append(location)
+    return index
+
+def get_aircraft_index():
+    """Aircraft indexes for the current reference data (read-only, shared)"""
+    global _aircraft_index
+    get_resources()
+    with _cache_lock:
+        data, version = _cache["data"], _cache["version"]
+    index = _aircraft_index
+    if index["version"] != version:
+        index = _build_aircraft_index(data.get("aircraft", {}))
+        index["version"] = version
+        _aircraft_index = index
+    return index
+
+def get_aircraft_at_base(base_id, squadron=None):
+    """Get available aircraft at a specific base (uses 'location' field), optionally for one squadron"""
+    index = get_aircraft_index()
+    if squadron:
+        return dict(index["by_squadron_location"].get((squadron, base_id), {}))
+    return dict(index["by_location"].get(base_id, {}))
+
+def get_squadron_aircraft(squadron):
+    """Get all aircraft of a squadron, regardless of base"""
+    return dict(get_aircraft_index()["by_squadron"].get(squadron, {}))
+
+def get_squadron_bases(squadron):
+    """Get the IDs of the bases where a squadron has aircraft"""
+    return list(get_aircraft_index()["squadron_locations"].get(squadron, []))
+
+def get_aircraft_by_type(aircraft_type):
+    """Get all aircraft of one type (e.g. F-16C)"""
+    return dict(get_aircraft_index()["by_type"].get(aircraft_type, {}))
 
 def get_bases():
     """Get all bases"""
@@ -193,6 +229,16 @@ def get_operations_areas():
     resources = get_resources()
     return resources.get("operations_areas", {})
 
+def get_mission_types():
+    """Get all mission types (transponder prefixes etc.)"""
+    resources = get_resources()
+    return resources.get("mission_types", {})
+
+def get_navdata():
+    """Get navigation reference data"""
+    resources = get_resources()
+    return resources.get("navdata", {})
+
 def get_squadrons():
     """Get all squadrons"""
     resources = get_resources()
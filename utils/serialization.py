@@ -0,0 +1,56 @@
+"""
+On-disk formats for mission and campaign documents.
+
+- pretty:  indent=4 JSON, the original format (<key>.json)
+- compact: JSON without whitespace (<key>.json)
+- msgpack: binary MessagePack (<key>.msgpack)
+
+Reading is chosen by file extension, and JSON is parsed the same way whether
+it's pretty or compact, so files written in any earlier format keep loading
+after the format is switched. A file is only rewritten in the new format the
+next time it is saved.
+"""
+import json
+import msgspec
+
+DEFAULT_FORMAT = "pretty"
+
+class Codec:
+    def __init__(self, name, extension, encode):
+        self.name = name
+        self.extension = extension
+        self.encode = encode
+
+    def __repr__(self):
+        return f"<Codec {self.name}>"
+
+_msgpack_encoder = msgspec.msgpack.Encoder()
+_json_encoder = msgspec.json.Encoder()
+
+CODECS = {
+    "pretty": Codec("pretty", ".json", lambda data: json.dumps(data, indent=4).encode('utf-8')),
+    "compact": Codec("compact", ".json", _json_encoder.encode),
+    "msgpack": Codec("msgpack", ".msgpack", _msgpack_encoder.encode),
+}
+
+# Every extension a document may have on disk
+EXTENSIONS = (".json", ".msgpack")
+
+def get_codec(name):
+    """Look up a format by name ("pretty", "compact" or "msgpack")"""
+    try:
+        return CODECS[name or DEFAULT_FORMAT]
+    except KeyError:
+        raise ValueError(f"Unknown file format '{name}' (expected one of {', '.join(CODECS)})")
+
+def decode(raw, extension):
+    """Decode file contents according to the file's extension"""
+    if extension == ".msgpack":
+        return msgspec.msgpack.decode(raw)
+    return msgspec.json.decode(raw)
+
+def read_document(path):
+    """Read and decode a document file in any supported format"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return decode(raw, path.suffix)
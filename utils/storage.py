@@ -4,6 +4,12 @@ from pathlib import Path
 import uuid
 from datetime import datetime
 from flask import current_app
+import logging
+from utils.backends import get_backend
+from utils.backends.base import make_key
+from utils.fileio import atomic_write_json
+
+logger = logging.getLogger(__name__)
 
 def ensure_data_dirs():
     """Ensure all data directories exist"""
@@ -31,19 +37,14 @@ def generate_mission_id(operation_code, mission_type, sequence_number=None):
     operation_code = operation_code.strip().upper()
     mission_type = mission_type.upper() if mission_type.upper() in ["EX", "OP"] else "EX"
     if not sequence_number:
-        data_dir = ensure_data_dirs()
-        # Use simple filename: e.g., PP15EX01.json
-        pattern = f"{operation_code}{mission_type}*.json"
-        existing_missions = list(data_dir.glob(pattern))
+        # Mission keys are the simplified IDs, e.g. PP15EX01
+        prefix = operation_code + mission_type
         highest_seq = 0
-        for mission_path in existing_missions:
+        for mission_key in get_backend().list_mission_keys(prefix):
             try:
-                fname = mission_path.stem  # e.g., PP15EX01
-                if fname.startswith(operation_code + mission_type):
-                    seq_part = fname[len(operation_code + mission_type):]
-                    seq = int(seq_part)
-                    highest_seq = max(highest_seq, seq)
-            except (ValueError, IndexError):
+                seq = int(mission_key[len(prefix):])
+                highest_seq = max(highest_seq, seq)
+            except ValueError:
                 continue
         sequence_number = highest_seq + 1
     seq_formatted = f"{int(sequence_number):02d}"
@@ -53,102 +54,112 @@ def generate_mission_id(operation_code, mission_type, sequence_number=None):
 def mission_id_to_filename(mission_id):
     """Convert mission ID to a simple, safe filename (e.g., PP15EX01.json)"""
     # Remove all non-alphanumeric characters
-    return ''.join(c for c in mission_id if c.isalnum()) + ".json"
+    return make_key(mission_id) + ".json"
 
 def campaign_id_to_filename(campaign_id):
     """Convert campaign ID to a simple, safe filename (e.g., PP15.json)"""
-    return ''.join(c for c in campaign_id if c.isalnum()) + ".json"
+    return make_key(campaign_id) + ".json"
 
 def save_mission(mission_data):
-    """Save mission data to JSON file"""
-    data_dir = ensure_data_dirs()
+    """Save mission data through the configured storage backend"""
     mission_id = mission_data.get("id")
     
     if not mission_id:
         mission_id = generate_mission_id("", "EX")
         mission_data["id"] = mission_id
     
-    file_path = data_dir / mission_id_to_filename(mission_id)
-    
-    with open(file_path, 'w') as f:
-        json.dump(mission_data, f, indent=4)
+    get_backend().save_mission(make_key(mission_id), mission_data)
     
     return mission_id
 
+def mission_transaction(mission_id):
+    """Atomic read-modify-write of a mission, safe across threads and worker processes.
+
+    Usage:
+        with mission_transaction(mission_id) as mission:
+            if not mission:
+                ...  # mission doesn't exist
+            mission["flights"][flight_id] = ...
+
+    Changes are saved when the block exits normally (and only if something
+    changed); if the block raises, nothing is written. Every code path that
+    loads a mission in order to change it should go through here instead of
+    load_mission() + save_mission().
+    """
+    return get_backend().mission_transaction(make_key(mission_id))
+
 def save_campaign(campaign_data):
-    """Save campaign data to JSON file"""
-    data_dir = ensure_campaign_data_dir()
+    """Save campaign data through the configured storage backend"""
     campaign_id = campaign_data.get("id")
     if not campaign_id:
         # Use shorthand as ID
         campaign_id = campaign_data.get("shorthand", str(uuid.uuid4()))
         campaign_data["id"] = campaign_id
-    file_path = data_dir / campaign_id_to_filename(campaign_id)
-    with open(file_path, 'w') as f:
-        json.dump(campaign_data, f, indent=4)
+    get_backend().save_campaign(make_key(campaign_id), campaign_data)
     return campaign_id
 
 def load_mission(mission_id):
     """Load a mission by its simplified ID (e.g. PP15EX01). Always set mission['id'] and mission['name']."""
-    data_dir = ensure_data_dirs()
-    file_path = data_dir / mission_id_to_filename(mission_id)
-    if not file_path.exists():
-        return None
-    with open(file_path, 'r', encoding='utf-8') as f:
-        mission = json.load(f)
-    # Always set 'id' to the filename (PP15EX01), and 'name' to the stylized name (PP15 | EX01)
-    mission['id'] = mission_id
-    mission['name'] = mission.get('id_raw') or mission.get('name') or mission.get('id')
-    if 'id_raw' in mission:
-        del mission['id_raw']
-    return mission
+    return get_backend().load_mission(make_key(mission_id))
 
 def load_campaign(campaign_id):
-    """Load campaign data from JSON file"""
-    data_dir = ensure_campaign_data_dir()
-    file_path = data_dir / campaign_id_to_filename(campaign_id)
-    if not file_path.exists():
-        return None
-    with open(file_path, 'r') as f:
-        return json.load(f)
+    """Load campaign data"""
+    return get_backend().load_campaign(make_key(campaign_id))
+
+def list_missions(campaign_id=None, status=None):
+    """List all missions, returning a list of dicts with 'id' (PP15EX01) and 'name' (PP15 | EX01)
 
-def list_missions():
-    """List all missions, returning a list of dicts with 'id' (PP15EX01) and 'name' (PP15 | EX01)"""
-    missions_dir = os.path.join(os.path.dirname(__file__), '../instance/missions')
-    missions = []
-    for fname in os.listdir(missions_dir):
-        if fname.endswith('.json'):
-            mission_id = fname[:-5]
-            with open(os.path.join(missions_dir, fname), 'r', encoding='utf-8') as f:
-                mission = json.load(f)
-            mission['id'] = mission_id
-            mission['name'] = mission.get('id_raw') or mission.get('name') or mission.get('id')
-            if 'id_raw' in mission:
-                del mission['id_raw']
-            missions.append(mission)
-    missions.sort(key=lambda m: m.get('time_real', ''))
-    return missions
+    Only summary fields are returned (no flights, signups or resource usage),
+    sorted by time_real and optionally filtered by campaign and status.
+    """
+    return get_backend().list_missions(campaign_id=campaign_id, status=status)
 
 def list_campaigns():
     """List all campaigns"""
-    data_dir = ensure_campaign_data_dir()
-    campaigns = []
-    for campaign_file in data_dir.glob("*.json"):
-        with open(campaign_file, 'r') as f:
-            try:
-                campaign_data = json.load(f)
-                if "id" not in campaign_data:
-                    campaign_data["id"] = campaign_file.stem
-                campaigns.append({
-                    "id": campaign_data.get("id"),
-                    "name": campaign_data.get("name"),
-                    "shorthand": campaign_data.get("shorthand"),
-                    "type": campaign_data.get("type"),
-                    "status": campaign_data.get("status")
-                })
-            except json.JSONDecodeError:
-                continue
-    return campaigns
+    return get_backend().list_campaigns()
+
+def mission_tag(mission_id):
+    """(tag, mtime) that changes with every write of a mission, read without loading it. None if missing."""
+    return get_backend().mission_tag(make_key(mission_id))
+
+def collection_tag(name):
+    """(tag, mtime) that changes whenever any mission ("missions") or campaign ("campaigns") is written"""
+    return get_backend().collection_tag(name)
+
+def mission_changes(mission_id, since):
+    """Journal entries of a mission after version since (see utils/journal.py).
+
+    Returns None if the journal doesn't reach back that far; load the mission instead.
+    """
+    return get_backend().mission_changes(make_key(mission_id), since)
+
+def list_flights(mission_id):
+    """Get all flight dicts for a mission"""
+    return get_backend().list_flights(make_key(mission_id))
+
+def load_flight(mission_id, flight_id):
+    """Get one flight dict of a mission, or None"""
+    return get_backend().load_flight(make_key(mission_id), flight_id)
+
+def find_flight_mission(flight_id):
+    """Get the ID of the mission a flight belongs to, or None (index lookup, no mission scan)"""
+    return get_backend().find_flight_mission(flight_id)
+
+def save_flight(mission_id, flight_data):
+    """Add or replace one flight of a mission"""
+    return get_backend().save_flight(make_key(mission_id), flight_data)
+
+def delete_flight(mission_id, flight_id):
+    """Remove one flight from a mission"""
+    return get_backend().delete_flight(make_key(mission_id), flight_id)
+
+def list_signups(mission_id):
+    """Get all signups for a mission"""
+    return get_backend().list_signups(make_key(mission_id))
+
+def save_signup(mission_id, signup):
+    """Add or replace the signup for signup['user_id'] on a mission"""
+    return get_backend().save_signup(make_key(mission_id), signup)
 
 def load_reference_data(data_type):
     """Load reference data (bases, airframes, etc.)"""
@@ -166,6 +177,5 @@ def load_json(path):
         return json.load(f)
 
 def save_json(path, data):
-    """Save JSON data to a file path."""
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
\ No newline at end of file
+    """Save JSON data to a file path (atomically, so readers never see a partial file)."""
+    atomic_write_json(path, data)
\ No newline at end of file